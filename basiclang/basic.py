@@ -2,32 +2,271 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
+import os
 from basiclang.context import SymbolTable
-from typing import List, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
 
 from basiclang.error import Error
-from basiclang.token import Token
-from basiclang.lexer import Lexer
-from basiclang.parser import Parser
-from basiclang.interpreter import Context, Interpreter, Number
+from basiclang.lexer import Lexer, RegexLexer
+from basiclang.parser import Parser, PrattParser, StackParser
+from basiclang.interpreter import Context, Interpreter, Number, StackInterpreter
+from basiclang.compiler import Compiler, UnboxedCompiler
+from basiclang.bytecode import VM, BytecodeCompiler
+from basiclang.cse import CSEInterpreter
+from basiclang.budget import Budget, MeteredInterpreter
+from basiclang.inference import TypeInference, Types
+from basiclang.cache import ParseCache
+from basiclang.optimizer import Optimizer
 
+# run() and the shell share this table; basiclang.session gives every
+# caller its own variables over a shared read-only base.
 global_symbol_table = SymbolTable()
 global_symbol_table.set("null", Number(0))
 
 
-def run(fn: str, text: str) -> Tuple[List[Token], Error]:
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.get_tokens()
+def evaluate_tree(node, context: Context, short_circuit: bool = False, types: Types = None):
+    return Interpreter(short_circuit, types).visit(node, context)
+
+
+def evaluate_stack(node, context: Context, short_circuit: bool = False, types: Types = None):
+    # The work-stack loop has no per-node operator to specialize; it ignores types.
+    return StackInterpreter(short_circuit).visit(node, context)
+
+
+def compile_closure(node, short_circuit: bool = False, types: Types = None):
+    return Compiler(short_circuit, types).compile(node)
+
+
+def compile_unboxed(node, short_circuit: bool = False, types: Types = None):
+    return UnboxedCompiler(short_circuit, types).compile(node)
+
+
+def compile_bytecode(node, short_circuit: bool = False, types: Types = None):
+    return partial(VM().run, BytecodeCompiler(short_circuit, types).compile(node))
+
+
+def evaluate_closure(node, context: Context, short_circuit: bool = False, types: Types = None):
+    return compile_closure(node, short_circuit, types)(context)
+
+
+def evaluate_unboxed(node, context: Context, short_circuit: bool = False, types: Types = None):
+    return compile_unboxed(node, short_circuit, types)(context)
+
+
+def evaluate_bytecode(node, context: Context, short_circuit: bool = False, types: Types = None):
+    return compile_bytecode(node, short_circuit, types)(context)
+
+
+def evaluate_cse(node, context: Context, short_circuit: bool = False, types: Types = None):
+    return CSEInterpreter(short_circuit, types).run(node, context)
+
+
+ENGINES = {
+    'tree': evaluate_tree,
+    'stack': evaluate_stack,
+    'closure': evaluate_closure,
+    'unboxed': evaluate_unboxed,
+    'bytecode': evaluate_bytecode,
+    'cse': evaluate_cse,
+}
+
+# Engines that turn a tree into a program of the context before running it.
+# The programs keep no state between runs, so with a ParseCache
+# run_in_context builds one per tree and options and reuses it.
+COMPILERS = {
+    'closure': compile_closure,
+    'unboxed': compile_unboxed,
+    'bytecode': compile_bytecode,
+}
+
+LEXERS = {
+    'char': Lexer,
+    'regex': RegexLexer,
+}
+
+PARSERS = {
+    'recursive': Parser,
+    'stack': StackParser,
+    'pratt': PrattParser,
+}
+
+
+def parse(fn: str, text: str, lexer: str = 'char', cache: ParseCache = None, parser: str = 'recursive', ln: int = 0):
+    if cache is not None:
+        node = cache.get(fn, text)
+        if node is not None:
+            return node, None
+
+    lexer_class = LEXERS.get(lexer)
+    if lexer_class is None:
+        raise ValueError(f"Unknown lexer '{lexer}'")
+    parser_class = PARSERS.get(parser)
+    if parser_class is None:
+        raise ValueError(f"Unknown parser '{parser}'")
+    tokens, error = lexer_class(fn, text, ln).get_tokens()
     if error:
         return None, error
 
-    parser = Parser(tokens)
-    ast = parser.parse()
+    ast = parser_class(tokens).parse()
     if ast.error:
         return None, ast.error
 
-    interpretor = Interpreter()
+    if cache is not None:
+        cache.put(fn, text, ast.node)
+    return ast.node, None
+
+
+def prepare(cache: ParseCache, fn: str, text: str, node, key, build, valid=None):
+    # What build() makes from a parsed tree, kept next to it in the cache;
+    # a kept value that valid() rejects is built again and replaced.
+    if not isinstance(cache, ParseCache):
+        return build()
+    value = cache.get_compiled(fn, text, node, key)
+    if value is None or (valid is not None and not valid(value)):
+        value = build()
+        cache.put_compiled(fn, text, node, key, value)
+    return value
+
+
+def specialized(node, context: Context, engine: str, short_circuit: bool) -> Tuple:
+    types = TypeInference(short_circuit).infer(node, context.symbol_table)
+    program = COMPILERS[engine](node, short_circuit, types) if engine in COMPILERS else None
+    return types, program
+
+
+def run_in_context(context: Context, fn: str, text: str, engine: str = 'tree', lexer: str = 'char',
+                   cache: ParseCache = None, optimize: bool = False, parser: str = 'recursive',
+                   short_circuit: bool = False, budget: Budget = None,
+                   specialize: bool = False) -> Tuple[Number, Error]:
+    evaluate = ENGINES.get(engine)
+    if evaluate is None:
+        raise ValueError(f"Unknown engine '{engine}'")
+    if budget is not None and engine != 'tree':
+        raise ValueError(f"Engine '{engine}' does not support budgets; use 'tree'")
+
+    parsed, error = parse(fn, text, lexer, cache, parser)
+    if error:
+        return None, error
+    node = parsed
+    if optimize:
+        node = prepare(cache, fn, text, parsed, ('optimize', short_circuit),
+                       lambda: Optimizer(short_circuit).optimize(parsed))
+
+    types = program = None
+    if specialize:
+        # Inferred from the variables of the context that first ran the tree
+        # and kept with the program built from it; reused while its guards
+        # hold for this context, and inferred again from it when they fail.
+        types, program = prepare(cache, fn, text, parsed, (engine, optimize, short_circuit, 'specialize'),
+                                 lambda: specialized(node, context, engine, short_circuit),
+                                 lambda value: value[0].check(context))
+    elif engine in COMPILERS and budget is None:
+        program = prepare(cache, fn, text, parsed, (engine, optimize, short_circuit),
+                          lambda: COMPILERS[engine](node, short_circuit))
+
+    if budget is not None:
+        res = MeteredInterpreter(budget, short_circuit, types=types).run(node, context)
+    elif program is not None:
+        res = program(context)
+    else:
+        res = evaluate(node, context, short_circuit, types)
+    return res.value, res.error
+
+
+def run(fn: str, text: str, engine: str = 'tree', lexer: str = 'char', cache: ParseCache = None,
+        optimize: bool = False, parser: str = 'recursive', short_circuit: bool = False,
+        budget: Budget = None, specialize: bool = False) -> Tuple[Number, Error]:
     context = Context('<program>')
     context.symbol_table = global_symbol_table
-    res = interpretor.visit(ast.node, context)
-    return res.value, res.error
+    return run_in_context(context, fn, text, engine, lexer, cache, optimize, parser, short_circuit, budget,
+                          specialize)
+
+
+def run_item(item: Tuple, options: dict) -> Tuple[Number, Error]:
+    fn, text = item[0], item[1]
+    bindings = item[2] if len(item) > 2 else None
+
+    context = Context('<program>')
+    context.symbol_table.set("null", Number(0))
+    if bindings:
+        for name, value in bindings.items():
+            context.symbol_table.set(name, Number(value))
+    value, error = run_in_context(context, fn, text, **options)
+
+    # Results travel back to the parent process; drop the item's variables.
+    context.symbol_table = SymbolTable()
+    return value, error
+
+
+def run_chunk(chunk: List[Tuple], options: dict) -> List[Tuple[Number, Error]]:
+    return [run_item(item, options) for item in chunk]
+
+
+def chunked(items: Iterable, size: int) -> Iterator[List]:
+    items = iter(items)
+    while True:
+        chunk = list(islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def run_many(items: Iterable[Tuple], workers: int = None, chunksize: int = 256, ordered: bool = True,
+             engine: str = 'tree', lexer: str = 'char', optimize: bool = False,
+             parser: str = 'recursive', short_circuit: bool = False, budget: Budget = None,
+             specialize: bool = False) -> Iterator[Tuple]:
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'")
+    if budget is not None and engine != 'tree':
+        raise ValueError(f"Engine '{engine}' does not support budgets; use 'tree'")
+    if lexer not in LEXERS:
+        raise ValueError(f"Unknown lexer '{lexer}'")
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown parser '{parser}'")
+    if workers is not None and workers < 1:
+        raise ValueError('workers must be at least 1')
+    if chunksize < 1:
+        raise ValueError('chunksize must be at least 1')
+    options = {'engine': engine, 'lexer': lexer, 'optimize': optimize, 'parser': parser,
+               'short_circuit': short_circuit, 'budget': budget, 'specialize': specialize}
+    # Arguments are checked above, when run_many is called; the pool only
+    # starts once the results are iterated.
+    return run_pool(items, workers, chunksize, ordered, options)
+
+
+def run_pool(items: Iterable[Tuple], workers: int, chunksize: int, ordered: bool, options: dict) -> Iterator[Tuple]:
+    # At most two chunks per worker are in flight, and the next chunk is only
+    # read from items when one comes back, so a generator of millions of rows
+    # is never read far ahead of the results.
+    window = 2 * (workers or os.cpu_count() or 1)
+    chunks = chunked(items, chunksize)
+    futures = {}
+    start = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        def submit() -> None:
+            nonlocal start
+            chunk = next(chunks, None)
+            if chunk is not None:
+                futures[executor.submit(run_chunk, chunk, options)] = start
+                start += len(chunk)
+
+        for _ in range(window):
+            submit()
+        while futures:
+            if ordered:
+                # Dicts keep insertion order: the oldest chunk is first.
+                done = [next(iter(futures))]
+            else:
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                first = futures.pop(future)
+                results = future.result()
+                submit()
+                if ordered:
+                    yield from results
+                else:
+                    for i, (value, error) in enumerate(results):
+                        yield first + i, value, error
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import math
+import time
+
+from basiclang.context import Context
+from basiclang.error import BudgetError
+from basiclang.interpreter import BINARY_OPS, Interpreter
+from basiclang.node import BinOpNode
+from basiclang.rtresult import RTResult
+from basiclang.token import TT_MUL, TT_POW, op_key
+
+# Limits for one evaluation. max_steps caps the number of nodes visited,
+# deadline the seconds a run may take, and max_bits the size of any integer
+# a '*' or '^' produces. Result sizes are estimated from the operands before
+# the operation runs, since a single int ** int can take minutes: a product
+# has at most the sum of the operands' bit lengths, a power about
+# exponent * log2(|base|) bits. A limit of None is not enforced.
+#
+# Every exceeded limit is a BudgetError at the node being evaluated. The
+# deadline is checked between nodes: it bounds the time spent walking the
+# tree, while the bit limit bounds the cost of each single operation.
+
+
+class Budget:
+    def __init__(self, max_steps: int = None, deadline: float = None, max_bits: int = None) -> None:
+        self.max_steps = max_steps
+        self.deadline = deadline
+        self.max_bits = max_bits
+
+    def __repr__(self) -> str:
+        return f'Budget(max_steps={self.max_steps}, deadline={self.deadline}, max_bits={self.max_bits})'
+
+
+def result_bits(key, left, right) -> float:
+    if type(left) is not int or type(right) is not int:
+        return 0
+    if key == TT_MUL:
+        return left.bit_length() + right.bit_length()
+    if right < 0 or -1 <= left <= 1:
+        return 1
+    if right.bit_length() > 1000:
+        # Too large for a float, and far beyond any sensible limit.
+        return math.inf
+    return right * math.log2(abs(left))
+
+
+class MeteredInterpreter(Interpreter):
+    def __init__(self, budget: Budget, short_circuit: bool = False, clock=time.monotonic, types=None) -> None:
+        super().__init__(short_circuit, types)
+        self.budget = budget
+        self.clock = clock
+        self.steps = 0
+        self.expires = None
+
+    def run(self, node, context: Context) -> RTResult:
+        self.steps = 0
+        if self.budget.deadline is not None:
+            self.expires = self.clock() + self.budget.deadline
+        else:
+            self.expires = None
+        return self.visit(node, context)
+
+    def visit(self, node, context: Context) -> RTResult:
+        self.steps += 1
+        budget = self.budget
+        if budget.max_steps is not None and self.steps > budget.max_steps:
+            return RTResult().failure(BudgetError(node.pos_start, node.pos_end,
+                                                  f'Step budget of {budget.max_steps} exceeded', context))
+        if self.expires is not None and self.clock() > self.expires:
+            return RTResult().failure(BudgetError(node.pos_start, node.pos_end,
+                                                  f'Deadline of {budget.deadline}s exceeded', context))
+        return super().visit(node, context)
+
+    def visit_BinOpNode(self, node: BinOpNode, context: Context) -> RTResult:
+        key = op_key(node.op_tok)
+        max_bits = self.budget.max_bits
+        if max_bits is None or key not in (TT_MUL, TT_POW):
+            return super().visit_BinOpNode(node, context)
+
+        res = RTResult()
+        left = res.register(self.visit(node.left_node, context))
+        if res.error:
+            return res
+        right = res.register(self.visit(node.right_node, context))
+        if res.error:
+            return res
+
+        if result_bits(key, left.value, right.value) > max_bits:
+            return res.failure(BudgetError(node.pos_start, node.pos_end,
+                                           f'Result would exceed {max_bits} bits', context))
+        result, error = BINARY_OPS[key](left, right)
+        if error:
+            return res.failure(error)
+        return res.success(result.set_pos(node.pos_start, node.pos_end))
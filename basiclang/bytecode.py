@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import marshal
+import math
+import operator
+import sys
+from array import array
+from typing import List, Tuple
+
+from basiclang.context import Context
+from basiclang.error import RTError
+from basiclang.interpreter import SHORT_CIRCUIT_OPS, op_key, result_pos
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.operators import RAW_BINARY_OPS
+from basiclang.position import Position, SourceFile
+from basiclang.resolver import Frame, Resolver
+from basiclang.rtresult import Number, RTResult
+from basiclang.token import TT_DIV, TT_KEYWORD, TT_MINUS, TT_PLUS
+
+# Every instruction is an (opcode, argument) pair of machine integers. The
+# positions side table holds one (pos_start, pos_end) entry per instruction
+# and is only read to build an RTError or to box a value leaving the VM.
+# Jump arguments are absolute offsets into the code array; a jump taken by
+# short-circuit AND/OR leaves int(left) on the stack as the result.
+
+LOAD_CONST = 0
+LOAD_NAME = 1
+STORE_NAME = 2
+BINARY_OP = 3
+BINARY_DIV = 4
+UNARY_NEG = 5
+UNARY_NOT = 6
+JUMP_IF_FALSE = 7
+JUMP_IF_TRUE = 8
+
+BINARY_OP_KEYS = [key for key in RAW_BINARY_OPS if key != TT_DIV]
+BINARY_OP_FUNCS = [RAW_BINARY_OPS[key] for key in BINARY_OP_KEYS]
+BINARY_OP_INDEX = {key: i for i, key in enumerate(BINARY_OP_KEYS)}
+
+# Specialized operators that type inference picks, after the generic ones.
+BINARY_OP_FUNCS += [operator.pow, math.pow]
+BINARY_OP_FUNC_INDEX = {func: i for i, func in enumerate(BINARY_OP_FUNCS)}
+
+BYTECODE_MAGIC = b'BSBC'
+BYTECODE_VERSION = 3
+
+
+class Bytecode:
+    def __init__(self, code: array, consts: List, names: List[str], positions: List[Tuple[Position, Position]],
+                 pos_start: Position, pos_end: Position) -> None:
+        self.code = code
+        self.consts = consts
+        self.names = names
+        self.positions = positions
+        self.pos_start = pos_start
+        self.pos_end = pos_end
+
+    def dumps(self) -> bytes:
+        source = self.pos_start.source
+        positions = tuple((start.idx, end.idx) if start else None for start, end in self.positions)
+        root = (self.pos_start.idx, self.pos_end.idx)
+        payload = (BYTECODE_VERSION, sys.byteorder, self.code.itemsize, self.code.tobytes(),
+                   tuple(self.consts), tuple(self.names), positions, root, source.fn, source.text, source.ln)
+        return BYTECODE_MAGIC + marshal.dumps(payload)
+
+    @staticmethod
+    def loads(data: bytes) -> Bytecode:
+        if data[:len(BYTECODE_MAGIC)] != BYTECODE_MAGIC:
+            raise ValueError('Not a basiclang bytecode blob')
+        payload = marshal.loads(data[len(BYTECODE_MAGIC):])
+        if payload[0] != BYTECODE_VERSION:
+            raise ValueError(f'Unsupported bytecode version {payload[0]}')
+        byteorder, itemsize, raw, consts, names, positions, root, fn, ftxt, ln = payload[1:]
+        source = SourceFile(fn, ftxt, ln)
+
+        code = array('l')
+        if itemsize == code.itemsize:
+            code.frombytes(raw)
+            if byteorder != sys.byteorder:
+                code.byteswap()
+        else:
+            code.extend(int.from_bytes(raw[i:i + itemsize], byteorder, signed=True)
+                        for i in range(0, len(raw), itemsize))
+
+        def span(entry):
+            if entry is None:
+                return None, None
+            return Position(entry[0], source), Position(entry[1], source)
+
+        pos_start, pos_end = span(root)
+        return Bytecode(code, list(consts), list(names), [span(entry) for entry in positions], pos_start, pos_end)
+
+
+class BytecodeCompiler:
+    def __init__(self, short_circuit: bool = False, types=None) -> None:
+        self.short_circuit = short_circuit
+        self.types = types
+        self.code = array('l')
+        self.consts = []
+        self.const_index = {}
+        self.resolver = Resolver()
+        self.positions = []
+
+    def compile(self, node) -> Bytecode:
+        names = self.resolver.resolve(node)
+        self.visit(node)
+        pos_start, pos_end = result_pos(node)
+        return Bytecode(self.code, self.consts, names, self.positions, pos_start, pos_end)
+
+    def emit(self, op: int, arg: int = 0, pos_start: Position = None, pos_end: Position = None) -> None:
+        self.code.append(op)
+        self.code.append(arg)
+        self.positions.append((pos_start, pos_end))
+
+    def add_const(self, value) -> int:
+        key = (type(value), value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def visit(self, node) -> None:
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    def compile_NumberNode(self, node: NumberNode) -> None:
+        self.emit(LOAD_CONST, self.add_const(node.tok.value))
+
+    def compile_VarAccessNode(self, node: VarAccessNode) -> None:
+        self.emit(LOAD_NAME, self.resolver.slot(node.var_name_tok.value), node.pos_start, node.pos_end)
+
+    def compile_VarAssignNode(self, node: VarAssignNode) -> None:
+        self.visit(node.value_node)
+        self.emit(STORE_NAME, self.resolver.slot(node.var_name_tok.value), *result_pos(node.value_node))
+
+    def compile_BinOpNode(self, node: BinOpNode) -> None:
+        key = op_key(node.op_tok)
+        if key != TT_DIV and key not in BINARY_OP_INDEX:
+            raise Exception(f'Unknown binary operator {node.op_tok}')
+        self.visit(node.left_node)
+        if self.short_circuit and key in SHORT_CIRCUIT_OPS:
+            jump = len(self.code)
+            self.emit(JUMP_IF_TRUE if SHORT_CIRCUIT_OPS[key] else JUMP_IF_FALSE)
+            self.visit(node.right_node)
+            self.emit(BINARY_OP, BINARY_OP_INDEX[key])
+            self.code[jump + 1] = len(self.code)
+            return
+        self.visit(node.right_node)
+        typed_op = None if self.types is None else self.types.ops.get(id(node))
+        if key == TT_DIV:
+            self.emit(BINARY_DIV, 0, *result_pos(node.right_node))
+        elif typed_op is not None:
+            self.emit(BINARY_OP, BINARY_OP_FUNC_INDEX[typed_op])
+        else:
+            self.emit(BINARY_OP, BINARY_OP_INDEX[key])
+
+    def compile_UnaryOpNode(self, node: UnaryOpNode) -> None:
+        self.visit(node.node)
+        if node.op_tok.type == TT_MINUS:
+            self.emit(UNARY_NEG)
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            self.emit(UNARY_NOT)
+        elif node.op_tok.type != TT_PLUS:
+            raise Exception(f'Unknown unary operator {node.op_tok}')
+
+
+class VM:
+    def run(self, bytecode: Bytecode, context: Context) -> RTResult:
+        res = RTResult()
+        code = bytecode.code
+        consts = bytecode.consts
+        names = bytecode.names
+        frame = Frame(names, context)
+        slots = frame.slots
+        binary_ops = BINARY_OP_FUNCS
+        stack = []
+        push = stack.append
+        pop = stack.pop
+
+        pc = 0
+        end = len(code)
+        while pc < end:
+            op = code[pc]
+            arg = code[pc + 1]
+            if op == LOAD_NAME:
+                value = slots[arg]
+                if value is None:
+                    pos_start, pos_end = bytecode.positions[pc >> 1]
+                    return res.failure(RTError(pos_start, pos_end, f"'{names[arg]}' is not defined", context))
+                push(value.value)
+            elif op == LOAD_CONST:
+                push(consts[arg])
+            elif op == BINARY_OP:
+                right = pop()
+                stack[-1] = binary_ops[arg](stack[-1], right)
+            elif op == BINARY_DIV:
+                right = pop()
+                if right == 0:
+                    pos_start, pos_end = bytecode.positions[pc >> 1]
+                    return res.failure(RTError(pos_start, pos_end, 'Division by zero', context))
+                stack[-1] = stack[-1] / right
+            elif op == UNARY_NEG:
+                stack[-1] = stack[-1] * -1
+            elif op == UNARY_NOT:
+                stack[-1] = 1 if stack[-1] == 0 else 0
+            elif op == STORE_NAME:
+                pos_start, pos_end = bytecode.positions[pc >> 1]
+                frame.set(arg, Number(stack[-1]).set_context(context).set_pos(pos_start, pos_end))
+            elif op == JUMP_IF_FALSE:
+                if not stack[-1]:
+                    stack[-1] = 0
+                    pc = arg
+                    continue
+            elif op == JUMP_IF_TRUE:
+                if stack[-1]:
+                    stack[-1] = int(stack[-1])
+                    pc = arg
+                    continue
+            else:
+                raise Exception(f'Unknown opcode {op}')
+            pc += 2
+
+        return res.success(Number(pop()).set_context(context).set_pos(bytecode.pos_start, bytecode.pos_end))
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from basiclang.incremental import ChunkPosition
+
+# Cached ASTs are shared between every run that parses the same source, so
+# nothing that evaluates or rewrites them may mutate the nodes in place. The
+# evaluators and the optimizer never do. A Document's tree is edited in place,
+# so put() refuses it; Document.snapshot() gives a copy that can be cached.
+# Sizes are counted in UTF-8 bytes of the source text.
+# Each entry also keeps what was built from its tree, such as compiled
+# closures or bytecode, under a key naming the engine and its options; it is
+# dropped with the entry, and replaced when the entry gets a new tree.
+
+
+def text_size(text: str) -> int:
+    return len(text.encode('utf-8', 'surrogatepass'))
+
+
+class ParseCache:
+    def __init__(self, max_entries: int = 4096, max_bytes: int = None) -> None:
+        if max_entries is None and max_bytes is None:
+            raise ValueError('ParseCache needs max_entries or max_bytes')
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.compiled = {}
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, fn: str, text: str):
+        key = (fn, text)
+        with self.lock:
+            node = self.entries.get(key)
+            if node is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return node
+
+    def put(self, fn: str, text: str, node) -> None:
+        if isinstance(getattr(node, 'pos_start', None), ChunkPosition):
+            raise ValueError('A Document tree changes with every edit; cache Document.snapshot() instead')
+        key = (fn, text)
+        size = text_size(text)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.entries[key] = node
+                self.compiled.pop(key, None)
+                return
+            self.entries[key] = node
+            self.size_bytes += size
+            while ((self.max_entries is not None and len(self.entries) > self.max_entries)
+                   or (self.max_bytes is not None and self.size_bytes > self.max_bytes)):
+                old_key, _ = self.entries.popitem(last=False)
+                self.compiled.pop(old_key, None)
+                self.size_bytes -= text_size(old_key[1])
+                self.evictions += 1
+
+    # node is the tree the caller got from get() or put(), so nothing built
+    # from a tree that has since been replaced is handed out.
+    def get_compiled(self, fn: str, text: str, node, key):
+        with self.lock:
+            if self.entries.get((fn, text)) is not node:
+                return None
+            return self.compiled.get((fn, text), {}).get(key)
+
+    def put_compiled(self, fn: str, text: str, node, key, value) -> None:
+        with self.lock:
+            if self.entries.get((fn, text)) is node:
+                self.compiled.setdefault((fn, text), {})[key] = value
+
+    def items(self) -> List[Tuple[Tuple[str, str], object]]:
+        with self.lock:
+            return list(self.entries.items())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.compiled.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            'entries': len(self.entries),
+            'bytes': self.size_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def __len__(self) -> int:
+        return len(self.entries)
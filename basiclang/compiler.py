@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Callable
+
+from basiclang.context import Context
+from basiclang.error import RTError
+from basiclang.interpreter import BINARY_OPS, SHORT_CIRCUIT_OPS, op_key, result_pos
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.operators import RAW_BINARY_OPS
+from basiclang.resolver import Frame, Resolver
+from basiclang.rtresult import Number, RTResult
+from basiclang.token import TT_DIV, TT_KEYWORD, TT_MINUS, TT_MUL, TT_PLUS
+
+# A compiled node is a closure taking the evaluation frame and returning a
+# (value, error) pair; the operator of every node and the slot of every
+# variable are resolved at compile time. With the Types of an inference pass,
+# operators with known operand types compile to their specialized raw
+# operator.
+
+
+class Compiler:
+    def __init__(self, short_circuit: bool = False, types=None) -> None:
+        self.short_circuit = short_circuit
+        self.types = types
+
+    def compile(self, node) -> Callable[[Context], RTResult]:
+        self.resolver = Resolver()
+        names = self.resolver.resolve(node)
+        code = self.visit(node)
+
+        def program(context: Context) -> RTResult:
+            res = RTResult()
+            value, error = code(Frame(names, context))
+            if error:
+                return res.failure(error)
+            return res.success(value)
+        return program
+
+    def visit(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    def compile_NumberNode(self, node: NumberNode):
+        value = node.tok.value
+        pos_start, pos_end = node.tok.pos_start, node.tok.pos_end
+
+        def number(frame: Frame):
+            return Number(value).set_context(frame.context).set_pos(pos_start, pos_end), None
+        return number
+
+    def compile_VarAccessNode(self, node: VarAccessNode):
+        var_name = node.var_name_tok.value
+        slot = self.resolver.slot(var_name)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def var_access(frame: Frame):
+            value = frame.slots[slot]
+            if value is None:
+                return None, RTError(pos_start, pos_end, f"'{var_name}' is not defined", frame.context)
+            return value.copy().set_pos(pos_start, pos_end), None
+        return var_access
+
+    def compile_VarAssignNode(self, node: VarAssignNode):
+        slot = self.resolver.slot(node.var_name_tok.value)
+        value_code = self.visit(node.value_node)
+
+        def var_assign(frame: Frame):
+            value, error = value_code(frame)
+            if error:
+                return None, error
+            frame.set(slot, value)
+            return value, None
+        return var_assign
+
+    def compile_BinOpNode(self, node: BinOpNode):
+        key = op_key(node.op_tok)
+        op = BINARY_OPS.get(key)
+        if op is None:
+            raise Exception(f'Unknown binary operator {node.op_tok}')
+        left_code = self.visit(node.left_node)
+        right_code = self.visit(node.right_node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if self.short_circuit and key in SHORT_CIRCUIT_OPS:
+            settles = SHORT_CIRCUIT_OPS[key]
+
+            def short_circuit(frame: Frame):
+                left, error = left_code(frame)
+                if error:
+                    return None, error
+                if bool(left.value) == settles:
+                    result = Number(int(left.value)).set_context(left.context)
+                    return result.set_pos(pos_start, pos_end), None
+                right, error = right_code(frame)
+                if error:
+                    return None, error
+                result, error = op(left, right)
+                if error:
+                    return None, error
+                return result.set_pos(pos_start, pos_end), None
+            return short_circuit
+
+        typed_op = None if self.types is None else self.types.ops.get(id(node))
+        if typed_op is not None:
+            def typed_bin_op(frame: Frame):
+                left, error = left_code(frame)
+                if error:
+                    return None, error
+                right, error = right_code(frame)
+                if error:
+                    return None, error
+                result = Number(typed_op(left.value, right.value)).set_context(left.context)
+                return result.set_pos(pos_start, pos_end), None
+            return typed_bin_op
+
+        def bin_op(frame: Frame):
+            left, error = left_code(frame)
+            if error:
+                return None, error
+            right, error = right_code(frame)
+            if error:
+                return None, error
+            result, error = op(left, right)
+            if error:
+                return None, error
+            return result.set_pos(pos_start, pos_end), None
+        return bin_op
+
+    def compile_UnaryOpNode(self, node: UnaryOpNode):
+        operand_code = self.visit(node.node)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        if node.op_tok.type == TT_MINUS:
+            minus_one = Number(-1)
+
+            def negate(frame: Frame):
+                value, error = operand_code(frame)
+                if error:
+                    return None, error
+                result, _ = value.mul(minus_one)
+                return result.set_pos(pos_start, pos_end), None
+            return negate
+        elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            def not_(frame: Frame):
+                value, error = operand_code(frame)
+                if error:
+                    return None, error
+                result, _ = value.not_()
+                return result.set_pos(pos_start, pos_end), None
+            return not_
+        elif node.op_tok.type == TT_PLUS:
+            def plus(frame: Frame):
+                value, error = operand_code(frame)
+                if error:
+                    return None, error
+                return value.set_pos(pos_start, pos_end), None
+            return plus
+        raise Exception(f'Unknown unary operator {node.op_tok}')
+
+
+class EvaluationAbort(Exception):
+    def __init__(self, error: RTError) -> None:
+        super().__init__(error.details)
+        self.error = error
+
+
+# The unboxed closures take the frame and return a raw int/float. Errors
+# unwind through EvaluationAbort, so the happy path allocates neither Number
+# nor RTResult objects and never calls set_pos/set_context; values are boxed
+# only when they are stored in the symbol table or returned to the caller.
+
+
+class UnboxedCompiler:
+    def __init__(self, short_circuit: bool = False, types=None) -> None:
+        self.short_circuit = short_circuit
+        self.types = types
+
+    def compile(self, node) -> Callable[[Context], RTResult]:
+        self.resolver = Resolver()
+        names = self.resolver.resolve(node)
+        code = self.visit(node)
+        pos_start, pos_end = result_pos(node)
+
+        def program(context: Context) -> RTResult:
+            res = RTResult()
+            try:
+                value = code(Frame(names, context))
+            except EvaluationAbort as abort:
+                return res.failure(abort.error)
+            return res.success(Number(value).set_context(context).set_pos(pos_start, pos_end))
+        return program
+
+    def visit(self, node):
+        method_name = f'compile_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_compile_method)
+        return method(node)
+
+    def no_compile_method(self, node):
+        raise Exception(f'No compile_{type(node).__name__} method defined')
+
+    def compile_NumberNode(self, node: NumberNode):
+        value = node.tok.value
+
+        def number(frame: Frame):
+            return value
+        return number
+
+    def compile_VarAccessNode(self, node: VarAccessNode):
+        var_name = node.var_name_tok.value
+        slot = self.resolver.slot(var_name)
+        pos_start, pos_end = node.pos_start, node.pos_end
+
+        def var_access(frame: Frame):
+            value = frame.slots[slot]
+            if value is None:
+                raise EvaluationAbort(RTError(pos_start, pos_end, f"'{var_name}' is not defined", frame.context))
+            return value.value
+        return var_access
+
+    def compile_VarAssignNode(self, node: VarAssignNode):
+        slot = self.resolver.slot(node.var_name_tok.value)
+        value_code = self.visit(node.value_node)
+        pos_start, pos_end = result_pos(node.value_node)
+
+        def var_assign(frame: Frame):
+            value = value_code(frame)
+            frame.set(slot, Number(value).set_context(frame.context).set_pos(pos_start, pos_end))
+            return value
+        return var_assign
+
+    def compile_BinOpNode(self, node: BinOpNode):
+        key = op_key(node.op_tok)
+        op = RAW_BINARY_OPS.get(key)
+        if op is None:
+            raise Exception(f'Unknown binary operator {node.op_tok}')
+        left = self.visit(node.left_node)
+        right = self.visit(node.right_node)
+
+        if key == TT_PLUS:
+            def add(frame: Frame):
+                return left(frame) + right(frame)
+            return add
+        if key == TT_MINUS:
+            def sub(frame: Frame):
+                return left(frame) - right(frame)
+            return sub
+        if key == TT_MUL:
+            def mul(frame: Frame):
+                return left(frame) * right(frame)
+            return mul
+        if key == TT_DIV:
+            pos_start, pos_end = result_pos(node.right_node)
+
+            def div(frame: Frame):
+                dividend = left(frame)
+                divisor = right(frame)
+                if divisor == 0:
+                    raise EvaluationAbort(RTError(pos_start, pos_end, 'Division by zero', frame.context))
+                return dividend / divisor
+            return div
+        if self.short_circuit and key == (TT_KEYWORD, 'AND'):
+            def and_(frame: Frame):
+                value = left(frame)
+                if not value:
+                    return 0
+                return int(right(frame))
+            return and_
+        if self.short_circuit and key == (TT_KEYWORD, 'OR'):
+            def or_(frame: Frame):
+                value = left(frame)
+                if value:
+                    return int(value)
+                return int(right(frame))
+            return or_
+
+        if self.types is not None:
+            op = self.types.ops.get(id(node), op)
+
+        def bin_op(frame: Frame):
+            return op(left(frame), right(frame))
+        return bin_op
+
+    def compile_UnaryOpNode(self, node: UnaryOpNode):
+        operand = self.visit(node.node)
+        if node.op_tok.type == TT_MINUS:
+            def negate(frame: Frame):
+                return operand(frame) * -1
+            return negate
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            def not_(frame: Frame):
+                return 1 if operand(frame) == 0 else 0
+            return not_
+        if node.op_tok.type == TT_PLUS:
+            return operand
+        raise Exception(f'Unknown unary operator {node.op_tok}')
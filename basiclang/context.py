@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 from __future__ import annotations
+from typing import List, Tuple
+
 from basiclang.position import Position
 
 
@@ -19,7 +21,7 @@ class SymbolTable:
 
     def get(self, name: str):
         val = self.symbols.get(name, None)
-        if val == None and self.parent != None:
+        if val is None and self.parent is not None:
             return self.parent.get(name)
         return val
 
@@ -28,3 +30,9 @@ class SymbolTable:
 
     def remove(self, name: str) -> None:
         del self.symbols[name]
+
+    def items(self) -> List[Tuple[str, object]]:
+        return list(self.symbols.items())
+
+    def clear(self) -> None:
+        self.symbols = {}
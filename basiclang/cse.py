@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Dict, FrozenSet, List
+
+from basiclang.context import Context
+from basiclang.interpreter import Interpreter
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.rtresult import RTResult
+from basiclang.token import op_key
+
+# Common-subexpression elimination for the tree walker. The analysis
+# hash-conses the AST: structurally equal subtrees get the same class id,
+# except subtrees containing a VarAssignNode, which have side effects and are
+# never shared. Classes of operator nodes that occur more than once are
+# evaluated once per run and their value is kept until the run ends.
+#
+# A cached value is only valid while the variables it read keep their
+# values. Assignments inside the expression drop the cached classes that read
+# the assigned name, so `(a + 1) * (VAR a = 2) * (a + 1)` evaluates both
+# copies of `a + 1`. Errors are never cached; they end the run anyway.
+#
+# Every result of a cacheable node carries the span of that node, so a hit
+# returns a copy of the cached Number moved to the span of the node being
+# visited: values, results and error positions are those of Interpreter.
+
+
+class Analysis:
+    def __init__(self) -> None:
+        self.keys = {}
+        self.counts: List[int] = []
+        self.reads: List[FrozenSet[str]] = []
+        self.sizes: List[int] = []
+        self.nodes = []
+        self.shared: Dict[int, int] = {}
+        self.readers: Dict[str, List[int]] = {}
+
+    def analyze(self, node) -> Analysis:
+        self.visit(node)
+        for node, cid in self.nodes:
+            if self.counts[cid] > 1:
+                self.shared[id(node)] = cid
+        for cid in sorted(set(self.shared.values())):
+            for name in self.reads[cid]:
+                self.readers.setdefault(name, []).append(cid)
+        return self
+
+    def intern(self, key, reads: FrozenSet[str], size: int) -> int:
+        cid = self.keys.get(key)
+        if cid is None:
+            cid = self.keys[key] = len(self.counts)
+            self.counts.append(0)
+            self.reads.append(reads)
+            self.sizes.append(size)
+        self.counts[cid] += 1
+        return cid
+
+    def visit(self, node):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node)
+
+    def no_visit_method(self, node):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def visit_NumberNode(self, node: NumberNode):
+        value = node.tok.value
+        return self.intern(('number', type(value), value), frozenset(), 1)
+
+    def visit_VarAccessNode(self, node: VarAccessNode):
+        name = node.var_name_tok.value
+        return self.intern(('var', name), frozenset((name,)), 1)
+
+    def visit_VarAssignNode(self, node: VarAssignNode):
+        self.visit(node.value_node)
+        return None
+
+    def visit_BinOpNode(self, node: BinOpNode):
+        left = self.visit(node.left_node)
+        right = self.visit(node.right_node)
+        if left is None or right is None:
+            return None
+        cid = self.intern((op_key(node.op_tok), left, right), self.reads[left] | self.reads[right],
+                          self.sizes[left] + self.sizes[right] + 1)
+        self.nodes.append((node, cid))
+        return cid
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode):
+        operand = self.visit(node.node)
+        if operand is None:
+            return None
+        cid = self.intern(('unary', op_key(node.op_tok), operand), self.reads[operand], self.sizes[operand] + 1)
+        self.nodes.append((node, cid))
+        return cid
+
+
+class CSEInterpreter(Interpreter):
+    def __init__(self, short_circuit: bool = False, types=None) -> None:
+        super().__init__(short_circuit, types)
+        self.root = None
+        self.analysis = Analysis()
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_nodes = 0
+
+    def run(self, node, context: Context) -> RTResult:
+        if node is not self.root:
+            self.analysis = Analysis().analyze(node)
+            self.root = node
+        self.cache = {}
+        # Like Profiler, shadow visit on the instance only when it pays off;
+        # a tree without repeats runs the plain tree walker.
+        if self.analysis.shared:
+            self.visit = self.cached_visit
+        else:
+            self.__dict__.pop('visit', None)
+        return self.visit(node, context)
+
+    def cached_visit(self, node, context: Context) -> RTResult:
+        method = getattr(self, f'visit_{type(node).__name__}', self.no_visit_method)
+        cid = self.analysis.shared.get(id(node))
+        if cid is None:
+            return method(node, context)
+        value = self.cache.get(cid)
+        if value is not None:
+            self.hits += 1
+            self.saved_nodes += self.analysis.sizes[cid]
+            return RTResult().success(value.copy().set_pos(node.pos_start, node.pos_end))
+        res = method(node, context)
+        if not res.error:
+            self.misses += 1
+            self.cache[cid] = res.value
+        return res
+
+    def visit_VarAssignNode(self, node: VarAssignNode, context: Context) -> RTResult:
+        res = super().visit_VarAssignNode(node, context)
+        if not res.error:
+            for cid in self.analysis.readers.get(node.var_name_tok.value, ()):
+                if self.cache.pop(cid, None) is not None:
+                    self.invalidations += 1
+        return res
+
+    def stats(self) -> dict:
+        return {
+            'classes': len(self.analysis.counts),
+            'shared': len(set(self.analysis.shared.values())),
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'saved_nodes': self.saved_nodes,
+        }
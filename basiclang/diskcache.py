@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+from basiclang import __version__
+from basiclang.basic import parse
+from basiclang.error import Error
+from basiclang.script import split_lines, statements
+from basiclang.serialize import AST_VERSION, dumps_many, loads_many
+
+# Serialized ASTs on disk, one file per source text, laid out like
+# __pycache__: <directory>/<first two hex digits>/<sha256>.bsast. The key
+# covers the interpreter and format versions, so upgrading either simply
+# misses the old entries. Entries are written to a temporary file in the
+# same directory and renamed into place, so readers never see partial files.
+# DiskCache has the get/put interface of ParseCache and can be passed to
+# basic.parse and basic.run as their cache.
+#
+# Serializing a large library takes a good part of what parsing it did, so by
+# default put only queues the nodes and returns: a miss costs no more than
+# the parse. A writer thread, started when there is work and exiting when the
+# queue is empty, serializes and writes the entries; it is not a daemon, so
+# queued entries are still written at interpreter exit. Reads of a queued key
+# return the queued nodes. flush() waits for the queue to drain, and
+# DiskCache(directory, background=False) writes inside put instead.
+
+ENTRY_SUFFIX = '.bsast'
+
+
+class DiskCache:
+    def __init__(self, directory: str, background: bool = True) -> None:
+        self.directory = directory
+        self.background = background
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.failed_writes = 0
+        self.lock = threading.Lock()
+        self.pending: OrderedDict = OrderedDict()
+        self.writer: threading.Thread = None
+
+    def key(self, fn: str, text: str, kind: str = 'node') -> str:
+        digest = hashlib.sha256()
+        for part in (__version__, str(AST_VERSION), kind, fn, text):
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + ENTRY_SUFFIX)
+
+    def read(self, key: str):
+        with self.lock:
+            nodes = self.pending.get(key)
+            if nodes is not None:
+                self.hits += 1
+                return nodes
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as file:
+                nodes = loads_many(file.read())
+        except FileNotFoundError:
+            nodes = None
+        except (OSError, ValueError):
+            # Unreadable or corrupt entry; loads_many raises ValueError for
+            # anything it cannot decode. Drop it and parse again.
+            self.remove(path)
+            nodes = None
+        with self.lock:
+            if nodes is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return nodes
+
+    def write(self, key: str, nodes: List) -> None:
+        if not self.background:
+            self.write_now(key, nodes)
+            return
+        with self.lock:
+            self.pending[key] = nodes
+            self.pending.move_to_end(key)
+            if self.writer is None:
+                self.writer = threading.Thread(target=self.drain, name='basiclang-diskcache')
+                self.writer.start()
+
+    def drain(self) -> None:
+        while True:
+            with self.lock:
+                if not self.pending:
+                    self.writer = None
+                    return
+                key, nodes = next(iter(self.pending.items()))
+            try:
+                self.write_now(key, nodes)
+            except Exception:
+                with self.lock:
+                    self.failed_writes += 1
+            with self.lock:
+                # A newer put of the same key stays queued.
+                if self.pending.get(key) is nodes:
+                    del self.pending[key]
+
+    def flush(self) -> None:
+        with self.lock:
+            writer = self.writer
+        while writer is not None:
+            writer.join()
+            with self.lock:
+                writer = self.writer
+
+    def write_now(self, key: str, nodes: List) -> None:
+        data = dumps_many(nodes)
+        path = self.path(key)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=ENTRY_SUFFIX)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            self.remove(tmp_path)
+            raise
+        with self.lock:
+            self.writes += 1
+
+    def remove(self, path: str) -> bool:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get(self, fn: str, text: str):
+        nodes = self.read(self.key(fn, text))
+        return nodes[0] if nodes else None
+
+    def put(self, fn: str, text: str, node) -> None:
+        self.write(self.key(fn, text), [node])
+
+    def get_many(self, fn: str, text: str) -> List:
+        return self.read(self.key(fn, text, 'many'))
+
+    def put_many(self, fn: str, text: str, nodes: List) -> None:
+        self.write(self.key(fn, text, 'many'), nodes)
+
+    def invalidate(self, fn: str, text: str) -> bool:
+        self.flush()
+        removed = self.remove(self.path(self.key(fn, text)))
+        return self.remove(self.path(self.key(fn, text, 'many'))) or removed
+
+    def clear(self) -> int:
+        self.flush()
+        removed = 0
+        if not os.path.isdir(self.directory):
+            return removed
+        for bucket in os.listdir(self.directory):
+            bucket_path = os.path.join(self.directory, bucket)
+            if len(bucket) != 2 or not os.path.isdir(bucket_path):
+                continue
+            for name in os.listdir(bucket_path):
+                if name.endswith(ENTRY_SUFFIX) and self.remove(os.path.join(bucket_path, name)):
+                    removed += 1
+        return removed
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'writes': self.writes,
+            'failed_writes': self.failed_writes,
+            'pending': len(self.pending),
+        }
+
+
+def load_library(path: str, cache: DiskCache = None, lexer: str = 'char', parser: str = 'recursive',
+                 encoding: str = 'utf-8') -> Tuple[List, Error]:
+    with open(path, 'r', encoding=encoding, newline='') as file:
+        text = file.read()
+    if cache is not None:
+        nodes = cache.get_many(path, text)
+        if nodes is not None:
+            return nodes, None
+
+    nodes = []
+    for ln, line in statements(split_lines(text)):
+        node, error = parse(path, line, lexer, None, parser, ln)
+        if error:
+            return None, error
+        nodes.append(node)
+
+    if cache is not None:
+        cache.put_many(path, text, nodes)
+    return nodes, None
@@ -60,3 +60,9 @@ class RTError(Error):
             pos = ctx.parant_entry_pos
             ctx = ctx.parent
         return 'Tracebak (most recent call last):\n' + result
+
+
+class BudgetError(RTError):
+    def __init__(self, pos_start: Position, pos_end: Position, details: str, context: Context) -> None:
+        super().__init__(pos_start, pos_end, details, context)
+        self.error_name = 'Budget Exceeded'
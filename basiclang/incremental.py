@@ -0,0 +1,680 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, Iterator, List, Tuple
+
+from basiclang.error import Error
+from basiclang.lexer import RegexLexer
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.parser import Parser
+from basiclang.position import Position, SourceFile
+from basiclang.token import TT_EE, TT_EOF, TT_FLOAT, TT_GT, TT_GTE, TT_IDENTIFIER, TT_INT, TT_KEYWORD, TT_LPAREN
+from basiclang.token import TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_RPAREN, TT_DIV, Token, op_key
+
+# A Document keeps the tokens and AST of one formula and applies edits of the
+# form (offset, removed length, inserted text) to them.
+#
+# The text is split into chunks of about CHUNK_SIZE characters, cut between
+# tokens, and every chunk holds its text and its tokens. Token positions are
+# ChunkPositions: an offset into their chunk, whose own start is a prefix sum
+# over the chunk lengths in a Fenwick tree. An edit rewrites the chunks it
+# touches and updates one length in the tree, so everything after it moves
+# without being visited, and the full text is only joined when it is read.
+#
+# Relexing starts at the first token that touches the edit and stops as soon
+# as a new token starts where a token after the edit used to start: the text
+# from there on is unchanged, so the old tokens are kept. Regex tokens never
+# look further ahead than the character after them, which makes the token
+# before the edit window safe to keep. The lexer only sees the touched chunks
+# and takes in the next one whenever a token reaches the end of what it has.
+#
+# The AST is patched in one of three ways, cheapest first:
+#   tokens  the window has as many tokens as before and each one only changed
+#           within its syntactic class (a number for an identifier, '+' for
+#           '-', '<' for '>=', AND for OR, ...). The parser takes the same
+#           decisions for both, so the old tokens are updated in place and at
+#           most a leaf node changes type.
+#   group   the window lies inside a parenthesized group whose parentheses
+#           survive the edit. The group's contents are parsed on their own and
+#           spliced in place of the old subtree; nothing outside a group can
+#           depend on what is inside it.
+#   full    anything else, including every edit made while the document has
+#           an error, parses all tokens again.
+#
+# Either way the result is the tree a full parse of the new text would build.
+# Nodes are found through a map from every node to its parent and from every
+# atom token to its leaf, never by walking down from the root. A node's span
+# is the Position objects of its first and last token, which its ancestors
+# share; a spliced group takes over the old contents' two objects, so no node
+# outside the group changes. Tokens, nodes and positions are updated in place
+# and stay live: the document owns them and must not share them with a parse
+# cache; snapshot() gives a detached copy of the tree.
+
+CHUNK_SIZE = 256
+
+SWAP_CLASSES = {}
+for group in ((TT_INT, TT_FLOAT, TT_IDENTIFIER), (TT_PLUS, TT_MINUS), (TT_MUL, TT_DIV),
+              (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE), ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))):
+    for key in group:
+        SWAP_CLASSES[key] = group
+
+ATOM_TYPES = (TT_INT, TT_FLOAT, TT_IDENTIFIER)
+
+CHILD_FIELDS = {
+    BinOpNode: ('left_node', 'right_node'),
+    UnaryOpNode: ('node',),
+    VarAssignNode: ('value_node',),
+}
+
+
+def same_class(old: Token, new: Token, after_var: bool) -> bool:
+    if after_var:
+        return new.type == TT_IDENTIFIER
+    old_key, new_key = op_key(old), op_key(new)
+    if old_key == new_key:
+        return True
+    group = SWAP_CLASSES.get(old_key)
+    return group is not None and new_key in group
+
+
+def start_offset(tok: Token) -> int:
+    return tok.pos_start.offset
+
+
+def end_offset(tok: Token) -> int:
+    return tok.pos_end.offset
+
+
+def leaf_token(node) -> Token:
+    if isinstance(node, NumberNode):
+        return node.tok
+    if isinstance(node, VarAccessNode):
+        return node.var_name_tok
+    return None
+
+
+def rehome(tokens: List[Token], chunk: Chunk, shift: int) -> None:
+    for tok in tokens:
+        start, end = tok.pos_start, tok.pos_end
+        start.chunk = end.chunk = chunk
+        start.offset += shift
+        end.offset += shift
+
+
+def subtree(node) -> Iterator:
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        for attr in CHILD_FIELDS.get(type(node), ()):
+            stack.append(getattr(node, attr))
+
+
+class PrefixSums:
+    # A Fenwick tree over a list of lengths.
+    def __init__(self, values: List[int]) -> None:
+        tree = [0] + values
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self.tree = tree
+
+    def add(self, i: int, delta: int) -> None:
+        tree = self.tree
+        i += 1
+        while i < len(tree):
+            tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        # sum(values[:i])
+        tree = self.tree
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def search(self, target: int) -> int:
+        # The first i with sum(values[:i + 1]) > target.
+        tree = self.tree
+        i = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            j = i + step
+            if j < len(tree) and tree[j] <= target:
+                i = j
+                target -= tree[j]
+            step >>= 1
+        return i
+
+
+class Chunk:
+    __slots__ = ('document', 'index', 'text', 'tokens', 'base', 'version')
+
+    def __init__(self, document: Document, text: str, tokens: List[Token]) -> None:
+        self.document = document
+        self.index = 0
+        self.text = text
+        self.tokens = tokens
+        self.base = 0
+        self.version = -1
+
+    def start(self) -> int:
+        document = self.document
+        if self.version != document.version:
+            self.base = document.sums.prefix(self.index)
+            self.version = document.version
+        return self.base
+
+
+class ChunkPosition(Position):
+    __slots__ = ('chunk', 'offset')
+
+    def __init__(self, chunk: Chunk, offset: int, source: SourceFile) -> None:
+        self.chunk = chunk
+        self.offset = offset
+        self.source = source
+
+    @property
+    def idx(self) -> int:
+        return self.chunk.start() + self.offset
+
+    @idx.setter
+    def idx(self, idx: int) -> None:
+        self.offset = idx - self.chunk.start()
+
+    def copy(self) -> Position:
+        return Position(self.idx, self.source)
+
+
+class DocumentSource(SourceFile):
+    __slots__ = ('document',)
+
+    def __init__(self, document: Document, fn: str, ln: int) -> None:
+        self.document = document
+        self.fn = fn
+        self.ln = ln
+        self.starts = None
+
+    @property
+    def text(self) -> str:
+        return self.document.text
+
+
+class Document:
+    def __init__(self, fn: str, text: str, ln: int = 0) -> None:
+        self.fn = fn
+        self.ln = ln
+        self.source = DocumentSource(self, fn, ln)
+        self.joined = text
+        self.length = len(text)
+        self.chunks = None
+        self.sums = None
+        self.version = 0
+        self.empty = 0
+        self.eof = None
+        self.node = None
+        self.error = None
+        self.parents: Dict[object, Tuple[object, str]] = {}
+        self.leaves: Dict[Token, object] = {}
+        self.strategy = None
+        self.relexed = 0
+        self.reparse()
+
+    @property
+    def text(self) -> str:
+        if self.joined is None:
+            self.joined = ''.join([chunk.text for chunk in self.chunks])
+        return self.joined
+
+    @property
+    def tokens(self) -> List[Token]:
+        if self.chunks is None:
+            return None
+        return [tok for chunk in self.chunks for tok in chunk.tokens]
+
+    def reparse(self) -> Tuple[object, Error]:
+        self.strategy = 'full'
+        if self.chunks is None:
+            text = self.text
+            tokens, self.error = RegexLexer(self.fn, text, self.ln).get_tokens()
+            self.relexed = len(tokens)
+            if self.error:
+                self.node = None
+                self.error.pos_start.source = self.error.pos_end.source = self.source
+                return None, self.error
+            self.build(text, tokens)
+        res = Parser(self.tokens).parse()
+        self.node = None if res.error else res.node
+        self.error = res.error
+        self.parents = {}
+        self.leaves = {}
+        if self.node is not None:
+            self.index_tree(self.node, None)
+        return self.node, self.error
+
+    def snapshot(self):
+        # A copy of the tree with plain positions over the current text, which
+        # later edits leave alone.
+        from basiclang.serialize import dumps, loads
+        return None if self.node is None else loads(dumps(self.node))
+
+    # Chunks
+
+    def build(self, text: str, tokens: List[Token]) -> None:
+        chunks = []
+        start = 0
+        pending = []
+        for tok in tokens:
+            tok_start = tok.pos_start.idx
+            if pending and tok_start - start >= CHUNK_SIZE and tok.type != TT_EOF:
+                chunks.append(self.make_chunk(text[start:tok_start], pending, start))
+                start = tok_start
+                pending = []
+            pending.append(tok)
+        chunks.append(self.make_chunk(text[start:], pending, start))
+        self.chunks = chunks
+        self.eof = tokens[-1]
+        self.reindex()
+
+    def make_chunk(self, text: str, tokens: List[Token], base: int) -> Chunk:
+        chunk = Chunk(self, text, tokens)
+        source = self.source
+        for tok in tokens:
+            tok.pos_start = ChunkPosition(chunk, tok.pos_start.idx - base, source)
+            tok.pos_end = ChunkPosition(chunk, tok.pos_end.idx - base, source)
+        return chunk
+
+    def reindex(self) -> None:
+        # Drop chunks emptied by merges and renumber the rest.
+        chunks = [chunk for chunk in self.chunks if chunk.text or chunk.tokens]
+        for i, chunk in enumerate(chunks):
+            chunk.index = i
+        self.chunks = chunks
+        self.sums = PrefixSums([len(chunk.text) for chunk in chunks])
+        self.empty = 0
+        self.version += 1
+
+    def split(self, chunk: Chunk) -> None:
+        # Re-chunk an overgrown chunk; its tokens move to the new chunks.
+        text = chunk.text
+        pieces = []
+        start = 0
+        pending = []
+        for tok in chunk.tokens:
+            tok_start = tok.pos_start.offset
+            if pending and tok_start - start >= CHUNK_SIZE and tok.type != TT_EOF:
+                pieces.append((start, tok_start, pending))
+                start = tok_start
+                pending = []
+            pending.append(tok)
+        pieces.append((start, len(text), pending))
+        new_chunks = []
+        for start, end, tokens in pieces:
+            piece = Chunk(self, text[start:end], tokens)
+            for tok in tokens:
+                for pos in (tok.pos_start, tok.pos_end):
+                    pos.chunk = piece
+                    pos.offset -= start
+            new_chunks.append(piece)
+        self.chunks[chunk.index:chunk.index + 1] = new_chunks
+        self.reindex()
+
+    def chunk_at(self, idx: int) -> int:
+        if idx >= self.length:
+            return self.eof.pos_start.chunk.index
+        return self.sums.search(idx)
+
+    def walk(self, i: int, j: int) -> Iterator[Tuple[int, int, Token]]:
+        chunks = self.chunks
+        while i < len(chunks):
+            tokens = chunks[i].tokens
+            while j < len(tokens):
+                yield i, j, tokens[j]
+                j += 1
+            i += 1
+            j = 0
+
+    def walk_back(self, i: int, j: int) -> Iterator[Tuple[int, int, Token]]:
+        chunks = self.chunks
+        while True:
+            tokens = chunks[i].tokens
+            for k in range(j - 1, -1, -1):
+                yield i, k, tokens[k]
+            i -= 1
+            if i < 0:
+                return
+            j = len(chunks[i].tokens)
+
+    def cursor(self, tok: Token) -> Tuple[int, int]:
+        chunk = tok.pos_start.chunk
+        return chunk.index, bisect_left(chunk.tokens, tok.pos_start.offset, key=start_offset)
+
+    def first_touching(self, offset: int) -> Tuple[int, int]:
+        i = self.chunk_at(max(offset - 1, 0))
+        while True:
+            chunk = self.chunks[i]
+            j = bisect_left(chunk.tokens, offset - chunk.start(), key=end_offset)
+            if j < len(chunk.tokens):
+                return i, j
+            i += 1
+
+    # Edits
+
+    def relex(self, text: str, base: int, scan_from: int, first: Tuple[int, int], edit_end: int, delta: int,
+              at_end: bool):
+        # Returns (window, old tokens replaced, resync token, error), or None
+        # when the lexer needs text past the end of the touched chunks.
+        lexer = RegexLexer(self.fn, text)
+        limit = len(text)
+        old_tokens = self.walk(*first)
+        _, _, old = next(old_tokens)
+        replaced = []
+        window = []
+        for tok in lexer.scan(scan_from - base):
+            if tok.pos_end.idx >= limit and not at_end:
+                return None
+            start = base + tok.pos_start.idx
+            while old.type != TT_EOF and (old.pos_start.idx < edit_end or old.pos_start.idx + delta < start):
+                replaced.append(old)
+                _, _, old = next(old_tokens)
+            if old.type != TT_EOF and old.pos_start.idx + delta == start:
+                return window, replaced, old, None
+            window.append(tok)
+        if lexer.error:
+            if not at_end and lexer.error.pos_end.idx >= limit:
+                return None
+            return window, replaced, None, lexer.error
+        if not at_end:
+            return None
+        while old.type != TT_EOF:
+            replaced.append(old)
+            _, _, old = next(old_tokens)
+        return window, replaced, old, None
+
+    def edit(self, offset: int, removed: int, inserted: str) -> Tuple[object, Error]:
+        if offset < 0 or removed < 0 or offset + removed > self.length:
+            raise ValueError(f'Edit ({offset}, {removed}) is outside the text')
+        delta = len(inserted) - removed
+        edit_end = offset + removed
+        if self.chunks is None:
+            text = self.text
+            self.joined = text[:offset] + inserted + text[edit_end:]
+            self.length += delta
+            self.source.starts = None
+            return self.reparse()
+
+        first = self.first_touching(offset)
+        first_tok = self.chunks[first[0]].tokens[first[1]]
+        scan_from = min(first_tok.pos_start.idx, offset)
+        lo = self.chunk_at(scan_from)
+        hi = max(lo, self.chunk_at(edit_end - 1)) if removed else lo
+        base = self.chunks[lo].start()
+        old_text = ''.join([chunk.text for chunk in self.chunks[lo:hi + 1]])
+        while True:
+            text = old_text[:offset - base] + inserted + old_text[edit_end - base:]
+            relexed = self.relex(text, base, scan_from, first, edit_end, delta, hi == len(self.chunks) - 1)
+            if relexed is not None:
+                break
+            hi += 1
+            old_text += self.chunks[hi].text
+        window, replaced, resync, error = relexed
+        self.relexed = len(window)
+
+        if error:
+            full = self.text
+            self.joined = full[:offset] + inserted + full[edit_end:]
+            self.length += delta
+            self.source.starts = None
+            self.chunks = None
+            self.node = None
+            for pos in (error.pos_start, error.pos_end):
+                pos.idx += base
+                pos.source = self.source
+            self.error = error
+            self.strategy = 'lex'
+            return None, error
+
+        # Plan against the old positions, before anything moves.
+        plan = None
+        if self.node is not None:
+            plan = self.plan_tokens(first, replaced, window)
+            if plan is None:
+                plan = self.plan_group(first, resync)
+
+        middle = replaced if plan is not None and plan[0] == 'tokens' else window
+        self.splice_chunks(lo, hi, text, first, middle, window, resync, delta)
+
+        if plan is None:
+            return self.reparse()
+        if plan[0] == 'tokens':
+            return self.apply_tokens(plan[1])
+        return self.apply_group(*plan[1:])
+
+    def splice_chunks(self, lo: int, hi: int, text: str, first: Tuple[int, int], middle: List[Token],
+                      window: List[Token], resync: Token, delta: int) -> None:
+        # Chunks lo..hi become one chunk holding the new text.
+        chunks = self.chunks
+        chunk = chunks[lo]
+        base = chunk.start()
+        # Tokens moving in from the other chunks shift by the distance between
+        # the chunk starts, and those after the edit by its length change too.
+        before = []
+        for i in range(lo, first[0] + 1):
+            tokens = chunks[i].tokens
+            tokens = tokens[:first[1]] if i == first[0] else tokens
+            if i != lo:
+                rehome(tokens, chunk, chunks[i].start() - base)
+            before.extend(tokens)
+        after = []
+        ri, rj = self.cursor(resync)
+        for i in range(ri, hi + 1):
+            tokens = chunks[i].tokens
+            tokens = tokens[rj:] if i == ri else tokens
+            rehome(tokens, chunk, chunks[i].start() - base + delta)
+            after.extend(tokens)
+
+        source = self.source
+        if middle is window:
+            for tok in window:
+                tok.pos_start = ChunkPosition(chunk, tok.pos_start.idx, source)
+                tok.pos_end = ChunkPosition(chunk, tok.pos_end.idx, source)
+        else:
+            for tok, new in zip(middle, window):
+                tok.type = new.type
+                tok.value = new.value
+                tok.pos_start.chunk = tok.pos_end.chunk = chunk
+                tok.pos_start.offset = new.pos_start.idx
+                tok.pos_end.offset = new.pos_end.idx
+
+        sums = self.sums
+        sums.add(lo, len(text) - len(chunk.text))
+        chunk.text = text
+        chunk.tokens = before + middle + after
+        for i in range(lo + 1, hi + 1):
+            sums.add(i, -len(chunks[i].text))
+            chunks[i].text = ''
+            chunks[i].tokens = []
+        self.empty += hi - lo
+        self.length += delta
+        self.joined = None
+        self.source.starts = None
+        self.version += 1
+
+        if len(text) > 2 * CHUNK_SIZE:
+            self.split(chunk)
+        elif self.empty > len(chunks) // 2:
+            self.reindex()
+
+    def plan_tokens(self, first: Tuple[int, int], replaced: List[Token], window: List[Token]):
+        if len(replaced) != len(window):
+            return None
+        previous = next(self.walk_back(*first), None)
+        before = None if previous is None else previous[2]
+        replacements = []
+        for old, new in zip(replaced, window):
+            after_var = before is not None and before.matches(TT_KEYWORD, 'VAR')
+            if not same_class(old, new, after_var):
+                return None
+            if not after_var and old.type in ATOM_TYPES and (old.type == TT_IDENTIFIER) != (new.type == TT_IDENTIFIER):
+                leaf = self.leaves.get(old)
+                if leaf is None:
+                    return None
+                replacements.append((old, leaf))
+            before = old
+        return 'tokens', replacements
+
+    def enclosing_paren(self, i: int, j: int):
+        depth = 0
+        for ci, cj, tok in self.walk_back(i, j):
+            if tok.type == TT_RPAREN:
+                depth += 1
+            elif tok.type == TT_LPAREN:
+                if depth == 0:
+                    return ci, cj
+                depth -= 1
+        return None
+
+    def matching_paren(self, i: int, j: int) -> Token:
+        depth = 0
+        for _, _, tok in self.walk(i, j):
+            if tok.type == TT_LPAREN:
+                depth += 1
+            elif tok.type == TT_RPAREN:
+                depth -= 1
+                if depth == 0:
+                    return tok
+        return None
+
+    def plan_group(self, first: Tuple[int, int], resync: Token):
+        # The window may start with the closing parenthesis of an inner group,
+        # so walk outwards to the first group that holds all of it.
+        cursor = first
+        while True:
+            cursor = self.enclosing_paren(*cursor)
+            if cursor is None:
+                return None
+            close = self.matching_paren(*cursor)
+            if close is not None and close.pos_start.idx >= resync.pos_start.idx:
+                break
+        open_ = self.chunks[cursor[0]].tokens[cursor[1]]
+        node = self.group_node(cursor, open_, close)
+        if node is None:
+            return None
+        return 'group', open_, close, node, self.parents.get(node)
+
+    def group_node(self, cursor: Tuple[int, int], open_: Token, close: Token):
+        # The topmost node between the parentheses, found from any leaf in
+        # there. Node spans leave out parentheses, but every ancestor of a
+        # group's node reaches past the group through its own operator or
+        # operand.
+        node = None
+        for _, _, tok in self.walk(cursor[0], cursor[1] + 1):
+            if tok is close:
+                break
+            node = self.leaves.get(tok)
+            if node is not None:
+                break
+        if node is None:
+            return None
+        lo, hi = open_.pos_end.idx, close.pos_start.idx
+        parents = self.parents
+        while node in parents:
+            parent = parents[node][0]
+            if parent.pos_start.idx < lo or parent.pos_end.idx > hi:
+                break
+            node = parent
+        return node
+
+    def apply_tokens(self, replacements) -> Tuple[object, Error]:
+        self.strategy = 'tokens'
+        for tok, leaf in replacements:
+            new_leaf = VarAccessNode(tok) if tok.type == TT_IDENTIFIER else NumberNode(tok)
+            link = self.parents.pop(leaf, None)
+            self.link(new_leaf, link)
+            self.leaves[tok] = new_leaf
+        self.error = None
+        return self.node, None
+
+    def apply_group(self, open_: Token, close: Token, old_node, link) -> Tuple[object, Error]:
+        tokens = []
+        i, j = self.cursor(open_)
+        for _, _, tok in self.walk(i, j + 1):
+            if tok is close:
+                break
+            tokens.append(tok)
+        res = Parser(tokens + [Token(TT_EOF, pos_start=close.pos_start)]).parse()
+        if res.error:
+            # Error messages depend on the surrounding expression.
+            return self.reparse()
+        self.strategy = 'group'
+        node = res.node
+        parents, leaves = self.parents, self.leaves
+        for old in subtree(old_node):
+            parents.pop(old, None)
+            tok = leaf_token(old)
+            if tok is not None and leaves.get(tok) is old:
+                del leaves[tok]
+        self.adopt_span(old_node, node, link, tokens)
+        self.link(node, link)
+        self.error = None
+        return self.node, None
+
+    def adopt_span(self, old_node, node, link, tokens: List[Token]) -> None:
+        # The old contents' first and last Position objects are shared by
+        # every ancestor that starts or ends with the group. They take the new
+        # contents' values and replace the new objects; a surviving token that
+        # owned one of them gets a copy.
+        mapping = {}
+        updates = []
+        for attr in ('pos_start', 'pos_end'):
+            old, new = getattr(old_node, attr), getattr(node, attr)
+            if old is new:
+                continue
+            if any(getattr(tok, attr) is old for tok in tokens):
+                mapping[old] = ChunkPosition(old.chunk, old.offset, old.source)
+            mapping[new] = old
+            updates.append((old, new.chunk, new.offset))
+        if mapping:
+            for tok in tokens:
+                if tok.pos_start in mapping:
+                    tok.pos_start = mapping[tok.pos_start]
+                if tok.pos_end in mapping:
+                    tok.pos_end = mapping[tok.pos_end]
+        self.index_tree(node, link, mapping)
+        for old, chunk, offset in updates:
+            old.chunk = chunk
+            old.offset = offset
+
+    def index_tree(self, node, link, mapping=None) -> None:
+        parents, leaves = self.parents, self.leaves
+        if link is not None:
+            parents[node] = link
+        stack = [node]
+        while stack:
+            parent = stack.pop()
+            if mapping:
+                if parent.pos_start in mapping:
+                    parent.pos_start = mapping[parent.pos_start]
+                if parent.pos_end in mapping:
+                    parent.pos_end = mapping[parent.pos_end]
+            tok = leaf_token(parent)
+            if tok is not None:
+                leaves[tok] = parent
+                continue
+            for attr in CHILD_FIELDS.get(type(parent), ()):
+                child = getattr(parent, attr)
+                parents[child] = (parent, attr)
+                stack.append(child)
+
+    def link(self, node, link) -> None:
+        if link is None:
+            self.node = node
+            return
+        parent, attr = link
+        setattr(parent, attr, node)
+        self.parents[node] = link
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import math
+import operator
+from typing import Dict
+
+from basiclang.context import Context, SymbolTable
+from basiclang.interpreter import SHORT_CIRCUIT_OPS
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.operators import RAW_BINARY_OPS
+from basiclang.token import TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_NE, TT_PLUS, TT_POW, op_key
+
+# Static int/float inference. Every node gets int, float or None (unknown),
+# following the evaluation order: a variable read after a VAR in the same
+# tree has the type of the assigned value, and one read before any VAR has
+# the type of its value in the symbol table given to infer(), if any. Those
+# assumptions are the guards: Types.check() compares them with a context
+# before a run, and engines must only be given types whose guards hold.
+# With short_circuit set, a VAR in the right operand of AND/OR may not run,
+# so afterwards the variable keeps its type only where both paths agree.
+#
+# A binary operator whose operand types are both known gets a raw operator
+# in Types.ops: int ^ int is always **, a float on either side always
+# math.pow, and the rest use the raw operators, which skip the Number
+# methods' isinstance checks and the interpreter's operator dispatch.
+# Operators with an unknown operand, and division, which has to check its
+# divisor, keep the generic path. A known int ^ int is only int for a
+# literal exponent of at least 0: a negative exponent gives a float.
+
+BOOL_OPS = (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE, (TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))
+
+
+def specialized_op(key, left: type, right: type):
+    if key == TT_DIV:
+        return None
+    if key == TT_POW:
+        return operator.pow if left is int and right is int else math.pow
+    return RAW_BINARY_OPS[key]
+
+
+def result_type(key, left: type, right: type, right_node) -> type:
+    if key in BOOL_OPS:
+        return int
+    if left is None or right is None:
+        return None
+    if key == TT_DIV:
+        return float
+    if key == TT_POW:
+        if left is int and right is int:
+            return int if isinstance(right_node, NumberNode) and right_node.tok.value >= 0 else None
+        return float
+    return int if left is int and right is int else float
+
+
+class Types:
+    def __init__(self) -> None:
+        self.of: Dict[int, type] = {}
+        self.ops: Dict[int, object] = {}
+        self.guards: Dict[str, type] = {}
+
+    def check(self, context: Context) -> bool:
+        symbol_table = context.symbol_table
+        for name, kind in self.guards.items():
+            number = symbol_table.get(name)
+            if number is None or type(number.value) is not kind:
+                return False
+        return True
+
+    def stats(self) -> dict:
+        kinds = list(self.of.values())
+        return {
+            'int': kinds.count(int),
+            'float': kinds.count(float),
+            'unknown': kinds.count(None),
+            'specialized': len(self.ops),
+            'guards': len(self.guards),
+        }
+
+
+class TypeInference:
+    def __init__(self, short_circuit: bool = False) -> None:
+        self.short_circuit = short_circuit
+
+    def infer(self, node, symbol_table: SymbolTable = None) -> Types:
+        self.types = Types()
+        self.symbol_table = symbol_table
+        self.visit(node, {})
+        return self.types
+
+    def visit(self, node, env: Dict[str, type]) -> type:
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        kind = method(node, env)
+        self.types.of[id(node)] = kind
+        return kind
+
+    def no_visit_method(self, node, env: Dict[str, type]):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def visit_NumberNode(self, node: NumberNode, env: Dict[str, type]) -> type:
+        return type(node.tok.value)
+
+    def entry_type(self, name: str) -> type:
+        number = self.symbol_table.get(name) if self.symbol_table is not None else None
+        if number is None:
+            return None
+        kind = self.types.guards[name] = type(number.value)
+        return kind
+
+    def visit_VarAccessNode(self, node: VarAccessNode, env: Dict[str, type]) -> type:
+        name = node.var_name_tok.value
+        if name not in env:
+            env[name] = self.entry_type(name)
+        return env[name]
+
+    def visit_VarAssignNode(self, node: VarAssignNode, env: Dict[str, type]) -> type:
+        kind = self.visit(node.value_node, env)
+        env[node.var_name_tok.value] = kind
+        return kind
+
+    def visit_BinOpNode(self, node: BinOpNode, env: Dict[str, type]) -> type:
+        key = op_key(node.op_tok)
+        left = self.visit(node.left_node, env)
+        if self.short_circuit and key in SHORT_CIRCUIT_OPS:
+            branch = dict(env)
+            right = self.visit(node.right_node, branch)
+            for name, kind in branch.items():
+                # Skipping the right operand leaves what the variable held before.
+                skipped = env[name] if name in env else self.entry_type(name)
+                env[name] = kind if kind is skipped else None
+        else:
+            right = self.visit(node.right_node, env)
+        if left is not None and right is not None:
+            op = specialized_op(key, left, right)
+            if op is not None:
+                self.types.ops[id(node)] = op
+        return result_type(key, left, right, node.right_node)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode, env: Dict[str, type]) -> type:
+        kind = self.visit(node.node, env)
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            return int
+        if node.op_tok.type in (TT_MINUS, TT_PLUS):
+            return kind
+        raise Exception(f'Unknown unary operator {node.op_tok}')
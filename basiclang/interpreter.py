@@ -5,13 +5,56 @@ from basiclang.rtresult import Number, RTResult
 import math
 from basiclang.context import Context
 from basiclang.error import Error, RTError
-from basiclang.token import KEYWORDS, TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW
+from basiclang.token import KEYWORDS, TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW, op_key
 
 from basiclang.position import Position
-from basiclang.node import BinOpNode, NumberNode, VarAccessNode, VarAssignNode
+from typing import Tuple
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+
+BINARY_OPS = {
+    TT_PLUS: Number.add,
+    TT_MINUS: Number.sub,
+    TT_MUL: Number.mul,
+    TT_DIV: Number.div,
+    TT_POW: Number.pow,
+    TT_EE: Number.comp_eq,
+    TT_NE: Number.comp_ne,
+    TT_LT: Number.comp_lt,
+    TT_GT: Number.comp_gt,
+    TT_LTE: Number.comp_lte,
+    TT_GTE: Number.comp_gte,
+    (TT_KEYWORD, 'AND'): Number.and_,
+    (TT_KEYWORD, 'OR'): Number.or_,
+}
+
+# With short-circuit evaluation the right operand of AND/OR is skipped when
+# the truth value of the left operand equals the entry below; the result is
+# then int(left), exactly what and_/or_ would have returned.
+SHORT_CIRCUIT_OPS = {
+    (TT_KEYWORD, 'AND'): False,
+    (TT_KEYWORD, 'OR'): True,
+}
+
+# Work stack marker for a short-circuit operator whose left operand is done.
+LEFT_DONE = 'left_done'
+
+
+def result_pos(node) -> Tuple[Position, Position]:
+    while isinstance(node, VarAssignNode):
+        node = node.value_node
+    return node.pos_start, node.pos_end
+
+
+# Given the Types of an inference.TypeInference pass, binary operators with
+# known operand types run their specialized raw operator on the operand
+# values instead of dispatching to a Number method.
 
 
 class Interpreter:
+    def __init__(self, short_circuit: bool = False, types=None) -> None:
+        self.short_circuit = short_circuit
+        self.typed_ops = None if types is None else types.ops
+
     def visit(self, node, context: Context) -> RTResult:
         method_name = f'visit_{type(node).__name__}'
         method = getattr(self, method_name, self.no_visit_method)
@@ -27,7 +70,7 @@ class Interpreter:
         res = RTResult()
         var_name = node.var_name_tok.value
         value = context.symbol_table.get(var_name)
-        if not value:
+        if value is None:
             return res.failure(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
         value = value.copy().set_pos(node.pos_start, node.pos_end)
         return res.success(value)
@@ -47,10 +90,21 @@ class Interpreter:
         left = res.register(self.visit(node.left_node, context))
         if res.error:
             return res
+        if self.short_circuit:
+            settles = SHORT_CIRCUIT_OPS.get(op_key(node.op_tok))
+            if settles is not None and bool(left.value) == settles:
+                result = Number(int(left.value)).set_context(left.context)
+                return res.success(result.set_pos(node.pos_start, node.pos_end))
         right = res.register(self.visit(node.right_node, context))
         if res.error:
             return res
 
+        if self.typed_ops is not None:
+            op = self.typed_ops.get(id(node))
+            if op is not None:
+                result = Number(op(left.value, right.value)).set_context(left.context)
+                return res.success(result.set_pos(node.pos_start, node.pos_end))
+
         if node.op_tok.type == TT_PLUS:
             result, error = left.add(right)
         elif node.op_tok.type == TT_MINUS:
@@ -99,3 +153,65 @@ class Interpreter:
             return res.failure(err)
         else:
             return RTResult().success(op.set_pos(node.pos_start, node.pos_end))
+
+
+class StackInterpreter:
+    def __init__(self, short_circuit: bool = False) -> None:
+        self.short_circuit = short_circuit
+
+    def visit(self, node, context: Context) -> RTResult:
+        res = RTResult()
+        values = []
+        stack = [(node, False)]
+
+        while stack:
+            node, ready = stack.pop()
+            node_type = type(node)
+            if node_type is NumberNode:
+                values.append(Number(node.tok.value).set_context(context).set_pos(node.tok.pos_start, node.tok.pos_end))
+            elif node_type is VarAccessNode:
+                var_name = node.var_name_tok.value
+                value = context.symbol_table.get(var_name)
+                if value is None:
+                    return res.failure(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
+                values.append(value.copy().set_pos(node.pos_start, node.pos_end))
+            elif not ready:
+                if node_type is BinOpNode and self.short_circuit and op_key(node.op_tok) in SHORT_CIRCUIT_OPS:
+                    stack.append((node, LEFT_DONE))
+                    stack.append((node.left_node, False))
+                    continue
+                stack.append((node, True))
+                if node_type is BinOpNode:
+                    stack.append((node.right_node, False))
+                    stack.append((node.left_node, False))
+                elif node_type is UnaryOpNode:
+                    stack.append((node.node, False))
+                elif node_type is VarAssignNode:
+                    stack.append((node.value_node, False))
+                else:
+                    raise Exception(f'No visit_{node_type.__name__} method defined')
+            elif ready is LEFT_DONE:
+                left = values[-1]
+                if bool(left.value) == SHORT_CIRCUIT_OPS[op_key(node.op_tok)]:
+                    result = Number(int(left.value)).set_context(left.context)
+                    values[-1] = result.set_pos(node.pos_start, node.pos_end)
+                else:
+                    stack.append((node, True))
+                    stack.append((node.right_node, False))
+            elif node_type is BinOpNode:
+                right = values.pop()
+                result, error = BINARY_OPS[op_key(node.op_tok)](values.pop(), right)
+                if error:
+                    return res.failure(error)
+                values.append(result.set_pos(node.pos_start, node.pos_end))
+            elif node_type is UnaryOpNode:
+                value = values.pop()
+                if node.op_tok.type == TT_MINUS:
+                    value, _ = value.mul(Number(-1))
+                elif node.op_tok.matches(TT_KEYWORD, 'NOT'):
+                    value, _ = value.not_()
+                values.append(value.set_pos(node.pos_start, node.pos_end))
+            else:
+                context.symbol_table.set(node.var_name_tok.value, values[-1])
+
+        return res.success(values.pop())
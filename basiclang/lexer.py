@@ -2,9 +2,11 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
-from typing import List, Tuple
+import re
+import sys
+from typing import Iterator, List, Tuple
 
-from .token import DIGITS, KEYWORDS, LETTERS, LETTERS_DIGITS, TT_EE, TT_EOF, TT_EQ, TT_GT, TT_GTE, TT_IDENTIFIER, TT_KEYWORD, TT_LT, TT_LTE, TT_NE, TT_POW
+from .token import DIGITS, KEYWORD_SET, KEYWORDS, LETTERS, LETTERS_DIGITS, TT_EE, TT_EOF, TT_EQ, TT_GT, TT_GTE, TT_IDENTIFIER, TT_KEYWORD, TT_LT, TT_LTE, TT_NE, TT_POW
 from .token import TT_PLUS
 from .token import TT_MINUS
 from .token import TT_MUL
@@ -14,20 +16,21 @@ from .token import TT_RPAREN
 from .token import TT_INT
 from .token import TT_FLOAT
 from .token import Token
-from .position import Position
+from .position import Position, SourceFile
 from .error import Error, IllegalCharError, ExpectedCharError
 
 
 class Lexer:
-    def __init__(self, fn: str, text: str) -> None:
+    def __init__(self, fn: str, text: str, ln: int = 0) -> None:
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
+        self.source = SourceFile(fn, text, ln)
+        self.pos = Position(-1, self.source)
         self.cur_char = None
         self.advance()
 
     def advance(self) -> Lexer:
-        self.pos.advance(self.cur_char)
+        self.pos.idx += 1
         self.cur_char = self.text[self.pos.idx] if self.pos.idx < len(
             self.text) else None
         return self
@@ -147,3 +150,80 @@ class Lexer:
             self.advance()
             tok_type = TT_LTE
         return Token(tok_type, pos_start=pos_start, pos_end=self.pos)
+
+
+TOKEN_REGEX = re.compile(r'''
+    (?P<WS>[ \t]+)
+  | (?P<FLOAT>[0-9]*\.[0-9]*)
+  | (?P<INT>[0-9]+)
+  | (?P<IDENTIFIER>[A-Za-z][A-Za-z0-9]*)
+  | (?P<OP>==|!=|<=|>=|[-+*/^()=<>])
+  | (?P<BANG>!)
+  | (?P<ILLEGAL>[\s\S])
+''', re.VERBOSE)
+
+OP_TOKEN_TYPES = {
+    '+': TT_PLUS,
+    '-': TT_MINUS,
+    '*': TT_MUL,
+    '/': TT_DIV,
+    '^': TT_POW,
+    '(': TT_LPAREN,
+    ')': TT_RPAREN,
+    '=': TT_EQ,
+    '<': TT_LT,
+    '>': TT_GT,
+    '==': TT_EE,
+    '!=': TT_NE,
+    '<=': TT_LTE,
+    '>=': TT_GTE,
+}
+
+
+class RegexLexer:
+    def __init__(self, fn: str, text: str, ln: int = 0) -> None:
+        self.fn = fn
+        self.text = text
+        self.source = SourceFile(fn, text, ln)
+        self.error = None
+
+    def scan(self, start: int = 0) -> Iterator[Token]:
+        text = self.text
+        source = self.source
+        self.error = None
+
+        # Scanning stops at the first bad character and leaves the error in
+        # self.error.
+        for match in TOKEN_REGEX.finditer(text, start):
+            kind = match.lastgroup
+            if kind == 'WS':
+                continue
+            start, end = match.span()
+            if kind == 'OP':
+                tok = Token(OP_TOKEN_TYPES[match.group()])
+            elif kind == 'IDENTIFIER':
+                value = sys.intern(match.group())
+                tok = Token(TT_KEYWORD if value in KEYWORD_SET else TT_IDENTIFIER, value)
+            elif kind == 'INT':
+                tok = Token(TT_INT, int(match.group()))
+            elif kind == 'FLOAT':
+                tok = Token(TT_FLOAT, float(match.group()))
+            elif kind == 'BANG':
+                self.error = ExpectedCharError(Position(start, source), Position(start + 2, source),
+                                               "'=' (after '!')")
+                return
+            else:
+                self.error = IllegalCharError(Position(start, source), Position(end, source),
+                                              "'" + match.group() + "'")
+                return
+            tok.pos_start = Position(start, source)
+            tok.pos_end = Position(end, source)
+            yield tok
+
+    def get_tokens(self) -> Tuple[List[Token], Error]:
+        tokens = list(self.scan())
+        if self.error:
+            return [], self.error
+
+        tokens.append(Token(TT_EOF, pos_start=Position(len(self.text), self.source)))
+        return tokens, None
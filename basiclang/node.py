@@ -6,6 +6,8 @@ from .token import Token
 
 
 class NumberNode:
+    __slots__ = ('tok', 'pos_start', 'pos_end')
+
     def __init__(self, tok: Token) -> None:
         self.tok = tok
         self.pos_start = tok.pos_start
@@ -16,6 +18,8 @@ class NumberNode:
 
 
 class VarAccessNode:
+    __slots__ = ('var_name_tok', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok: Token) -> None:
         self.var_name_tok = var_name_tok
         self.pos_start = var_name_tok.pos_start
@@ -23,6 +27,8 @@ class VarAccessNode:
 
 
 class VarAssignNode:
+    __slots__ = ('var_name_tok', 'value_node', 'pos_start', 'pos_end')
+
     def __init__(self, var_name_tok: Token, value_node) -> None:
         self.var_name_tok = var_name_tok
         self.value_node = value_node
@@ -31,6 +37,8 @@ class VarAssignNode:
 
 
 class BinOpNode:
+    __slots__ = ('left_node', 'op_tok', 'right_node', 'pos_start', 'pos_end')
+
     def __init__(self, left_node: NumberNode, op_tok: Token, right_node: NumberNode) -> None:
         self.left_node = left_node
         self.op_tok = op_tok
@@ -43,6 +51,8 @@ class BinOpNode:
 
 
 class UnaryOpNode:
+    __slots__ = ('op_tok', 'node', 'pos_start', 'pos_end')
+
     def __init__(self, op_tok: Token, node: NumberNode) -> None:
         self.op_tok = op_tok
         self.node = node
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import math
+import operator
+
+from basiclang.token import TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW
+
+# Operators on raw int/float values with the same semantics as the
+# corresponding rtresult.Number methods. Division does not check for a zero
+# divisor: callers test it first so they can report an RTError at the right
+# position.
+
+
+def pow_(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return a ** b
+    return math.pow(a, b)
+
+
+def comp_eq(a, b):
+    return int(a == b)
+
+
+def comp_ne(a, b):
+    return int(a != b)
+
+
+def comp_lt(a, b):
+    return int(a < b)
+
+
+def comp_gt(a, b):
+    return int(a > b)
+
+
+def comp_lte(a, b):
+    return int(a <= b)
+
+
+def comp_gte(a, b):
+    return int(a >= b)
+
+
+def and_(a, b):
+    return int(a and b)
+
+
+def or_(a, b):
+    return int(a or b)
+
+
+def neg(a):
+    return a * -1
+
+
+def not_(a):
+    return 1 if a == 0 else 0
+
+
+RAW_BINARY_OPS = {
+    TT_PLUS: operator.add,
+    TT_MINUS: operator.sub,
+    TT_MUL: operator.mul,
+    TT_DIV: operator.truediv,
+    TT_POW: pow_,
+    TT_EE: comp_eq,
+    TT_NE: comp_ne,
+    TT_LT: comp_lt,
+    TT_GT: comp_gt,
+    TT_LTE: comp_lte,
+    TT_GTE: comp_gte,
+    (TT_KEYWORD, 'AND'): and_,
+    (TT_KEYWORD, 'OR'): or_,
+}
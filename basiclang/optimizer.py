@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from basiclang.interpreter import BINARY_OPS, SHORT_CIRCUIT_OPS, op_key
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.rtresult import Number
+from basiclang.token import TT_DIV, TT_EE, TT_FLOAT, TT_GT, TT_GTE, TT_INT, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW, Token
+
+MAX_FOLD_BITS = 4096
+
+COMPARISON_OPS = (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)
+LOGIC_OPS = ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))
+
+# The optimizer never mutates the tree it is given, so it is safe to run on
+# ASTs shared through a ParseCache. Rebuilt nodes keep the span of the node
+# they replace; a node is only replaced by one of its operands where its own
+# span cannot show up in an error, i.e. anywhere but the right-hand side of
+# a division. With short_circuit set, an AND/OR whose left operand is a
+# constant that settles the result drops its right operand, side effects
+# included, as the short-circuiting backends would at run time.
+
+
+def is_number(node, value) -> bool:
+    return isinstance(node, NumberNode) and type(node.tok.value) is type(value) and node.tok.value == value
+
+
+def is_bool_valued(node) -> bool:
+    if isinstance(node, BinOpNode):
+        return node.op_tok.type in COMPARISON_OPS
+    if isinstance(node, UnaryOpNode):
+        return node.op_tok.matches(TT_KEYWORD, 'NOT')
+    return False
+
+
+def is_int_valued(node) -> bool:
+    if isinstance(node, NumberNode):
+        return isinstance(node.tok.value, int)
+    if isinstance(node, BinOpNode):
+        key = op_key(node.op_tok)
+        if key in COMPARISON_OPS or key in LOGIC_OPS:
+            return True
+        if key in (TT_PLUS, TT_MINUS, TT_MUL):
+            return is_int_valued(node.left_node) and is_int_valued(node.right_node)
+        return False
+    if isinstance(node, UnaryOpNode):
+        return node.op_tok.matches(TT_KEYWORD, 'NOT') or is_int_valued(node.node)
+    return False
+
+
+def make_number_node(value, node) -> NumberNode:
+    tok_type = TT_INT if isinstance(value, int) else TT_FLOAT
+    return NumberNode(Token(tok_type, value, node.pos_start, node.pos_end))
+
+
+def with_pos(new_node, node):
+    new_node.pos_start = node.pos_start
+    new_node.pos_end = node.pos_end
+    return new_node
+
+
+class Optimizer:
+    def __init__(self, short_circuit: bool = False) -> None:
+        self.short_circuit = short_circuit
+        self.folded = 0
+        self.simplified = 0
+
+    def optimize(self, node):
+        return self.visit(node, False)
+
+    def visit(self, node, keep_pos: bool):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, keep_pos)
+
+    def no_visit_method(self, node, keep_pos: bool):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def visit_NumberNode(self, node: NumberNode, keep_pos: bool):
+        return node
+
+    def visit_VarAccessNode(self, node: VarAccessNode, keep_pos: bool):
+        return node
+
+    def visit_VarAssignNode(self, node: VarAssignNode, keep_pos: bool):
+        value_node = self.visit(node.value_node, keep_pos)
+        if value_node is node.value_node:
+            return node
+        return with_pos(VarAssignNode(node.var_name_tok, value_node), node)
+
+    def visit_BinOpNode(self, node: BinOpNode, keep_pos: bool):
+        key = op_key(node.op_tok)
+        left = self.visit(node.left_node, False)
+        if self.short_circuit and isinstance(left, NumberNode) and key in SHORT_CIRCUIT_OPS:
+            if bool(left.tok.value) == SHORT_CIRCUIT_OPS[key]:
+                self.folded += 1
+                return make_number_node(int(left.tok.value), node)
+        right = self.visit(node.right_node, key == TT_DIV)
+
+        if isinstance(left, NumberNode) and isinstance(right, NumberNode):
+            value = self.fold_binary(key, left.tok.value, right.tok.value)
+            if value is not None:
+                self.folded += 1
+                return make_number_node(value, node)
+
+        if not keep_pos:
+            simplified = self.simplify_binary(key, left, right)
+            if simplified is not None:
+                self.simplified += 1
+                return simplified
+
+        if left is node.left_node and right is node.right_node:
+            return node
+        return with_pos(BinOpNode(left, node.op_tok, right), node)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode, keep_pos: bool):
+        operand = self.visit(node.node, False)
+        is_not = node.op_tok.matches(TT_KEYWORD, 'NOT')
+
+        if isinstance(operand, NumberNode):
+            if is_not:
+                value, _ = Number(operand.tok.value).not_()
+            elif node.op_tok.type == TT_MINUS:
+                value, _ = Number(operand.tok.value).mul(Number(-1))
+            else:
+                value = Number(operand.tok.value)
+            self.folded += 1
+            return make_number_node(value.value, node)
+
+        if not keep_pos:
+            simplified = self.simplify_unary(node, operand, is_not)
+            if simplified is not None:
+                self.simplified += 1
+                return simplified
+
+        if operand is node.node:
+            return node
+        return with_pos(UnaryOpNode(node.op_tok, operand), node)
+
+    def fold_binary(self, key, left, right):
+        if key == TT_POW and isinstance(left, int) and isinstance(right, int):
+            if right > 0 and abs(left) > 1 and right * left.bit_length() > MAX_FOLD_BITS:
+                return None
+        try:
+            result, error = BINARY_OPS[key](Number(left), Number(right))
+        except (ArithmeticError, ValueError):
+            return None
+        if error:
+            return None
+        return result.value
+
+    def simplify_binary(self, key, left, right):
+        if key == TT_MUL:
+            if is_number(right, 1):
+                return left
+            if is_number(left, 1):
+                return right
+        elif key == TT_PLUS:
+            if is_number(right, 0) and is_int_valued(left):
+                return left
+            if is_number(left, 0) and is_int_valued(right):
+                return right
+        elif key == TT_MINUS:
+            if is_number(right, 0):
+                return left
+        elif key == TT_POW:
+            if is_number(right, 1):
+                return left
+        return None
+
+    def simplify_unary(self, node: UnaryOpNode, operand, is_not: bool):
+        if node.op_tok.type == TT_PLUS:
+            return operand
+        if not isinstance(operand, UnaryOpNode):
+            return None
+        if node.op_tok.type == TT_MINUS and operand.op_tok.type == TT_MINUS:
+            return operand.node
+        if is_not and operand.op_tok.matches(TT_KEYWORD, 'NOT'):
+            inner = operand.node
+            if is_bool_valued(inner):
+                return inner
+            if isinstance(inner, UnaryOpNode) and inner.op_tok.matches(TT_KEYWORD, 'NOT'):
+                return inner
+        return None
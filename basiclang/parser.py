@@ -5,7 +5,45 @@ from __future__ import annotations
 from basiclang.error import Error, InvalidSyntaxError
 from .node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
 from typing import List, Tuple
-from .token import TT_DIV, TT_EE, TT_EOF, TT_EQ, TT_FLOAT, TT_GT, TT_GTE, TT_IDENTIFIER, TT_INT, TT_KEYWORD, TT_LPAREN, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW, TT_RPAREN, Token
+from .token import TT_DIV, TT_EE, TT_EOF, TT_EQ, TT_FLOAT, TT_GT, TT_GTE, TT_IDENTIFIER, TT_INT, TT_KEYWORD, TT_LPAREN, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW, TT_RPAREN, Token, op_key
+
+
+# Binding powers shared by the precedence-driven parsers. They encode the
+# grammar in grammar.bnf: an operand parsed at binding power n extends over
+# every binary operator whose left binding power is greater than n.
+BINARY_PRECEDENCE = {
+    (TT_KEYWORD, 'AND'): 1,
+    (TT_KEYWORD, 'OR'): 1,
+    TT_EE: 2,
+    TT_NE: 2,
+    TT_LT: 2,
+    TT_GT: 2,
+    TT_LTE: 2,
+    TT_GTE: 2,
+    TT_PLUS: 3,
+    TT_MINUS: 3,
+    TT_MUL: 4,
+    TT_DIV: 4,
+    TT_POW: 5,
+}
+RIGHT_BINDING_POWER = {key: (4 if key == TT_POW else bp) for key, bp in BINARY_PRECEDENCE.items()}
+VAR_BINDING_POWER = 0
+NOT_BINDING_POWER = 1
+SIGN_BINDING_POWER = 4
+
+# Messages the recursive-descent Parser reports for a missing operand; they
+# depend on whether the operand starts an expr, a comp-expr or a factor.
+OPERAND_ERRORS = (
+    "Expected 'VAR', int, float, identifier, +, - or (",
+    "Expected int, float, identifier, +, -, (, NOT",
+    "Expected int, float, identifier, +, - or (",
+)
+TRAILING_ERROR = "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', '<=', '>=', 'AND', 'OR'"
+RPAREN_ERROR = "Exected ')'"
+
+
+def operand_error(tok: Token, min_bp: int) -> InvalidSyntaxError:
+    return InvalidSyntaxError(tok.pos_start, tok.pos_end, OPERAND_ERRORS[min(min_bp, 2)])
 
 
 class ParserResult:
@@ -50,7 +88,7 @@ class Parser:
         res = self.expr()
         if not res.error and self.cur_tok.type != TT_EOF:
             return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end,
-                                                  "Expected '+', '-', '*', '/', '^', '==', '!=', '<', '>', '<=', '>=', 'AND', 'OR'"))
+                                                  TRAILING_ERROR))
         return res
 
     def atom(self) -> NumberNode:
@@ -80,9 +118,9 @@ class Parser:
 
                 return res.success(expr)
             else:
-                return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, "Exected ')'"))
+                return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, RPAREN_ERROR))
 
-        return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, "Expected int, float, identifier, +, - or ("))
+        return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, OPERAND_ERRORS[2]))
 
     def factor(self) -> NumberNode:
         res = ParserResult()
@@ -116,7 +154,7 @@ class Parser:
         node = res.register(self.bin_op(
             self.arith_expr, (TT_EE, TT_NE, TT_LT, TT_GT, TT_LTE, TT_GTE)))
         if res.error:
-            return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, "Expected int, float, identifier, +, -, (, NOT"))
+            return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, OPERAND_ERRORS[1]))
 
         return res.success(node)
 
@@ -137,7 +175,7 @@ class Parser:
             self.advance()
 
             if self.cur_tok.type != TT_EQ:
-                return res.failue(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, "Expected '='"))
+                return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, "Expected '='"))
 
             res.register_advancement()
             self.advance()
@@ -150,7 +188,7 @@ class Parser:
         node = res.register(self.bin_op(
             self.comp_expr,  ((TT_KEYWORD, 'AND'), (TT_KEYWORD, 'OR'))))
         if res.error:
-            return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, "Expected 'VAR', int, float, identifier, +, - or ("))
+            return res.failure(InvalidSyntaxError(self.cur_tok.pos_start, self.cur_tok.pos_end, OPERAND_ERRORS[0]))
         return res.success(node)
 
     def power(self) -> BinOpNode:
@@ -173,3 +211,186 @@ class Parser:
                 return res
             left = BinOpNode(left, op_tok, right)
         return res.success(left)
+
+
+VAR_FRAME = 0
+UNARY_FRAME = 1
+BINARY_FRAME = 2
+PAREN_FRAME = 3
+
+
+class StackParser:
+    def __init__(self, tokens: List[Token]) -> None:
+        self.tokens = tokens
+
+    def parse(self) -> ParserResult:
+        res = ParserResult()
+        tokens = self.tokens
+        idx = 0
+        stack = []
+        min_bp = 0
+
+        while True:
+            tok = tokens[idx]
+            if tok.type == TT_KEYWORD:
+                if tok.value == 'VAR' and min_bp == VAR_BINDING_POWER:
+                    var_name = tokens[idx + 1]
+                    if var_name.type != TT_IDENTIFIER:
+                        return res.failure(InvalidSyntaxError(var_name.pos_start, var_name.pos_end, "Expected identifier"))
+                    equals = tokens[idx + 2]
+                    if equals.type != TT_EQ:
+                        return res.failure(InvalidSyntaxError(equals.pos_start, equals.pos_end, "Expected '='"))
+                    idx += 3
+                    stack.append((VAR_FRAME, var_name, min_bp))
+                    min_bp = VAR_BINDING_POWER
+                    continue
+                if tok.value == 'NOT' and min_bp <= NOT_BINDING_POWER:
+                    idx += 1
+                    stack.append((UNARY_FRAME, tok, min_bp))
+                    min_bp = NOT_BINDING_POWER
+                    continue
+            elif tok.type in (TT_PLUS, TT_MINUS):
+                idx += 1
+                stack.append((UNARY_FRAME, tok, min_bp))
+                min_bp = SIGN_BINDING_POWER
+                continue
+            elif tok.type == TT_LPAREN:
+                idx += 1
+                stack.append((PAREN_FRAME, tok, min_bp))
+                min_bp = VAR_BINDING_POWER
+                continue
+
+            if tok.type in (TT_INT, TT_FLOAT):
+                node = NumberNode(tok)
+            elif tok.type == TT_IDENTIFIER:
+                node = VarAccessNode(tok)
+            else:
+                return res.failure(operand_error(tok, min_bp))
+            idx += 1
+
+            while True:
+                tok = tokens[idx]
+                key = op_key(tok)
+                if BINARY_PRECEDENCE.get(key, 0) > min_bp:
+                    idx += 1
+                    stack.append((BINARY_FRAME, (node, tok), min_bp))
+                    min_bp = RIGHT_BINDING_POWER[key]
+                    break
+                if not stack:
+                    if tok.type != TT_EOF:
+                        return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, TRAILING_ERROR))
+                    return res.success(node)
+
+                kind, data, min_bp = stack.pop()
+                if kind == BINARY_FRAME:
+                    node = BinOpNode(data[0], data[1], node)
+                elif kind == UNARY_FRAME:
+                    node = UnaryOpNode(data, node)
+                elif kind == VAR_FRAME:
+                    node = VarAssignNode(data, node)
+                else:
+                    if tok.type != TT_RPAREN:
+                        return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, RPAREN_ERROR))
+                    idx += 1
+
+
+class PrattParser:
+    def __init__(self, tokens: List[Token]) -> None:
+        self.tokens = tokens
+        self.tok_idx = 0
+        self.error = None
+
+    def parse(self) -> ParserResult:
+        res = ParserResult()
+        node = self.expr(0)
+        if node is None:
+            return res.failure(self.error)
+        tok = self.tokens[self.tok_idx]
+        if tok.type != TT_EOF:
+            return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, TRAILING_ERROR))
+        return res.success(node)
+
+    def fail(self, error: InvalidSyntaxError):
+        self.error = error
+        return None
+
+    def expr(self, min_bp: int):
+        tokens = self.tokens
+        tok = tokens[self.tok_idx]
+        parselet = PRATT_PREFIX_PARSELETS.get(tok.type)
+        if parselet is None:
+            return self.fail(operand_error(tok, min_bp))
+        left = parselet(self, tok, min_bp)
+        if left is None:
+            return None
+
+        precedence = BINARY_PRECEDENCE
+        while True:
+            tok = tokens[self.tok_idx]
+            key = (tok.type, tok.value) if tok.type == TT_KEYWORD else tok.type
+            if precedence.get(key, 0) <= min_bp:
+                return left
+            self.tok_idx += 1
+            right = self.expr(RIGHT_BINDING_POWER[key])
+            if right is None:
+                return None
+            left = BinOpNode(left, tok, right)
+
+    def parse_number(self, tok: Token, min_bp: int):
+        self.tok_idx += 1
+        return NumberNode(tok)
+
+    def parse_identifier(self, tok: Token, min_bp: int):
+        self.tok_idx += 1
+        return VarAccessNode(tok)
+
+    def parse_sign(self, tok: Token, min_bp: int):
+        self.tok_idx += 1
+        node = self.expr(SIGN_BINDING_POWER)
+        if node is None:
+            return None
+        return UnaryOpNode(tok, node)
+
+    def parse_group(self, tok: Token, min_bp: int):
+        self.tok_idx += 1
+        node = self.expr(VAR_BINDING_POWER)
+        if node is None:
+            return None
+        tok = self.tokens[self.tok_idx]
+        if tok.type != TT_RPAREN:
+            return self.fail(InvalidSyntaxError(tok.pos_start, tok.pos_end, RPAREN_ERROR))
+        self.tok_idx += 1
+        return node
+
+    def parse_keyword(self, tok: Token, min_bp: int):
+        if tok.value == 'NOT' and min_bp <= NOT_BINDING_POWER:
+            self.tok_idx += 1
+            node = self.expr(NOT_BINDING_POWER)
+            if node is None:
+                return None
+            return UnaryOpNode(tok, node)
+        if tok.value != 'VAR' or min_bp != VAR_BINDING_POWER:
+            return self.fail(operand_error(tok, min_bp))
+
+        var_name = self.tokens[self.tok_idx + 1]
+        if var_name.type != TT_IDENTIFIER:
+            return self.fail(InvalidSyntaxError(var_name.pos_start, var_name.pos_end, "Expected identifier"))
+        equals = self.tokens[self.tok_idx + 2]
+        if equals.type != TT_EQ:
+            return self.fail(InvalidSyntaxError(equals.pos_start, equals.pos_end, "Expected '='"))
+        self.tok_idx += 3
+        node = self.expr(VAR_BINDING_POWER)
+        if node is None:
+            return None
+        return VarAssignNode(var_name, node)
+
+
+PRATT_PREFIX_PARSELETS = {
+    TT_INT: PrattParser.parse_number,
+    TT_FLOAT: PrattParser.parse_number,
+    TT_IDENTIFIER: PrattParser.parse_identifier,
+    TT_PLUS: PrattParser.parse_sign,
+    TT_MINUS: PrattParser.parse_sign,
+    TT_LPAREN: PrattParser.parse_group,
+    TT_KEYWORD: PrattParser.parse_keyword,
+}
@@ -2,24 +2,71 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import annotations
+from bisect import bisect_right
+from typing import List, Tuple
+
+# A Position is an offset into a SourceFile, which every position of one
+# lexed text shares. Lexers and the parser only ever move offsets; line and
+# column are looked up when something prints them, by a binary search over
+# the source's line starts, which are built the first time they are needed.
+# ln is the line number of the first line of the text, for texts that are
+# one line of a larger script.
+
+
+class SourceFile:
+    __slots__ = ('fn', 'text', 'ln', 'starts')
+
+    def __init__(self, fn: str, text: str, ln: int = 0) -> None:
+        self.fn = fn
+        self.text = text
+        self.ln = ln
+        self.starts = None
+
+    def line_starts(self) -> List[int]:
+        if self.starts is None:
+            text = self.text
+            starts = [0]
+            idx = text.find('\n')
+            while idx >= 0:
+                starts.append(idx + 1)
+                idx = text.find('\n', idx + 1)
+            self.starts = starts
+        return self.starts
+
+    def line_index(self, idx: int) -> int:
+        return bisect_right(self.line_starts(), idx) - 1
+
+    def line_col(self, idx: int) -> Tuple[int, int]:
+        line = self.line_index(idx)
+        return self.ln + line, idx - self.starts[line]
 
 
 class Position:
-    def __init__(self, idx: int, ln: int, col: int, fn: str, ftxt: str) -> None:
+    __slots__ = ('idx', 'source')
+
+    def __init__(self, idx: int, source: SourceFile) -> None:
         self.idx = idx
-        self.ln = ln
-        self.col = col
-        self.fn = fn
-        self.ftxt = ftxt
+        self.source = source
 
-    def advance(self, cur_char: str = None) -> Position:
-        self.idx += 1
-        self.col += 1
+    @property
+    def ln(self) -> int:
+        return self.source.line_col(self.idx)[0]
 
-        if cur_char == '\n':
-            self.ln += 1
-            self.col = 0
+    @property
+    def col(self) -> int:
+        return self.source.line_col(self.idx)[1]
+
+    @property
+    def fn(self) -> str:
+        return self.source.fn
+
+    @property
+    def ftxt(self) -> str:
+        return self.source.text
+
+    def advance(self) -> Position:
+        self.idx += 1
         return self
 
     def copy(self) -> Position:
-        return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+        return Position(self.idx, self.source)
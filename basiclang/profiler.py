@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import time
+from typing import Dict, List, TextIO, Tuple
+
+from basiclang.basic import parse
+from basiclang.context import Context
+from basiclang.error import Error
+from basiclang.interpreter import Interpreter
+from basiclang.node import BinOpNode, UnaryOpNode
+from basiclang.rtresult import Number, RTResult
+from basiclang.token import TT_KEYWORD
+
+# Profiling swaps an instrumented visit into the interpreter instance, which
+# shadows Interpreter.visit for every recursive call; an interpreter that is
+# not attached runs the plain method and pays nothing. Allocation counts come
+# from wrapping Number.__init__ and RTResult.__init__ while a profiler is
+# attached, which affects every thread in the process for that time.
+#
+# Self time is inclusive time minus the inclusive time of the children.
+# Collapsed stacks are "frame;frame;frame <self microseconds>" lines, the
+# input format of flamegraph.pl, speedscope and similar tools.
+
+
+def node_label(node) -> str:
+    name = type(node).__name__
+    if isinstance(node, (BinOpNode, UnaryOpNode)):
+        tok = node.op_tok
+        return f'{name}[{tok.value if tok.type == TT_KEYWORD else tok.type}]'
+    return name
+
+
+def span_key(node, label: str) -> Tuple:
+    start, end = node.pos_start, node.pos_end
+    return start.source, start.idx, end.idx, label
+
+
+def span_text(node) -> str:
+    start, end = node.pos_start, node.pos_end
+    text = start.ftxt[start.idx:end.idx]
+    if '\n' in text:
+        return text.split('\n', 1)[0] + ' ...'
+    return text
+
+
+class Profiler:
+    def __init__(self, clock=time.perf_counter_ns) -> None:
+        self.clock = clock
+        self.labels: Dict[str, List[int]] = {}
+        self.spans: Dict[Tuple, List] = {}
+        self.stacks: Dict[str, int] = {}
+        self.allocations = {'Number': 0, 'RTResult': 0}
+        self.interpreter = None
+        self.patched = []
+
+    def attach(self, interpreter: Interpreter) -> Profiler:
+        if self.interpreter is not None:
+            raise Exception('Profiler is already attached')
+        self.interpreter = interpreter
+        interpreter.visit = self.instrument(type(interpreter).visit.__get__(interpreter))
+        self.patch(Number)
+        self.patch(RTResult)
+        return self
+
+    def detach(self) -> None:
+        if self.interpreter is None:
+            return
+        del self.interpreter.visit
+        self.interpreter = None
+        for cls, init in self.patched:
+            cls.__init__ = init
+        self.patched = []
+
+    def __enter__(self) -> Profiler:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.detach()
+
+    def patch(self, cls) -> None:
+        init = cls.__init__
+        allocations = self.allocations
+        name = cls.__name__
+
+        def counting_init(obj, *args, **kwargs):
+            allocations[name] += 1
+            init(obj, *args, **kwargs)
+        cls.__init__ = counting_init
+        self.patched.append((cls, init))
+
+    def instrument(self, visit):
+        clock = self.clock
+        labels = self.labels
+        spans = self.spans
+        stacks = self.stacks
+        frames = []
+        child_times = []
+
+        def profiled_visit(node, context: Context) -> RTResult:
+            label = node_label(node)
+            ln, col = node.pos_start.source.line_col(node.pos_start.idx)
+            frames.append(f'{label}@{ln + 1}:{col + 1}')
+            child_times.append(0)
+            start = clock()
+            try:
+                return visit(node, context)
+            finally:
+                elapsed = clock() - start
+                self_time = elapsed - child_times.pop()
+                if child_times:
+                    child_times[-1] += elapsed
+
+                stack = ';'.join(frames)
+                stacks[stack] = stacks.get(stack, 0) + self_time
+                frames.pop()
+
+                stats = labels.get(label)
+                if stats is None:
+                    stats = labels[label] = [0, 0, 0]
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += self_time
+
+                key = span_key(node, label)
+                stats = spans.get(key)
+                if stats is None:
+                    stats = spans[key] = [0, 0, 0, span_text(node)]
+                stats[0] += 1
+                stats[1] += elapsed
+                stats[2] += self_time
+        return profiled_visit
+
+    def reset(self) -> None:
+        self.labels.clear()
+        self.spans.clear()
+        self.stacks.clear()
+        for name in self.allocations:
+            self.allocations[name] = 0
+
+    def report(self, top: int = 10) -> str:
+        lines = [f'{"node":24} {"calls":>9} {"inclusive ms":>13} {"self ms":>10} {"self us/call":>13}']
+        for label, (calls, inclusive, self_time) in sorted(self.labels.items(), key=lambda item: -item[1][2]):
+            lines.append(f'{label:24} {calls:9} {inclusive / 1e6:13.3f} {self_time / 1e6:10.3f} '
+                         f'{self_time / calls / 1e3:13.2f}')
+
+        lines.append('')
+        lines.append('allocations: ' + ', '.join(f'{name} {count}' for name, count in self.allocations.items()))
+
+        lines.append('')
+        lines.append(f'{"hottest spans":24} {"calls":>9} {"inclusive ms":>13} {"self ms":>10}  source')
+        hottest = sorted(self.spans.items(), key=lambda item: -item[1][1])[:top]
+        for (source, idx, _, label), (calls, inclusive, self_time, text) in hottest:
+            ln, col = source.line_col(idx)
+            where = f'{source.fn}:{ln + 1}:{col + 1}'
+            lines.append(f'{where:24} {calls:9} {inclusive / 1e6:13.3f} {self_time / 1e6:10.3f}  {label} {text}')
+        return '\n'.join(lines)
+
+    def write_collapsed(self, file: TextIO) -> None:
+        for stack, self_time in self.stacks.items():
+            file.write(f'{stack} {self_time // 1000}\n')
+
+
+def profile_text(fn: str, text: str, context: Context = None, repeat: int = 1) -> Tuple[Profiler, Number, Error]:
+    if repeat < 1:
+        raise ValueError('repeat must be at least 1')
+    node, error = parse(fn, text)
+    if error:
+        return None, None, error
+    if context is None:
+        context = Context('<program>')
+        context.symbol_table.set('null', Number(0))
+
+    interpreter = Interpreter()
+    with Profiler().attach(interpreter) as profiler:
+        for _ in range(repeat):
+            res = interpreter.visit(node, context)
+    return profiler, res.value, res.error
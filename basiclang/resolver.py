@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import List
+
+from basiclang.context import Context, SymbolTable
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+
+
+class Resolver:
+    def __init__(self) -> None:
+        self.names = []
+        self.slots = {}
+
+    def resolve(self, node) -> List[str]:
+        self.visit(node)
+        return self.names
+
+    def slot(self, name: str) -> int:
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.names)
+            self.names.append(name)
+        return slot
+
+    def visit(self, node) -> None:
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        method(node)
+
+    def no_visit_method(self, node) -> None:
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def visit_NumberNode(self, node: NumberNode) -> None:
+        pass
+
+    def visit_VarAccessNode(self, node: VarAccessNode) -> None:
+        self.slot(node.var_name_tok.value)
+
+    def visit_VarAssignNode(self, node: VarAssignNode) -> None:
+        self.visit(node.value_node)
+        self.slot(node.var_name_tok.value)
+
+    def visit_BinOpNode(self, node: BinOpNode) -> None:
+        self.visit(node.left_node)
+        self.visit(node.right_node)
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode) -> None:
+        self.visit(node.node)
+
+
+# A Frame holds a run's variables by slot. Names are resolved to slots once,
+# when the code is compiled; a run fills the slots from the dict of the
+# context's own table and asks its parents only for the names it lacks.
+# Writes go to the slot and through to the table.
+class Frame:
+    __slots__ = ('names', 'slots', 'context')
+
+    def __init__(self, names: List[str], context: Context) -> None:
+        symbol_table = context.symbol_table
+        self.names = names
+        if type(symbol_table) is SymbolTable:
+            slots = list(map(symbol_table.symbols.get, names))
+            if symbol_table.parent is not None and None in slots:
+                get = symbol_table.parent.get
+                slots = [get(name) if value is None else value for name, value in zip(names, slots)]
+        else:
+            slots = [symbol_table.get(name) for name in names]
+        self.slots = slots
+        self.context = context
+
+    def set(self, slot: int, value) -> None:
+        self.slots[slot] = value
+        self.context.symbol_table.set(self.names[slot], value)
@@ -29,6 +29,8 @@ class RTResult:
 
 
 class Number:
+    __slots__ = ('value', 'pos_start', 'pos_end', 'context')
+
     def __init__(self, value) -> None:
         self.value = value
         self.set_pos()
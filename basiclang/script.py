@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import io
+from typing import Iterable, Iterator, List, Tuple
+
+from basiclang.basic import ENGINES, global_symbol_table, parse
+from basiclang.context import Context
+from basiclang.error import Error
+from basiclang.optimizer import Optimizer
+from basiclang.rtresult import Number
+
+# A script holds one statement per line. Lines are read, lexed, parsed and
+# executed one at a time, so memory stays bounded by the longest line and the
+# variables the script defines. Each line is its own SourceFile, which carries
+# the line number within the file and the text of the line: all an error
+# message shows.
+
+
+def numbered_lines(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for ln, line in enumerate(lines):
+        yield ln, line.rstrip('\r\n')
+
+
+def read_lines(path: str, encoding: str = 'utf-8', buffering: int = io.DEFAULT_BUFFER_SIZE) -> Iterator[Tuple[int, str]]:
+    with open(path, 'r', encoding=encoding, newline='', buffering=buffering) as file:
+        yield from numbered_lines(file)
+
+
+def split_lines(text: str) -> Iterator[Tuple[int, str]]:
+    return numbered_lines(io.StringIO(text, newline=''))
+
+
+def statements(lines: Iterable[Tuple[int, str]]) -> Iterator[Tuple[int, str]]:
+    for ln, line in lines:
+        if line.strip():
+            yield ln, line
+
+
+def run_lines(fn: str, lines: Iterable[Tuple[int, str]], context: Context = None, stop_on_error: bool = True,
+              engine: str = 'tree', lexer: str = 'char', optimize: bool = False, parser: str = 'recursive',
+              short_circuit: bool = False) -> Iterator[Tuple[int, Number, Error]]:
+    evaluate = ENGINES.get(engine)
+    if evaluate is None:
+        raise ValueError(f"Unknown engine '{engine}'")
+    if context is None:
+        context = Context('<program>')
+        context.symbol_table = global_symbol_table
+
+    for ln, text in statements(lines):
+        node, error = parse(fn, text, lexer, None, parser, ln)
+        if not error:
+            if optimize:
+                node = Optimizer(short_circuit).optimize(node)
+            res = evaluate(node, context, short_circuit)
+            error = res.error
+        if error:
+            yield ln, None, error
+            if stop_on_error:
+                return
+        else:
+            yield ln, res.value, None
+
+
+def run_script(path: str, context: Context = None, stop_on_error: bool = True, encoding: str = 'utf-8',
+               **options) -> Tuple[Number, List[Error]]:
+    value = None
+    errors = []
+    for _, result, error in run_lines(path, read_lines(path, encoding), context, stop_on_error, **options):
+        if error:
+            errors.append(error)
+        else:
+            value = result
+    return value, errors
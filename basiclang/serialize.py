@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import gc
+import marshal
+import sys
+import zlib
+from array import array
+from typing import List, Sequence
+
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.position import Position, SourceFile
+from basiclang.token import Token
+
+# Trees are written in post order as flat record tables, so neither dumping
+# nor loading recurses, however deep the tree. Every record is the node kind
+# and four indexes into the position table (token start/end, node start/end)
+# in one integer array, plus the token type and value in two tuples. The
+# position table stores (idx, source); source indexes the fn, ftxt and ln
+# tables, one entry per SourceFile. Every token gets its own two entries.
+# A node span is usually the one its constructor takes from its token and
+# children, and is then written as AS_BUILT, so the loaded node shares those
+# Position objects again; only other spans, such as those of folded
+# constants, are looked up and stored. The marshalled payload is
+# zlib-compressed at the fastest level.
+#
+# Loading checks every index against its table and the record stack, so a
+# damaged blob raises ValueError rather than building a broken tree.
+
+AST_MAGIC = b'BSAST'
+AST_VERSION = 3
+
+NUMBER = 0
+VAR_ACCESS = 1
+VAR_ASSIGN = 2
+BIN_OP = 3
+UNARY_OP = 4
+
+RECORD_SIZE = 5
+POSITION_SIZE = 2
+
+AS_BUILT = -2
+NO_POSITION = -1
+
+
+class Serializer:
+    def __init__(self) -> None:
+        self.records = []
+        self.types = []
+        self.values = []
+        self.positions = []
+        self.position_index = {}
+        self.fns = []
+        self.ftxts = []
+        self.lns = []
+        self.source_index = {}
+        self.last_source = None
+        self.last_source_idx = 0
+
+    def dumps(self, nodes: Sequence) -> bytes:
+        for node in nodes:
+            self.add_tree(node)
+        payload = (AST_VERSION, sys.byteorder, len(nodes), tuple(self.fns), tuple(self.ftxts), tuple(self.lns),
+                   pack_ints(self.positions), pack_ints(self.records), tuple(self.types), tuple(self.values))
+        return AST_MAGIC + zlib.compress(marshal.dumps(payload), 1)
+
+    def source(self, source: SourceFile) -> int:
+        if source is self.last_source:
+            return self.last_source_idx
+        source_idx = self.source_index.get(id(source))
+        if source_idx is None:
+            source_idx = self.source_index[id(source)] = len(self.fns)
+            self.fns.append(source.fn)
+            self.ftxts.append(source.text)
+            self.lns.append(source.ln)
+        self.last_source = source
+        self.last_source_idx = source_idx
+        return source_idx
+
+    def position(self, pos: Position) -> int:
+        if pos is None:
+            return NO_POSITION
+        index = self.position_index.get(id(pos))
+        if index is None:
+            index = self.position_index[id(pos)] = len(self.positions) // POSITION_SIZE
+            self.positions.extend((pos.idx, self.source(pos.source)))
+        return index
+
+    def add_tree(self, node) -> None:
+        # Every node before its right and then its left subtree is post order
+        # backwards.
+        order = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            node_type = type(node)
+            if node_type is BinOpNode:
+                stack.append(node.left_node)
+                stack.append(node.right_node)
+            elif node_type is UnaryOpNode:
+                stack.append(node.node)
+            elif node_type is VarAssignNode:
+                stack.append(node.value_node)
+            elif node_type is not NumberNode and node_type is not VarAccessNode:
+                raise Exception(f'Cannot serialize {node_type.__name__}')
+
+        records = self.records
+        positions = self.positions
+        types = self.types
+        values = self.values
+        source = self.last_source
+        source_idx = self.last_source_idx
+        for node in reversed(order):
+            node_type = type(node)
+            # start and end are the span the node's constructor gives it.
+            if node_type is BinOpNode:
+                kind, tok, start, end = BIN_OP, node.op_tok, node.left_node.pos_start, node.right_node.pos_end
+            elif node_type is NumberNode:
+                tok = node.tok
+                kind, start, end = NUMBER, tok.pos_start, tok.pos_end
+            elif node_type is VarAccessNode:
+                tok = node.var_name_tok
+                kind, start, end = VAR_ACCESS, tok.pos_start, tok.pos_end
+            elif node_type is UnaryOpNode:
+                tok = node.op_tok
+                kind, start, end = UNARY_OP, tok.pos_start, node.node.pos_end
+            else:
+                tok = node.var_name_tok
+                kind, start, end = VAR_ASSIGN, tok.pos_start, node.value_node.pos_end
+
+            tok_start, tok_end = tok.pos_start, tok.pos_end
+            if tok_start is not None and tok_end is not None and tok_start.source is source \
+                    and tok_end.source is source:
+                tok_start_idx = len(positions) // POSITION_SIZE
+                tok_end_idx = tok_start_idx + 1
+                positions.extend((tok_start.idx, source_idx, tok_end.idx, source_idx))
+            else:
+                tok_start_idx, tok_end_idx = self.position(tok_start), self.position(tok_end)
+                source, source_idx = self.last_source, self.last_source_idx
+            node_start = AS_BUILT if node.pos_start is start else self.position(node.pos_start)
+            node_end = AS_BUILT if node.pos_end is end else self.position(node.pos_end)
+            records.extend((kind, tok_start_idx, tok_end_idx, node_start, node_end))
+            types.append(tok.type)
+            values.append(tok.value)
+
+
+def pack_ints(values: List[int]) -> tuple:
+    # 32-bit items unless a text is too long for them.
+    typecode = 'i' if not values or (min(values) >= -2 ** 31 and max(values) < 2 ** 31) else 'q'
+    return typecode, array(typecode, values).tobytes()
+
+
+def int_array(packed: tuple, byteorder: str) -> array:
+    typecode, raw = packed
+    if typecode not in ('i', 'q'):
+        raise ValueError(f'Unknown array type {typecode!r}')
+    values = array(typecode)
+    values.frombytes(raw)
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+def load_nodes(data: bytes) -> List:
+    if data[:len(AST_MAGIC)] != AST_MAGIC:
+        raise ValueError('Not a basiclang AST blob')
+    try:
+        payload = marshal.loads(zlib.decompress(data[len(AST_MAGIC):]))
+    except (zlib.error, EOFError, TypeError, ValueError) as e:
+        raise ValueError('Corrupt AST blob') from e
+    if not isinstance(payload, tuple) or len(payload) != 10:
+        raise ValueError('Corrupt AST blob')
+    if payload[0] != AST_VERSION:
+        raise ValueError(f'Unsupported AST version {payload[0]}')
+    byteorder, count, fns, ftxts, lns, positions, records, types, values = payload[1:]
+    try:
+        positions = int_array(positions, byteorder)
+        records = int_array(records, byteorder)
+        sources = list(map(SourceFile, fns, ftxts, lns))
+    except (TypeError, ValueError) as e:
+        raise ValueError('Corrupt AST blob') from e
+
+    # Loading only allocates acyclic objects; the cyclic collector would
+    # otherwise run every few hundred allocations and rescan all of them.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_nodes(count, sources, positions, records, types, values)
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def check_range(column: array, low: int, high: int) -> None:
+    if column and (min(column) < low or max(column) >= high):
+        raise ValueError('Corrupt AST blob')
+
+
+def build_nodes(count: int, sources: List[SourceFile], flat: array, records: array, types: tuple,
+                values: tuple) -> List:
+    if (len(flat) % POSITION_SIZE or not isinstance(types, tuple) or not isinstance(values, tuple)
+            or len(records) != len(types) * RECORD_SIZE or len(values) != len(types)):
+        raise ValueError('Corrupt AST blob')
+    check_range(flat[1::POSITION_SIZE], 0, len(sources))
+    positions = list(map(Position, flat[0::POSITION_SIZE], [sources[source] for source in flat[1::POSITION_SIZE]]))
+    positions.append(None)
+    tokens = list(map(Token, types, values))
+
+    columns = [records[i::RECORD_SIZE] for i in range(RECORD_SIZE)]
+    for column in columns[1:3]:
+        check_range(column, NO_POSITION, len(positions) - 1)
+    for column in columns[3:]:
+        check_range(column, AS_BUILT, len(positions) - 1)
+
+    stack = []
+    push = stack.append
+    pop = stack.pop
+    try:
+        for tok, kind, tok_start, tok_end, node_start, node_end in zip(tokens, *columns):
+            tok.pos_start = positions[tok_start]
+            tok.pos_end = positions[tok_end]
+            if kind == NUMBER:
+                node = NumberNode(tok)
+            elif kind == VAR_ACCESS:
+                node = VarAccessNode(tok)
+            elif kind == BIN_OP:
+                right = pop()
+                node = BinOpNode(pop(), tok, right)
+            elif kind == UNARY_OP:
+                node = UnaryOpNode(tok, pop())
+            elif kind == VAR_ASSIGN:
+                node = VarAssignNode(tok, pop())
+            else:
+                raise ValueError(f'Unknown AST record kind {kind}')
+            if node_start != AS_BUILT:
+                node.pos_start = positions[node_start]
+            if node_end != AS_BUILT:
+                node.pos_end = positions[node_end]
+            push(node)
+    except IndexError:
+        # A record wanted more operands than the stack held.
+        raise ValueError('Corrupt AST blob') from None
+
+    if len(stack) != count:
+        raise ValueError('Corrupt AST blob')
+    return stack
+
+
+def dumps(node) -> bytes:
+    return Serializer().dumps([node])
+
+
+def loads(data: bytes):
+    return load_nodes(data)[0]
+
+
+def dumps_many(nodes: Sequence) -> bytes:
+    return Serializer().dumps(nodes)
+
+
+def loads_many(data: bytes) -> List:
+    return load_nodes(data)
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Tuple
+
+from basiclang.basic import ENGINES, LEXERS, PARSERS
+from basiclang.budget import Budget
+from basiclang.cache import ParseCache
+from basiclang.error import Error
+from basiclang.session import Session
+
+# Expression evaluation over JSON lines, on TCP or a Unix socket. A client
+# sends one object per line, {"id": ..., "text": "..."}, and gets one line
+# back per request, in order: {"id": ..., "value": ...} or
+# {"id": ..., "error": {"name", "details", "line", "column", "message"}}.
+#
+# Every connection is a Session with its own variables over the shared base
+# (null = 0). Requests may be pipelined; each session has a bounded queue, and
+# a full queue stops reading from the socket, which pushes back on the
+# client. A session evaluates its requests one at a time, in order, on the
+# worker pool (threads or processes), so sessions run in parallel and VAR
+# behaves as it does in the shell.
+#
+# Process workers, the default, get a copy of the session's variables as
+# plain numbers and return the variables after the run; thread workers run a
+# fork of the session, which the server commits only when the run succeeds
+# in time. A request that exceeds the timeout gets a Timeout error and
+# changes nothing, but its worker cannot be interrupted and stays busy
+# until the evaluation finishes. A single huge integer operation also holds
+# the GIL in a thread worker, stalling the event loop and every timeout until
+# it returns; only use the thread pool for trusted requests, or give every
+# request a budget (--max-steps, --deadline, --max-bits) that stops it in the
+# worker.
+#
+# Parsed trees and the programs compiled from them are cached: in one
+# ParseCache shared by the server's sessions with thread workers, and in one
+# per worker process with process workers.
+
+DEFAULT_LIMIT = 1 << 20
+
+# The cache of each worker process; the server's own process does not use it.
+WORKER_CACHE = ParseCache()
+
+
+def error_info(error: Error) -> dict:
+    return {
+        'name': error.error_name,
+        'details': error.details,
+        'line': error.pos_start.ln + 1,
+        'column': error.pos_start.col + 1,
+        'message': error.as_str(),
+    }
+
+
+def server_error(name: str, details: str) -> dict:
+    return {'name': name, 'details': details, 'line': None, 'column': None, 'message': f'{name}: {details}'}
+
+
+def evaluate_session(session: Session, text: str) -> Tuple[object, dict]:
+    try:
+        value, error = session.run('<request>', text)
+    except Exception as e:
+        # Interpreter bugs such as overflowing floats must not take the session down.
+        return None, server_error('Internal Error', f'{type(e).__name__}: {e}')
+    if error:
+        return None, error_info(error)
+    return value.value, None
+
+
+def evaluate_request(text: str, variables: Dict[str, object], options: dict) -> Tuple[object, dict, dict]:
+    session = Session(cache=WORKER_CACHE, **options)
+    session.update(variables)
+    value, error = evaluate_session(session, text)
+    if error:
+        return None, error, None
+    return value, None, session.variables()
+
+
+class Server:
+    def __init__(self, workers: int = None, pool: str = 'process', timeout: float = 5.0, max_pending: int = 64,
+                 engine: str = 'tree', lexer: str = 'char', optimize: bool = False, parser: str = 'recursive',
+                 short_circuit: bool = False, budget: Budget = None, specialize: bool = False) -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'")
+        if budget is not None and engine != 'tree':
+            raise ValueError(f"Engine '{engine}' does not support budgets; use 'tree'")
+        if lexer not in LEXERS:
+            raise ValueError(f"Unknown lexer '{lexer}'")
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}'")
+        if pool == 'thread':
+            self.executor: Executor = ThreadPoolExecutor(max_workers=workers)
+        elif pool == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            raise ValueError(f"Unknown pool '{pool}'")
+        self.pool = pool
+        self.options = {'engine': engine, 'lexer': lexer, 'optimize': optimize, 'parser': parser,
+                        'short_circuit': short_circuit, 'budget': budget, 'specialize': specialize}
+        self.cache = ParseCache()
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.server = None
+        self.handlers = set()
+        self.sessions = 0
+        self.requests = 0
+        self.timeouts = 0
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> Server:
+        self.server = await asyncio.start_server(self.handle, host, port, limit=DEFAULT_LIMIT)
+        return self
+
+    async def start_unix(self, path: str) -> Server:
+        self.server = await asyncio.start_unix_server(self.handle, path, limit=DEFAULT_LIMIT)
+        return self
+
+    def addresses(self):
+        return [sock.getsockname() for sock in self.server.sockets]
+
+    async def serve_forever(self) -> None:
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+        for handler in list(self.handlers):
+            handler.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+        # Workers still running timed-out requests would keep the interpreter
+        # from exiting; ProcessPoolExecutor has no public way to stop them.
+        processes = list((getattr(self.executor, '_processes', None) or {}).values())
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.sessions += 1
+        handler = asyncio.current_task()
+        self.handlers.add(handler)
+        session = Session(cache=self.cache, **self.options)
+        queue = asyncio.Queue(self.max_pending)
+        receiving = asyncio.ensure_future(self.receive(reader, queue))
+        try:
+            while True:
+                line = await queue.get()
+                if line is None:
+                    break
+                response = await self.respond(line, session)
+                try:
+                    data = json.dumps(response)
+                except ValueError as e:
+                    # Integers past sys.get_int_max_str_digits() have no decimal form.
+                    data = json.dumps({'id': response['id'], 'error': server_error('Internal Error', str(e))})
+                writer.write(data.encode('utf-8') + b'\n')
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            # Cancelled by close(); the session simply ends.
+            pass
+        finally:
+            self.handlers.discard(handler)
+            receiving.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def receive(self, reader: asyncio.StreamReader, queue: asyncio.Queue) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    await queue.put(line)
+        except (ConnectionError, ValueError):
+            # ValueError: a line longer than the stream limit.
+            pass
+        await queue.put(None)
+
+    async def respond(self, line: bytes, session: Session) -> dict:
+        self.requests += 1
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            return {'id': None, 'error': server_error('Bad Request', f'Invalid JSON: {e}')}
+        request_id = request.get('id') if isinstance(request, dict) else None
+        text = request.get('text') if isinstance(request, dict) else None
+        if not isinstance(text, str):
+            return {'id': request_id, 'error': server_error('Bad Request', "Expected an object with a 'text' string")}
+
+        loop = asyncio.get_running_loop()
+        if self.pool == 'thread':
+            fork = session.fork()
+            future = loop.run_in_executor(self.executor, evaluate_session, fork, text)
+        else:
+            future = loop.run_in_executor(self.executor, evaluate_request, text, session.variables(), self.options)
+        try:
+            result = await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return {'id': request_id, 'error': server_error('Timeout', f'Evaluation took longer than {self.timeout}s')}
+        value, error = result[0], result[1]
+        if error:
+            return {'id': request_id, 'error': error}
+        if self.pool == 'thread':
+            fork.commit()
+        else:
+            session.update(result[2])
+        return {'id': request_id, 'value': value}
+
+
+async def serve(args: argparse.Namespace) -> None:
+    budget = None
+    if args.max_steps is not None or args.deadline is not None or args.max_bits is not None:
+        budget = Budget(args.max_steps, args.deadline, args.max_bits)
+    server = Server(args.workers, args.pool, args.timeout, args.max_pending, args.engine, args.lexer,
+                    args.optimize, args.parser, args.short_circuit, budget, args.specialize)
+    if args.unix:
+        await server.start_unix(args.unix)
+    else:
+        await server.start(args.host, args.port)
+    for address in server.addresses():
+        print(f'listening on {address if isinstance(address, str) else "%s:%d" % address[:2]}', flush=True)
+
+    # Stop on SIGTERM as on Ctrl-C, so process pool workers are shut down too.
+    serving = asyncio.ensure_future(server.serve_forever())
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+    except NotImplementedError:
+        pass
+    try:
+        await serving
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await server.close()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='JSON-lines expression evaluation server')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765, help='0 picks a free port')
+    arg_parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    arg_parser.add_argument('--workers', type=int, default=os.cpu_count())
+    arg_parser.add_argument('--pool', choices=('process', 'thread'), default='process',
+                            help='thread workers cannot time out a request that holds the GIL')
+    arg_parser.add_argument('--timeout', type=float, default=5.0, help='seconds per request')
+    arg_parser.add_argument('--max-pending', type=int, default=64, help='queued requests per connection')
+    arg_parser.add_argument('--engine', choices=list(ENGINES), default='tree')
+    arg_parser.add_argument('--lexer', choices=list(LEXERS), default='char')
+    arg_parser.add_argument('--parser', choices=list(PARSERS), default='recursive')
+    arg_parser.add_argument('--optimize', action='store_true')
+    arg_parser.add_argument('--short-circuit', action='store_true')
+    arg_parser.add_argument('--specialize', action='store_true', help='specialize int/float arithmetic')
+    arg_parser.add_argument('--max-steps', type=int, help='nodes a request may evaluate')
+    arg_parser.add_argument('--deadline', type=float, help='seconds a request may evaluate')
+    arg_parser.add_argument('--max-bits', type=int, help='largest integer a request may produce')
+    args = arg_parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
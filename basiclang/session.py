@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import marshal
+from typing import Dict, Tuple
+
+from basiclang.basic import ENGINES, LEXERS, PARSERS, run_in_context
+from basiclang.budget import Budget
+from basiclang.cache import ParseCache
+from basiclang.context import Context, SymbolTable
+from basiclang.error import Error
+from basiclang.rtresult import Number
+from basiclang.serialize import dumps_many, loads_many
+from basiclang.snapshot import PackedVariables, pack_variables
+
+# A Session is one independent user of the interpreter, with its own Context
+# and SymbolTable. The table's parent is a base environment that every
+# session shares: reads fall through to it, and VAR always writes to the
+# session's own table, so assigning a base name shadows it instead of
+# changing it. Creating a session copies nothing, however large the base.
+#
+# Sessions share no mutable state but the base, which is a FrozenSymbolTable,
+# and an optional ParseCache, which is locked. Every engine reads stored
+# Numbers without changing them, so any number of sessions may run in
+# different threads at once; one session must not run in two threads.
+#
+# fork() layers a new session over this one the same way. The fork sees the
+# parent's variables, writes only its own, and commit() copies them into the
+# parent: a run can be thrown away, for example after a timeout, without
+# undoing anything.
+#
+# dumps() writes the session's variables packed by basiclang.snapshot, and
+# optionally the trees of its ParseCache in the serialize format, in one
+# marshalled tuple; marshal only ever builds ints, floats, strings, bytes and
+# tuples. loads() puts the packed variables in a FrozenSymbolTable layer
+# between the new session and its base, which looks a name up in the packed
+# hash table and boxes its value into a Number the first time it is read.
+# Restoring copies a few buffers, however many variables were saved.
+
+
+SNAPSHOT_MAGIC = b'BSSN'
+SNAPSHOT_VERSION = 1
+
+
+# values is a dict of plain numbers or PackedVariables.
+class FrozenSymbolTable(SymbolTable):
+    def __init__(self, values=None, parent: SymbolTable = None) -> None:
+        super().__init__()
+        self.values = values if values is not None else {}
+        self.parent = parent
+
+    def get(self, name: str):
+        number = self.symbols.get(name)
+        if number is None:
+            value = self.values.get(name)
+            if value is None:
+                return None if self.parent is None else self.parent.get(name)
+            # Two threads may box the same value; either Number will do.
+            number = self.symbols[name] = Number(value)
+        return number
+
+    def set(self, name: str, value) -> None:
+        raise TypeError('The base environment is read-only')
+
+    def remove(self, name: str) -> None:
+        raise TypeError('The base environment is read-only')
+
+
+DEFAULT_BASE = FrozenSymbolTable({'null': 0})
+
+
+class Session:
+    def __init__(self, base: SymbolTable = DEFAULT_BASE, engine: str = 'tree', lexer: str = 'char',
+                 cache: ParseCache = None, optimize: bool = False, parser: str = 'recursive',
+                 short_circuit: bool = False, budget: Budget = None, specialize: bool = False,
+                 name: str = '<session>') -> None:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}'")
+        if lexer not in LEXERS:
+            raise ValueError(f"Unknown lexer '{lexer}'")
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser '{parser}'")
+        self.options = {'engine': engine, 'lexer': lexer, 'cache': cache, 'optimize': optimize, 'parser': parser,
+                        'short_circuit': short_circuit, 'budget': budget, 'specialize': specialize}
+        self.context = Context(name)
+        self.context.symbol_table.parent = base
+        self.base = base
+        self.parent: Session = None
+
+    def run(self, fn: str, text: str) -> Tuple[Number, Error]:
+        return run_in_context(self.context, fn, text, **self.options)
+
+    def get(self, name: str):
+        number = self.context.symbol_table.get(name)
+        return None if number is None else number.value
+
+    def set(self, name: str, value) -> None:
+        self.context.symbol_table.set(name, Number(value))
+
+    def update(self, values: Dict[str, object]) -> None:
+        symbol_table = self.context.symbol_table
+        for name, value in values.items():
+            symbol_table.set(name, Number(value))
+
+    def variables(self) -> Dict[str, object]:
+        # The session's own variables, with restored ones but without the base.
+        layers = []
+        table = self.context.symbol_table
+        while table is not None and table is not self.base:
+            layers.append(table)
+            table = table.parent
+        variables = {}
+        for table in reversed(layers):
+            if isinstance(table, FrozenSymbolTable):
+                variables.update(table.values.items())
+            else:
+                variables.update((name, number.value) for name, number in table.items())
+        return variables
+
+    def fork(self) -> Session:
+        child = Session(self.context.symbol_table, name=self.context.display_name)
+        child.options = self.options
+        child.parent = self
+        return child
+
+    def commit(self) -> None:
+        if self.parent is None:
+            raise Exception('Only a forked session can be committed')
+        parent_table = self.parent.context.symbol_table
+        for name, number in self.context.symbol_table.items():
+            parent_table.set(name, number)
+        self.context.symbol_table.clear()
+
+    def dumps(self, include_asts: bool = False) -> bytes:
+        variables = self.variables()
+        asts = None
+        if include_asts:
+            cache = self.options['cache']
+            if not isinstance(cache, ParseCache):
+                raise ValueError('Only the trees of a ParseCache can be saved')
+            entries = cache.items()
+            asts = (tuple(fn for (fn, _), _ in entries), tuple(text for (_, text), _ in entries),
+                    dumps_many([node for _, node in entries]))
+        payload = (SNAPSHOT_VERSION, pack_variables(variables), asts)
+        return SNAPSHOT_MAGIC + marshal.dumps(payload)
+
+    @staticmethod
+    def loads(data: bytes, base: SymbolTable = DEFAULT_BASE, **options) -> Session:
+        if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise ValueError('Not a basiclang session snapshot')
+        payload = marshal.loads(data[len(SNAPSHOT_MAGIC):])
+        if payload[0] != SNAPSHOT_VERSION:
+            raise ValueError(f'Unsupported session snapshot version {payload[0]}')
+        packed, asts = payload[1:]
+        values = PackedVariables(packed)
+
+        if asts is not None:
+            fns, texts, blob = asts
+            if options.get('cache') is None:
+                options['cache'] = ParseCache()
+            for fn, text, node in zip(fns, texts, loads_many(blob)):
+                options['cache'].put(fn, text, node)
+
+        session = Session(FrozenSymbolTable(values, base), **options)
+        # The restored layer belongs to the session, not to its base.
+        session.base = base
+        return session
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import sys
+import zlib
+from array import array
+from typing import Dict, Iterator, Tuple
+
+# Variables packed into flat buffers that are read in place, so loading a
+# million of them costs a few buffer copies rather than a million objects:
+#   names    the UTF-8 names back to back, and offsets[i]..offsets[i + 1]
+#            the bytes of name i (32-bit offsets)
+#   kinds    one byte per variable: INT, FLOAT or BIG
+#   words    one 64-bit word per variable: the int, the bits of the float,
+#            or for BIG an index into the bigs tuple of ints that do not fit
+#   slots    an open-addressing hash table over the names, keyed by CRC-32
+#            (stable across processes, unlike hash()); each slot holds
+#            1 + a variable index, or 0 when empty. Probing is linear.
+# Buffers are in the writer's byte order and byteswapped on load if needed.
+
+INT = 0
+FLOAT = 1
+BIG = 2
+
+INT_MIN = -(1 << 63)
+INT_MAX = (1 << 63) - 1
+
+
+def slot_count(count: int) -> int:
+    # At most 80% full.
+    return count * 5 // 4 + 1
+
+
+def pack_variables(variables: Dict[str, object]) -> tuple:
+    count = len(variables)
+    names = bytearray()
+    offsets = array('i', [0])
+    kinds = bytearray(count)
+    words = array('q', bytes(8 * count))
+    doubles = memoryview(words).cast('B').cast('d')
+    slots = array('i', bytes(4 * slot_count(count)))
+    size = len(slots)
+    bigs = []
+    for i, (name, value) in enumerate(variables.items()):
+        encoded = name.encode('utf-8')
+        names += encoded
+        offsets.append(len(names))
+        if type(value) is float:
+            kinds[i] = FLOAT
+            doubles[i] = value
+        elif INT_MIN <= value <= INT_MAX:
+            words[i] = value
+        else:
+            kinds[i] = BIG
+            words[i] = len(bigs)
+            bigs.append(value)
+
+        slot = zlib.crc32(encoded) % size
+        while slots[slot]:
+            slot = (slot + 1) % size
+        slots[slot] = i + 1
+    doubles.release()
+    return (sys.byteorder, count, bytes(names), offsets.tobytes(), bytes(kinds), words.tobytes(), slots.tobytes(),
+            tuple(bigs))
+
+
+def load_array(typecode: str, raw: bytes, byteorder: str):
+    if byteorder == sys.byteorder:
+        return memoryview(raw).cast(typecode)
+    values = array(typecode)
+    values.frombytes(raw)
+    values.byteswap()
+    return values
+
+
+class PackedVariables:
+    def __init__(self, packed: tuple) -> None:
+        byteorder, count, names, offsets, kinds, words, slots, bigs = packed
+        self.count = count
+        self.names = names
+        self.offsets = load_array('i', offsets, byteorder)
+        self.kinds = kinds
+        self.words = load_array('q', words, byteorder)
+        self.doubles = load_array('d', words, byteorder)
+        self.slots = load_array('i', slots, byteorder)
+        self.bigs = bigs
+        if (len(self.offsets) != count + 1 or len(kinds) != count or len(self.words) != count
+                or len(self.slots) != slot_count(count)):
+            raise ValueError('Corrupt packed variables')
+
+    def __len__(self) -> int:
+        return self.count
+
+    def index(self, name: str) -> int:
+        encoded = name.encode('utf-8')
+        slots = self.slots
+        size = len(slots)
+        slot = zlib.crc32(encoded) % size
+        while True:
+            entry = slots[slot]
+            if not entry:
+                return -1
+            i = entry - 1
+            if self.names[self.offsets[i]:self.offsets[i + 1]] == encoded:
+                return i
+            slot = (slot + 1) % size
+
+    def value(self, i: int):
+        kind = self.kinds[i]
+        if kind == INT:
+            return self.words[i]
+        if kind == FLOAT:
+            return self.doubles[i]
+        return self.bigs[self.words[i]]
+
+    def get(self, name: str, default=None):
+        i = self.index(name)
+        return default if i < 0 else self.value(i)
+
+    def items(self) -> Iterator[Tuple[str, object]]:
+        names, offsets = self.names, self.offsets
+        for i in range(self.count):
+            yield names[offsets[i]:offsets[i + 1]].decode('utf-8'), self.value(i)
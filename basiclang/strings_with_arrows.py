@@ -1,20 +1,30 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+from bisect import bisect_left
+
 from basiclang.position import Position
 
 
 def string_with_arrows(text: str, pos_start: Position, pos_end: Position) -> str:
     result = ''
 
+    # Newlines are looked up in the source's line index instead of the text:
+    # a line starts after the newline at starts[i] - 1.
+    source = pos_start.source
+    starts = source.line_starts()
+
+    def find_newline(idx: int) -> int:
+        line = bisect_left(starts, idx + 1)
+        return starts[line] - 1 if line < len(starts) else len(text)
+
     # Calculate indices
-    idx_start = max(text.rfind('\n', 0, pos_start.idx), 0)
-    idx_end = text.find('\n', idx_start + 1)
-    if idx_end < 0:
-        idx_end = len(text)
+    first = source.line_index(pos_start.idx)
+    idx_start = max(starts[first] - 1, 0)
+    idx_end = find_newline(idx_start + 1)
 
     # Generate each line
-    line_count = pos_end.ln - pos_start.ln + 1
+    line_count = source.line_index(pos_end.idx) - first + 1
     for i in range(line_count):
         # Calculate line columns
         line = text[idx_start:idx_end]
@@ -27,8 +37,6 @@ def string_with_arrows(text: str, pos_start: Position, pos_end: Position) -> str
 
         # Re-calculate indices
         idx_start = idx_end
-        idx_end = text.find('\n', idx_start + 1)
-        if idx_end < 0:
-            idx_end = len(text)
+        idx_end = find_newline(idx_start + 1)
 
     return result.replace('\t', '')
@@ -35,9 +35,12 @@ KEYWORDS = [
     'OR',
     'NOT'
 ]
+KEYWORD_SET = frozenset(KEYWORDS)
 
 
 class Token:
+    __slots__ = ('type', 'value', 'pos_start', 'pos_end')
+
     def __init__(self, type_: str, value_=None, pos_start: Position = None, pos_end: Position = None) -> None:
         self.type = type_
         self.value = value_
@@ -54,3 +57,9 @@ class Token:
         if self.value:
             return f'{self.type}:{self.value}'
         return f'{self.type}'
+
+
+def op_key(tok: Token):
+    if tok.type == TT_KEYWORD:
+        return (tok.type, tok.value)
+    return tok.type
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import operator
+from typing import Dict, List, Mapping
+
+try:
+    import numpy as np
+except ImportError as e:
+    raise ImportError('basiclang.vectorize needs numpy, an optional dependency: pip install numpy') from e
+
+from basiclang.context import Context
+from basiclang.error import RTError
+from basiclang.interpreter import SHORT_CIRCUIT_OPS, op_key, result_pos
+from basiclang.node import BinOpNode, NumberNode, UnaryOpNode, VarAccessNode, VarAssignNode
+from basiclang.operators import and_, or_, pow_
+from basiclang.token import TT_DIV, TT_EE, TT_GT, TT_GTE, TT_KEYWORD, TT_LT, TT_LTE, TT_MINUS, TT_MUL, TT_NE, TT_PLUS, TT_POW
+
+# Every value is a one-dimensional array with one entry per row: int64 for
+# ints, float64 for floats and object arrays (holding Python ints and floats)
+# where rows disagree on the type, e.g. int ^ int with negative exponents.
+# int64 +, - and * wrap around where Python ints would keep growing, so a
+# column whose sum or difference changed sign the way only a wrap does, or
+# whose product is estimated in float64 to come near the int64 range, is
+# computed again on Python ints; so is negating INT_MIN. int ^ int overflows
+# with small operands, so it is estimated in float64 first and computed on
+# Python ints whenever a row could leave the int64 range.
+# With short-circuit evaluation both operands of AND/OR are still computed
+# for every row, but the right operand runs under an active mask: rows the
+# left operand already settles record no errors and keep their bindings.
+
+INT_MIN = np.iinfo(np.int64).min
+INT_MAX = np.iinfo(np.int64).max
+# Below 2 ** 63 with room for float64 rounding of the estimate.
+POW_LIMIT = 2.0 ** 62
+
+ARITHMETIC = {
+    TT_PLUS: operator.add,
+    TT_MINUS: operator.sub,
+    TT_MUL: operator.mul,
+}
+
+COMPARISONS = {
+    TT_EE: np.equal,
+    TT_NE: np.not_equal,
+    TT_LT: np.less,
+    TT_GT: np.greater,
+    TT_LTE: np.less_equal,
+    TT_GTE: np.greater_equal,
+}
+
+object_pow = np.frompyfunc(pow_, 2, 1)
+object_and = np.frompyfunc(and_, 2, 1)
+object_or = np.frompyfunc(or_, 2, 1)
+object_int = np.frompyfunc(int, 1, 1)
+
+
+def as_column(values) -> np.ndarray:
+    array = np.asarray(values)
+    if array.ndim != 1:
+        raise ValueError('Columns must be one-dimensional')
+    if array.dtype.kind in 'biu':
+        return array.astype(np.int64)
+    if array.dtype.kind == 'f':
+        return array.astype(np.float64)
+    if array.dtype.kind == 'O':
+        return array
+    raise ValueError(f'Unsupported column type {array.dtype}')
+
+
+def is_int(array: np.ndarray) -> bool:
+    return array.dtype.kind == 'i'
+
+
+def truncate(array: np.ndarray) -> np.ndarray:
+    if array.dtype.kind == 'O':
+        return object_int(array)
+    if array.dtype.kind == 'f':
+        return np.trunc(array).astype(np.int64)
+    return array
+
+
+class VectorResult:
+    def __init__(self, value: np.ndarray, error_index: np.ndarray, errors: List[RTError],
+                 bindings: Dict[str, np.ndarray]) -> None:
+        self.value = value
+        self.error_index = error_index
+        self.errors = errors
+        self.bindings = bindings
+
+    @property
+    def mask(self) -> np.ndarray:
+        return self.error_index >= 0
+
+    @property
+    def error(self) -> RTError:
+        return self.errors[0] if self.errors else None
+
+    def row_error(self, row: int) -> RTError:
+        idx = self.error_index[row]
+        return self.errors[idx] if idx >= 0 else None
+
+
+class VectorEvaluator:
+    def __init__(self, columns: Mapping[str, np.ndarray], size: int = None, short_circuit: bool = False) -> None:
+        self.columns = {name: as_column(values) for name, values in columns.items()}
+        sizes = {len(values) for values in self.columns.values()}
+        if size is not None:
+            sizes.add(size)
+        if len(sizes) > 1:
+            raise ValueError('All columns must have the same length')
+        self.size = sizes.pop() if sizes else 1
+        self.error_index = np.full(self.size, -1, dtype=np.intp)
+        self.errors = []
+        self.bindings = {}
+        self.unbound = {}
+        self.short_circuit = short_circuit
+        self.active = None
+
+    def evaluate(self, node, context: Context) -> VectorResult:
+        with np.errstate(all='ignore'):
+            value = self.visit(node, context)
+        return VectorResult(value, self.error_index, self.errors, self.bindings)
+
+    def fail(self, rows: np.ndarray, error: RTError) -> None:
+        rows = rows & (self.error_index < 0)
+        if self.active is not None:
+            rows &= self.active
+        if rows.any():
+            self.error_index[rows] = len(self.errors)
+            self.errors.append(error)
+
+    def constant(self, value) -> np.ndarray:
+        if isinstance(value, float):
+            return np.full(self.size, value, dtype=np.float64)
+        if INT_MIN <= value <= INT_MAX:
+            return np.full(self.size, value, dtype=np.int64)
+        return np.full(self.size, value, dtype=object)
+
+    def visit(self, node, context: Context) -> np.ndarray:
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name, self.no_visit_method)
+        return method(node, context)
+
+    def no_visit_method(self, node, context: Context):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    def visit_NumberNode(self, node: NumberNode, context: Context) -> np.ndarray:
+        return self.constant(node.tok.value)
+
+    def visit_VarAccessNode(self, node: VarAccessNode, context: Context) -> np.ndarray:
+        var_name = node.var_name_tok.value
+        value = self.lookup(var_name, context)
+        unbound = self.unbound.get(var_name)
+        if value is None or unbound is not None:
+            rows = np.ones(self.size, dtype=bool) if value is None else unbound
+            self.fail(rows, RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
+        return self.constant(0) if value is None else value
+
+    def lookup(self, var_name: str, context: Context) -> np.ndarray:
+        value = self.bindings.get(var_name)
+        if value is None:
+            value = self.columns.get(var_name)
+        if value is None:
+            number = context.symbol_table.get(var_name)
+            if number is not None:
+                value = self.constant(number.value)
+        return value
+
+    def visit_VarAssignNode(self, node: VarAssignNode, context: Context) -> np.ndarray:
+        var_name = node.var_name_tok.value
+        value = self.visit(node.value_node, context)
+        stored = value
+        if self.active is None:
+            self.unbound.pop(var_name, None)
+        else:
+            previous = self.lookup(var_name, context)
+            if previous is None:
+                self.unbound[var_name] = ~self.active
+            else:
+                if var_name in self.unbound:
+                    self.unbound[var_name] = self.unbound[var_name] & ~self.active
+                if previous.dtype != value.dtype:
+                    previous, stored = previous.astype(object), value.astype(object)
+                stored = np.where(self.active, stored, previous)
+        self.bindings[var_name] = stored
+        return value
+
+    def visit_right(self, node: BinOpNode, left: np.ndarray, context: Context) -> np.ndarray:
+        settles = SHORT_CIRCUIT_OPS[op_key(node.op_tok)]
+        outer = self.active
+        active = (left == 0) if settles else (left != 0)
+        self.active = active if outer is None else outer & active
+        try:
+            return self.visit(node.right_node, context)
+        finally:
+            self.active = outer
+
+    def visit_BinOpNode(self, node: BinOpNode, context: Context) -> np.ndarray:
+        left = self.visit(node.left_node, context)
+        key = op_key(node.op_tok)
+        if self.short_circuit and key in SHORT_CIRCUIT_OPS:
+            right = self.visit_right(node, left, context)
+        else:
+            right = self.visit(node.right_node, context)
+
+        if key in ARITHMETIC:
+            return self.arithmetic(key, left, right)
+        if key == TT_DIV:
+            zero = right == 0
+            if zero.any():
+                pos_start, pos_end = result_pos(node.right_node)
+                self.fail(zero, RTError(pos_start, pos_end, 'Division by zero', context))
+                right = np.where(zero, 1, right)
+            result = left / right
+            return result if result.dtype.kind == 'O' else result.astype(np.float64)
+        if key == TT_POW:
+            return self.power(node, left, right, context)
+        if key in COMPARISONS:
+            return COMPARISONS[key](left, right).astype(np.int64)
+        if key == (TT_KEYWORD, 'AND'):
+            if left.dtype.kind == 'O' or right.dtype.kind == 'O':
+                return object_and(left, right)
+            return np.where(left != 0, truncate(right), 0)
+        if key == (TT_KEYWORD, 'OR'):
+            if left.dtype.kind == 'O' or right.dtype.kind == 'O':
+                return object_or(left, right)
+            return np.where(left != 0, truncate(left), truncate(right))
+        raise Exception(f'Unknown binary operator {node.op_tok}')
+
+    def arithmetic(self, key, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        op = ARITHMETIC[key]
+        result = op(left, right)
+        if not (is_int(left) and is_int(right)):
+            return result
+        if key == TT_PLUS:
+            overflow = ((left ^ result) & (right ^ result)) < 0
+        elif key == TT_MINUS:
+            overflow = ((left ^ right) & (left ^ result)) < 0
+        else:
+            overflow = np.abs(left.astype(np.float64) * right.astype(np.float64)) >= POW_LIMIT
+        if overflow.any():
+            return op(left.astype(object), right.astype(object))
+        return result
+
+    def power(self, node: BinOpNode, left: np.ndarray, right: np.ndarray, context: Context) -> np.ndarray:
+        if self.active is not None:
+            # Rows outside the active mask are discarded; keep them from raising.
+            right = np.where(self.active, right, 1)
+        if is_int(left) and is_int(right):
+            negative = right < 0
+            with np.errstate(over='ignore'):
+                estimate = np.abs(np.power(left.astype(np.float64), right.astype(np.float64)))
+            if not negative.any() and not (estimate >= POW_LIMIT).any():
+                return np.power(left, right)
+            zero = negative & (left == 0)
+            if zero.any():
+                self.fail(zero, RTError(node.pos_start, node.pos_end, 'Division by zero', context))
+                right = np.where(zero, 1, right)
+            return object_pow(left.astype(object), right.astype(object))
+        if left.dtype.kind == 'O' or right.dtype.kind == 'O':
+            return object_pow(left, right)
+
+        left = left.astype(np.float64)
+        right = right.astype(np.float64)
+        result = np.power(left, right)
+        domain = ((left < 0) & (right != np.trunc(right)) & np.isfinite(right)) | ((left == 0) & (right < 0))
+        if domain.any():
+            self.fail(domain, RTError(node.pos_start, node.pos_end, 'Math domain error', context))
+        overflow = np.isinf(result) & np.isfinite(left) & np.isfinite(right) & ~domain
+        if overflow.any():
+            self.fail(overflow, RTError(node.pos_start, node.pos_end, 'Math range error', context))
+        return result
+
+    def visit_UnaryOpNode(self, node: UnaryOpNode, context: Context) -> np.ndarray:
+        value = self.visit(node.node, context)
+        if node.op_tok.type == TT_MINUS:
+            if is_int(value) and (value == INT_MIN).any():
+                value = value.astype(object)
+            return value * -1
+        if node.op_tok.matches(TT_KEYWORD, 'NOT'):
+            return (value == 0).astype(np.int64)
+        return value
+
+
+def evaluate_columns(node, columns: Mapping[str, np.ndarray], context: Context = None, size: int = None,
+                     short_circuit: bool = False) -> VectorResult:
+    if context is None:
+        context = Context('<program>')
+    return VectorEvaluator(columns, size, short_circuit).evaluate(node, context)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from basiclang.context import Context
+from basiclang.cse import CSEInterpreter
+from basiclang.interpreter import Interpreter
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser
+from basiclang.rtresult import Number
+from benchmarks.generators import VAR_NAMES, flat, repeated
+
+# Guard chains drawn from a small pool of subformulas repeat every formula
+# several times; a flat chain has no repeats and shows what the analysis and
+# the cache lookups cost when there is nothing to share.
+
+WORKLOADS = {
+    'repeated': lambda terms, seed: repeated(terms, seed),
+    'repeated-wide': lambda terms, seed: repeated(terms, seed, distinct=terms // 2),
+    'no-repeats': lambda terms, seed: flat(terms * 6, seed),
+}
+
+
+def make_rows(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        context = Context('<program>')
+        for name in VAR_NAMES:
+            context.symbol_table.set(name, Number(rng.randint(1, 99)))
+        rows.append(context)
+    return rows
+
+
+def evaluate_rows(interpreter, run, node, rows) -> int:
+    errors = 0
+    for context in rows:
+        if run(node, context).error:
+            errors += 1
+    return errors
+
+
+def best_of(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Tree walker with and without common-subexpression caching')
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[4, 8, 16])
+    arg_parser.add_argument('--rows', type=int, default=2000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    rows = make_rows(args.rows, args.seed)
+    print(f'{"workload":14} {"terms":>5} {"tree":>10} {"cse":>10} {"speedup":>8} '
+          f'{"hits/run":>9} {"saved nodes/run":>16}')
+    for workload, generate in WORKLOADS.items():
+        for terms in args.terms:
+            tokens, error = RegexLexer('<bench>', generate(terms, args.seed)).get_tokens()
+            if error:
+                raise Exception(error.as_str())
+            res = Parser(tokens).parse()
+            if res.error:
+                raise Exception(res.error.as_str())
+
+            interpreter = Interpreter()
+            tree = best_of(lambda: evaluate_rows(interpreter, interpreter.visit, res.node, rows), args.repeat)
+            cse = CSEInterpreter()
+            memo = best_of(lambda: evaluate_rows(cse, cse.run, res.node, rows), args.repeat)
+
+            runs = args.rows * args.repeat
+            stats = cse.stats()
+            print(f'{workload:14} {terms:5} {tree / args.rows * 1e6:8.1f}us {memo / args.rows * 1e6:8.1f}us '
+                  f'{tree / memo:7.2f}x {stats["hits"] / runs:9.1f} {stats["saved_nodes"] / runs:16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import gc
+import os
+import tempfile
+import time
+
+from basiclang.diskcache import DiskCache, load_library
+from benchmarks.generators import corpus
+
+
+def timed(func) -> float:
+    gc.collect()
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Library load time with and without the on-disk AST cache')
+    arg_parser.add_argument('--formulas', type=int, default=100000)
+    arg_parser.add_argument('--lexer', default='regex', choices=['char', 'regex'])
+    arg_parser.add_argument('--parser', default='pratt', choices=['recursive', 'stack', 'pratt'])
+    arg_parser.add_argument('--cache-dir', help='cache directory (default: a temporary one)')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = os.path.join(tmp, 'library.bas')
+        with open(library, 'w', encoding='utf-8') as file:
+            for i, text in enumerate(corpus(args.formulas, seed=7)):
+                file.write(f'VAR f{i} = {text}\n')
+        with open(library, encoding='utf-8', newline='') as file:
+            text = file.read()
+        cache = DiskCache(args.cache_dir or os.path.join(tmp, 'cache'))
+        cache.invalidate(library, text)
+
+        def load(use_cache: DiskCache) -> None:
+            nodes, error = load_library(library, use_cache, args.lexer, args.parser)
+            if error:
+                raise Exception(error.as_str())
+
+        uncached = timed(lambda: load(None))
+        cold = timed(lambda: load(cache))
+        # The entry is written behind the load; time that on its own, and
+        # have the warm load read it back from disk.
+        write = timed(cache.flush)
+        warm = timed(lambda: load(cache))
+        entry = cache.path(cache.key(library, text, 'many'))
+
+        print(f'formulas       {args.formulas:>10}')
+        print(f'source         {os.path.getsize(library) / 1e6:>9.2f}MB')
+        print(f'cache entry    {os.path.getsize(entry) / 1e6:>9.2f}MB')
+        print(f'lex + parse    {uncached * 1000:>9.1f}ms')
+        print(f'cold           {cold * 1000:>9.1f}ms')
+        print(f'write behind   {write * 1000:>9.1f}ms')
+        print(f'warm           {warm * 1000:>9.1f}ms  {uncached / warm:.1f}x faster than lex + parse')
+        print(f'cache stats    {cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+
+from basiclang.incremental import Document
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser
+from basiclang.token import TT_INT, TT_RPAREN
+from benchmarks.generators import grouped
+
+# Keystroke-sized edits on a formula of parenthesized terms: retyping a
+# number, and typing then deleting ' + 1' inside a group. Every edit is timed
+# through Document.edit; a sample of them is also timed lexing and parsing
+# the new text from scratch. Incremental latency does not grow with the
+# document: an edit relexes and reparses the touched chunk and group, and
+# positions after it move with a prefix sum rather than one by one.
+# --max-growth fails the run when the largest document's edits are slower
+# than the smallest's by more than that factor.
+
+
+def make_edits(doc: Document, count: int, seed: int):
+    rng = random.Random(seed)
+    tokens = doc.tokens
+    numbers = [tok for tok in tokens if tok.type == TT_INT]
+    closing = [tok for tok in tokens if tok.type == TT_RPAREN]
+    edits = []
+    while len(edits) < count:
+        if rng.random() < 0.5:
+            tok = rng.choice(numbers)
+            start, end = tok.pos_start.idx, tok.pos_end.idx
+            old = doc.text[start:end]
+            new = str(rng.randint(1, 99))
+            edits.append((start, end - start, new))
+            edits.append((start, len(new), old))
+        else:
+            offset = rng.choice(closing).pos_start.idx
+            edits.append((offset, 0, ' + 1'))
+            edits.append((offset, 4, ''))
+    return edits
+
+
+def full_parse(text: str):
+    tokens, error = RegexLexer('<bench>', text).get_tokens()
+    if error:
+        return None, error
+    res = Parser(tokens).parse()
+    return res.node, res.error
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Per-edit latency of incremental vs full reparsing')
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    arg_parser.add_argument('--edits', type=int, default=200)
+    arg_parser.add_argument('--full-samples', type=int, default=20, help='edits to time with a full reparse')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--max-growth', type=float, help='fail if latency grows more than this with the size')
+    args = arg_parser.parse_args()
+
+    latencies = []
+
+    print(f'{"terms":>6} {"chars":>8} {"incremental":>12} {"full":>12} {"speedup":>8}  strategies')
+    for terms in args.terms:
+        text = grouped(terms, args.seed)
+        doc = Document('<bench>', text)
+        edits = make_edits(doc, args.edits, args.seed)
+
+        strategies = Counter()
+        start = time.perf_counter()
+        for edit in edits:
+            _, error = doc.edit(*edit)
+            if error:
+                raise Exception(error.as_str())
+            strategies[doc.strategy] += 1
+        incremental = (time.perf_counter() - start) / len(edits)
+        latencies.append(incremental)
+        if doc.text != text:
+            raise Exception('edits did not restore the text')
+
+        texts = []
+        for offset, removed, inserted in edits[:args.full_samples]:
+            text = text[:offset] + inserted + text[offset + removed:]
+            texts.append(text)
+        start = time.perf_counter()
+        for text in texts:
+            full_parse(text)
+        full = (time.perf_counter() - start) / len(texts)
+
+        used = ', '.join(f'{name} {count}' for name, count in strategies.most_common())
+        print(f'{terms:6} {len(doc.text):8} {incremental * 1e6:10.1f}us {full * 1e6:10.1f}us '
+              f'{full / incremental:7.1f}x  {used}')
+
+    growth = latencies[-1] / latencies[0]
+    print(f'\nlatency growth from {args.terms[0]} to {args.terms[-1]} terms: {growth:.2f}x')
+    if args.max_growth is not None and growth > args.max_growth:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import gc
+import time
+import tracemalloc
+
+from basiclang.lexer import Lexer
+from basiclang.parser import Parser
+from benchmarks.generators import corpus
+
+
+def build_asts(texts):
+    asts = []
+    for i, text in enumerate(texts):
+        tokens, error = Lexer(f'<formula {i}>', text).get_tokens()
+        if error:
+            raise Exception(error.as_str())
+        ast = Parser(tokens).parse()
+        if ast.error:
+            raise Exception(ast.error.as_str())
+        asts.append((tokens, ast.node))
+    return asts
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Memory held by lexed and parsed formulas')
+    arg_parser.add_argument('--count', type=int, default=20000)
+    arg_parser.add_argument('--size', type=int, default=8)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    texts = corpus(args.count, args.seed, args.size)
+    source_bytes = sum(len(text) for text in texts)
+
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    asts = build_asts(texts)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    token_count = sum(len(tokens) for tokens, _ in asts)
+    print(f'formulas        {len(asts)}')
+    print(f'source bytes    {source_bytes}')
+    print(f'tokens          {token_count}')
+    print(f'retained bytes  {current} ({current / len(asts):.0f} per formula, {current / token_count:.0f} per token)')
+    print(f'peak bytes      {peak}')
+    print(f'build time      {elapsed:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
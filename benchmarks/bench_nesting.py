@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import sys
+import time
+
+from basiclang.context import Context
+from basiclang.interpreter import Interpreter, StackInterpreter
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser, StackParser
+from basiclang.rtresult import Number
+from benchmarks.generators import flat, negation_chain, nested_parens, nested_right, not_chain
+
+SHAPES = {
+    'parens': nested_parens,
+    'right': nested_right,
+    'negation': negation_chain,
+    'not': not_chain,
+    'flat': flat,
+}
+
+
+def timed(func, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        try:
+            result = func()
+        except RecursionError:
+            return None, 'RecursionError'
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def fmt(value) -> str:
+    return value if isinstance(value, str) else f'{value * 1000:9.2f}ms'
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Recursive vs explicit-stack parser and evaluator')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[50, 500, 5000, 50000])
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print(f'recursion limit {sys.getrecursionlimit()}')
+    print(f'{"shape":10} {"size":>7} {"Parser":>14} {"StackParser":>14} {"Interpreter":>14} {"StackInterp.":>14}')
+    for name, shape in SHAPES.items():
+        for size in args.sizes:
+            tokens, error = RegexLexer('<bench>', shape(size)).get_tokens()
+            if error:
+                raise Exception(error.as_str())
+
+            res, recursive_parse = timed(lambda: Parser(tokens).parse(), args.repeat)
+            res, stack_parse = timed(lambda: StackParser(tokens).parse(), args.repeat)
+            if res.error:
+                raise Exception(res.error.as_str())
+
+            context = Context('<program>')
+            context.symbol_table.set('null', Number(0))
+            _, recursive_eval = timed(lambda: Interpreter().visit(res.node, context), args.repeat)
+            _, stack_eval = timed(lambda: StackInterpreter().visit(res.node, context), args.repeat)
+            print(f'{name:10} {size:7} {fmt(recursive_parse):>14} {fmt(stack_parse):>14} '
+                  f'{fmt(recursive_eval):>14} {fmt(stack_eval):>14}')
+
+
+if __name__ == '__main__':
+    main()
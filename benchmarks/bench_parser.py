@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import time
+
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser, PrattParser, StackParser
+from benchmarks.generators import corpus, flat
+
+PARSERS = {
+    'recursive': Parser,
+    'stack': StackParser,
+    'pratt': PrattParser,
+}
+
+
+def best_of(func, repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def parse_all(parser_class, token_lists) -> None:
+    for tokens in token_lists:
+        res = parser_class(tokens).parse()
+        if res.error:
+            raise Exception(res.error.as_str())
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Parse throughput of the parser implementations')
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[1, 10, 100, 500])
+    arg_parser.add_argument('--tokens', type=int, default=200000, help='approximate tokens parsed per measurement')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    workloads = {f'flat-{terms}': [flat(terms, seed) for seed in range(max(1, args.tokens // (2 * terms)))]
+                 for terms in args.terms}
+    workloads['corpus'] = corpus(args.tokens // 20, seed=1)
+
+    print(f'{"workload":12} ' + ' '.join(f'{name:>16}' for name in PARSERS) + f' {"pratt speedup":>14}')
+    for workload, texts in workloads.items():
+        token_lists = []
+        for text in texts:
+            tokens, error = RegexLexer('<bench>', text).get_tokens()
+            if error:
+                raise Exception(error.as_str())
+            token_lists.append(tokens)
+        token_count = sum(len(tokens) for tokens in token_lists)
+
+        timings = {name: best_of(lambda: parse_all(parser_class, token_lists), args.repeat)
+                   for name, parser_class in PARSERS.items()}
+        rates = ' '.join(f'{token_count / timings[name] / 1e6:11.2f} Mtok/s' for name in PARSERS)
+        print(f'{workload:12} {rates} {timings["recursive"] / timings["pratt"]:13.1f}x')
+
+
+if __name__ == '__main__':
+    main()
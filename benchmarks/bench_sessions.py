@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import sys
+import threading
+import time
+
+from basiclang.basic import ENGINES
+from basiclang.cache import ParseCache
+from basiclang.context import Context
+from basiclang.rtresult import Number
+from basiclang.session import DEFAULT_BASE, FrozenSymbolTable, Session
+
+# Session creation over bases of growing size, next to copying the base into
+# a fresh Context, which is what isolation costs without a shared parent.
+# Then a stress run: threads drive their own sessions through every engine
+# and one shared ParseCache, with the thread switch interval turned down, and
+# check after every statement that each session only sees its own values.
+
+
+def creation_cost(base_size: int, count: int) -> tuple:
+    base = FrozenSymbolTable({f'v{i}': i for i in range(base_size)})
+
+    start = time.perf_counter()
+    for _ in range(count):
+        Session(base)
+    layered = (time.perf_counter() - start) / count
+
+    copies = max(1, min(count, 10_000_000 // max(base_size, 1)))
+    start = time.perf_counter()
+    for _ in range(copies):
+        table = Context('<session>').symbol_table
+        for name, value in base.values.items():
+            table.set(name, Number(value))
+    copied = (time.perf_counter() - start) / copies
+    return layered, copied
+
+
+def stress(thread_id: int, sessions: int, steps: int, cache: ParseCache, seed: int, failures: list,
+           counts: list) -> None:
+    rng = random.Random(seed * 1000 + thread_id)
+    engines = list(ENGINES)
+    for _ in range(sessions):
+        session = Session(engine=rng.choice(engines), cache=cache)
+        expected = 0
+        for step in range(steps):
+            # The same texts in every thread, so the cached trees are shared.
+            increment = rng.randint(1, 9)
+            value, error = session.run('<stress>', f'VAR x = x + {increment} * null' if step else 'VAR x = 0')
+            if step == 0:
+                session.run('<stress>', f'VAR null = {thread_id + 1}')
+            else:
+                expected += increment * (thread_id + 1)
+            got = None if error else value.value
+            if got != expected or session.get('null') != thread_id + 1:
+                failures.append((thread_id, step, expected, got, session.get('null')))
+                return
+            counts[thread_id] += 1
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Session creation cost and a multi-threaded isolation check')
+    arg_parser.add_argument('--base-sizes', type=int, nargs='+', default=[1, 1000, 100000, 1000000])
+    arg_parser.add_argument('--create', type=int, default=100000, help='sessions to create per base size')
+    arg_parser.add_argument('--threads', type=int, default=8)
+    arg_parser.add_argument('--sessions', type=int, default=20, help='sessions per thread')
+    arg_parser.add_argument('--steps', type=int, default=200, help='statements per session')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f'{"base size":>10} {"session":>10} {"copy":>12}')
+    for size in args.base_sizes:
+        layered, copied = creation_cost(size, args.create)
+        print(f'{size:10} {layered * 1e6:8.2f}us {copied * 1e6:10.2f}us')
+
+    cache = ParseCache()
+    failures = []
+    counts = [0] * args.threads
+    threads = [threading.Thread(target=stress, args=(i, args.sessions, args.steps, cache, args.seed, failures, counts))
+               for i in range(args.threads)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    start = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    elapsed = time.perf_counter() - start
+
+    if failures:
+        raise Exception(f"Sessions saw each other's variables: {failures[:5]}")
+    if DEFAULT_BASE.get('null').value != 0:
+        raise Exception('A session changed the base environment')
+    statements = sum(counts)
+    print(f'\n{args.threads} threads, {statements} statements checked in {elapsed:.2f}s '
+          f'({statements / elapsed:.0f}/s), no cross-talk; cache {cache.stats()}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from basiclang.bytecode import VM, BytecodeCompiler
+from basiclang.compiler import Compiler, UnboxedCompiler
+from basiclang.context import Context
+from basiclang.interpreter import Interpreter
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser
+from basiclang.rtresult import Number
+from benchmarks.generators import VAR_NAMES, guard_chain
+
+
+def tree(node, short_circuit: bool):
+    interpreter = Interpreter(short_circuit)
+    return lambda context: interpreter.visit(node, context)
+
+
+def bytecode(node, short_circuit: bool):
+    code = BytecodeCompiler(short_circuit).compile(node)
+    vm = VM()
+    return lambda context: vm.run(code, context)
+
+
+ENGINES = {
+    'tree': tree,
+    'closure': lambda node, short_circuit: Compiler(short_circuit).compile(node),
+    'unboxed': lambda node, short_circuit: UnboxedCompiler(short_circuit).compile(node),
+    'bytecode': bytecode,
+}
+
+
+def make_rows(count: int, false_ratio: float, seed: int = 0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        context = Context('<program>')
+        for name in VAR_NAMES:
+            context.symbol_table.set(name, Number(rng.randint(1, 99)))
+        context.symbol_table.set('x', Number(0 if rng.random() < false_ratio else rng.randint(1, 9)))
+        rows.append(context)
+    return rows
+
+
+def evaluate_rows(program, rows) -> int:
+    errors = 0
+    for context in rows:
+        if program(context).error:
+            errors += 1
+    return errors
+
+
+def best_of(func, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Eager vs short-circuit AND on guard chains')
+    arg_parser.add_argument('--terms', type=int, nargs='+', default=[2, 4, 8])
+    arg_parser.add_argument('--rows', type=int, default=5000)
+    arg_parser.add_argument('--false-ratio', type=float, default=0.9, help='share of rows failing the first guard')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    rows = make_rows(args.rows, args.false_ratio)
+    print(f'{"engine":10} {"terms":>5} {"eager":>12} {"short":>12} {"speedup":>8} {"eager errors":>13}')
+    for terms in args.terms:
+        tokens, error = RegexLexer('<bench>', guard_chain(terms)).get_tokens()
+        if error:
+            raise Exception(error.as_str())
+        res = Parser(tokens).parse()
+        if res.error:
+            raise Exception(res.error.as_str())
+
+        for name, build in ENGINES.items():
+            errors, eager = best_of(lambda: evaluate_rows(build(res.node, False), rows), args.repeat)
+            _, short = best_of(lambda: evaluate_rows(build(res.node, True), rows), args.repeat)
+            print(f'{name:10} {terms:5} {eager / args.rows * 1e6:10.2f}us {short / args.rows * 1e6:10.2f}us '
+                  f'{eager / short:7.1f}x {errors:13}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from basiclang.cache import ParseCache
+from basiclang.session import Session
+from benchmarks.generators import corpus
+
+# Moving a session between workers: replaying one VAR statement per variable
+# against Session.dumps/loads. Restore is timed on its own and together with
+# a first pass that reads every variable, which is when the values restored
+# lazily get boxed. The last column carries the session's parsed formulas
+# along with the variables.
+
+
+def make_values(count: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    values = {}
+    for i in range(count):
+        # Short reprs only: the lexer has no exponent syntax.
+        values[f'v{i}'] = rng.randint(-10 ** 6, 10 ** 6) if rng.random() < 0.7 else round(rng.uniform(0, 1000), 3)
+    return values
+
+
+def replay_script(values: dict):
+    return [f'VAR {name} = {value}' for name, value in values.items()]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Session snapshot and restore against replaying VAR statements')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    arg_parser.add_argument('--formulas', type=int, default=1000, help='cached trees for the snapshot with ASTs')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f'{"variables":>9} {"script":>10} {"replay":>10} {"snapshot":>10} {"dumps":>10} {"loads":>10} '
+          f'{"loads+read":>11} {"speedup":>8} {"with ASTs":>10}')
+    for size in args.sizes:
+        values = make_values(size, args.seed)
+        script = replay_script(values)
+        script_bytes = sum(len(line) + 1 for line in script)
+
+        def replay():
+            session = Session()
+            for line in script:
+                _, error = session.run('<replay>', line)
+                if error:
+                    raise Exception(error.as_str())
+            return session
+        replayed, replay_time = timed(replay)
+
+        data, dumps_time = timed(replayed.dumps)
+        restored, loads_time = timed(lambda: Session.loads(data))
+        _, read_time = timed(lambda: [restored.get(name) for name in values])
+        if restored.variables() != replayed.variables():
+            raise Exception('restored variables differ from the replayed ones')
+
+        cache = ParseCache()
+        for text in corpus(args.formulas, args.seed):
+            Session(cache=cache).run('<formula>', text)
+        with_asts = Session(cache=cache)
+        with_asts.update(values)
+        ast_data = with_asts.dumps(include_asts=True)
+        _, ast_loads_time = timed(lambda: Session.loads(ast_data))
+
+        print(f'{size:9} {script_bytes / 1e6:8.2f}MB {replay_time * 1e3:8.1f}ms {len(data) / 1e6:8.2f}MB '
+              f'{dumps_time * 1e3:8.1f}ms {loads_time * 1e3:8.1f}ms {(loads_time + read_time) * 1e3:9.1f}ms '
+              f'{replay_time / loads_time:7.0f}x {ast_loads_time * 1e3:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
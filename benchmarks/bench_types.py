@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import random
+import time
+
+from basiclang.bytecode import VM, BytecodeCompiler
+from basiclang.compiler import Compiler, UnboxedCompiler
+from basiclang.context import Context
+from basiclang.inference import TypeInference
+from basiclang.interpreter import Interpreter
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser
+from basiclang.rtresult import Number
+from benchmarks.generators import VAR_NAMES, corpus
+
+# Each engine with and without operators specialized by type inference, on
+# formulas over only ints, over only floats, and over the mixed corpus where
+# divisions leave part of every tree untyped. Formulas are parsed, inferred
+# and compiled once; the timed loop runs them over rows whose variables have
+# the types the guards were taken from. Checking the guards, which reusing
+# one inference across contexts needs before every run, is timed on its own.
+
+INT_OPS = ['+', '-', '*']
+
+
+def typed_formula(rng: random.Random, size: int, literal) -> str:
+    if size <= 1:
+        return rng.choice(VAR_NAMES) if rng.random() < 0.6 else literal(rng)
+    if size == 2 and rng.random() < 0.2:
+        return f'{rng.choice(VAR_NAMES)} ^ {rng.randint(0, 3)}'
+    left = rng.randint(1, size - 1)
+    text = f'{typed_formula(rng, left, literal)} {rng.choice(INT_OPS)} {typed_formula(rng, size - left, literal)}'
+    return f'({text})' if rng.random() < 0.3 else text
+
+
+def int_literal(rng: random.Random) -> str:
+    return str(rng.randint(1, 99))
+
+
+def float_literal(rng: random.Random) -> str:
+    return f'{rng.randint(1, 99)}.{rng.randint(0, 99)}'
+
+
+WORKLOADS = {
+    'int': (lambda count, seed: [typed_formula(random.Random(seed + i), 12, int_literal) for i in range(count)],
+            lambda rng: rng.randint(1, 99)),
+    'float': (lambda count, seed: [typed_formula(random.Random(seed + i), 12, float_literal) for i in range(count)],
+              lambda rng: rng.uniform(1, 99)),
+    'mixed': (lambda count, seed: corpus(count, seed, size=6), lambda rng: rng.randint(1, 99)),
+}
+
+
+def make_rows(count: int, value, seed: int = 0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        context = Context('<program>')
+        for name in VAR_NAMES:
+            context.symbol_table.set(name, Number(value(rng)))
+        rows.append(context)
+    return rows
+
+
+def parse(text: str):
+    tokens, error = RegexLexer('<bench>', text).get_tokens()
+    if error:
+        raise Exception(error.as_str())
+    res = Parser(tokens).parse()
+    if res.error:
+        raise Exception(res.error.as_str())
+    return res.node
+
+
+def runners(node, types):
+    # engine name -> a function of a context, built once per formula
+    tree = Interpreter(types=types)
+    closure = Compiler(types=types).compile(node)
+    unboxed = UnboxedCompiler(types=types).compile(node)
+    bytecode = BytecodeCompiler(types=types).compile(node)
+    vm = VM()
+    return {
+        'tree': lambda context: tree.visit(node, context),
+        'closure': closure,
+        'unboxed': unboxed,
+        'bytecode': lambda context: vm.run(bytecode, context),
+    }
+
+
+def evaluate_rows(formulas, rows, engine: str) -> list:
+    results = []
+    for context in rows:
+        for _, run in formulas:
+            res = run[engine](context)
+            results.append(None if res.error else res.value.value)
+    return results
+
+
+def check_rows(formulas, rows) -> None:
+    for context in rows:
+        for types, _ in formulas:
+            if not types.check(context):
+                raise Exception('guards failed on a benchmark row')
+
+
+def best_of(func, repeat: int) -> tuple:
+    best = result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Engines with and without type-specialized operators')
+    arg_parser.add_argument('--formulas', type=int, default=50)
+    arg_parser.add_argument('--rows', type=int, default=200)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    print(f'{"workload":8} {"engine":9} {"generic":>10} {"typed":>10} {"speedup":>8} {"guards":>10}')
+    for workload, (generate, value) in WORKLOADS.items():
+        rows = make_rows(args.rows, value, args.seed)
+        generic, typed = [], []
+        totals = {}
+        for text in generate(args.formulas, args.seed):
+            node = parse(text)
+            types = TypeInference().infer(node, rows[0].symbol_table)
+            for key, count in types.stats().items():
+                totals[key] = totals.get(key, 0) + count
+            generic.append((types, runners(node, None)))
+            typed.append((types, runners(node, types)))
+
+        evaluations = args.rows * args.formulas
+        guards, _ = best_of(lambda: check_rows(typed, rows), args.repeat)
+        for engine in generic[0][1]:
+            plain, expected = best_of(lambda: evaluate_rows(generic, rows, engine), args.repeat)
+            fast, got = best_of(lambda: evaluate_rows(typed, rows, engine), args.repeat)
+            if got != expected:
+                raise Exception(f'{workload}/{engine}: specialized results differ')
+            print(f'{workload:8} {engine:9} {plain / evaluations * 1e6:8.2f}us {fast / evaluations * 1e6:8.2f}us '
+                  f'{plain / fast:7.2f}x {guards / evaluations * 1e6:8.2f}us')
+        print(f'{"":8} nodes {totals}')
+
+
+if __name__ == '__main__':
+    main()
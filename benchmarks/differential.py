@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import itertools
+import random
+import sys
+from typing import Iterable, List
+
+from basiclang.basic import ENGINES, LEXERS, PARSERS, run_in_context
+from basiclang.context import Context
+from basiclang.rtresult import Number
+from benchmarks.generators import bindings, comparison_heavy, deep, flat, random_expression, variable_heavy
+
+REFERENCE = {'engine': 'tree', 'lexer': 'char', 'parser': 'recursive', 'optimize': False, 'specialize': False}
+
+
+def configurations() -> List[dict]:
+    configs = []
+    for engine, lexer, parser, optimize, specialize in itertools.product(ENGINES, LEXERS, PARSERS, (False, True),
+                                                                          (False, True)):
+        config = {'engine': engine, 'lexer': lexer, 'parser': parser, 'optimize': optimize, 'specialize': specialize}
+        if config != REFERENCE:
+            configs.append(config)
+    return configs
+
+
+def position(pos):
+    return None if pos is None else (pos.idx, pos.ln, pos.col)
+
+
+def outcome(text: str, values: dict, options: dict, short_circuit: bool) -> tuple:
+    context = Context('<program>')
+    context.symbol_table.set('null', Number(0))
+    for name, value in values.items():
+        context.symbol_table.set(name, Number(value))
+    try:
+        value, error = run_in_context(context, '<check>', text, short_circuit=short_circuit, **options)
+    except Exception as e:
+        return ('exception', type(e).__name__)
+    if error:
+        return ('error', error.error_name, error.details, position(error.pos_start), position(error.pos_end))
+    symbols = sorted((name, type(number.value).__name__, repr(number.value))
+                     for name, number in context.symbol_table.items())
+    return ('value', type(value.value).__name__, repr(value.value), symbols)
+
+
+def samples(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    texts = [random_expression(rng, rng.randint(0, 5)) for _ in range(count)]
+    texts += [flat(8, seed), deep(50, seed), variable_heavy(12, seed), comparison_heavy(6, seed)]
+    return texts
+
+
+def check(texts: Iterable[str], configs: List[dict], seed: int = 0, limit: int = 10) -> List[str]:
+    values = bindings(seed)
+    mismatches = []
+    for text in texts:
+        for short_circuit in (False, True):
+            expected = outcome(text, values, REFERENCE, short_circuit)
+            for options in configs:
+                got = outcome(text, values, options, short_circuit)
+                if got == expected:
+                    continue
+                # Folding may raise where the walker would; only values and
+                # RTErrors have to match after optimization.
+                if options['optimize'] and expected[0] == 'exception':
+                    continue
+                mismatches.append(f'{text!r} {options} short_circuit={short_circuit}: expected {expected}, got {got}')
+                if len(mismatches) >= limit:
+                    return mismatches
+    return mismatches
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Check every engine against the reference tree walker')
+    arg_parser.add_argument('--samples', type=int, default=500)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    args = arg_parser.parse_args()
+
+    configs = configurations()
+    texts = samples(args.samples, args.seed)
+    mismatches = check(texts, configs, args.seed)
+    for mismatch in mismatches:
+        print(mismatch)
+    print(f'{len(texts)} expressions x {len(configs)} configurations: {len(mismatches)} mismatches')
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import random
+from typing import List
+
+ARITH_OPS = ['+', '-', '*', '/']
+COMP_OPS = ['==', '!=', '<', '>', '<=', '>=']
+VAR_NAMES = ['a', 'b', 'c', 'x', 'y', 'rate', 'total', 'count']
+
+
+def number(rng: random.Random) -> str:
+    if rng.random() < 0.3:
+        return f'{rng.randint(1, 999)}.{rng.randint(0, 99)}'
+    return str(rng.randint(1, 9999))
+
+
+def operand(rng: random.Random, var_ratio: float = 0.5) -> str:
+    if rng.random() < var_ratio:
+        return rng.choice(VAR_NAMES)
+    return number(rng)
+
+
+def formula(rng: random.Random, size: int = 8) -> str:
+    if size <= 1:
+        return operand(rng)
+    if size == 2 and rng.random() < 0.1:
+        return f'{operand(rng)} ^ {rng.randint(0, 3)}'
+    left = rng.randint(1, size - 1)
+    op = rng.choice(ARITH_OPS)
+    text = f'{formula(rng, left)} {op} {formula(rng, size - left)}'
+    return f'({text})' if rng.random() < 0.3 else text
+
+
+def corpus(count: int, seed: int = 0, size: int = 8) -> List[str]:
+    rng = random.Random(seed)
+    return [formula(rng, rng.randint(1, size * 2)) for _ in range(count)]
+
+
+def flat(terms: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = [operand(rng, var_ratio=0.0)]
+    for _ in range(terms - 1):
+        parts.append(rng.choice(['+', '-', '*']))
+        parts.append(operand(rng, var_ratio=0.0))
+    return ' '.join(parts)
+
+
+def nested_parens(depth: int) -> str:
+    return '(' * depth + '1' + ')' * depth
+
+
+def nested_right(depth: int) -> str:
+    return '1 + (' * depth + '1' + ')' * depth
+
+
+def negation_chain(depth: int) -> str:
+    return '- ' * depth + '1'
+
+
+def not_chain(depth: int) -> str:
+    return 'NOT ' * depth + '1'
+
+
+def guard_chain(terms: int, seed: int = 0, size: int = 8) -> str:
+    rng = random.Random(seed)
+    guards = ['x != 0']
+    for _ in range(terms - 1):
+        guards.append(f'({formula(rng, size)}) / x {rng.choice(COMP_OPS)} {number(rng)}')
+    return ' AND '.join(guards)
+
+
+def grouped(terms: int, seed: int = 0, size: int = 4) -> str:
+    rng = random.Random(seed)
+    return ' + '.join(f'({formula(rng, size)})' for _ in range(terms))
+
+
+def repeated(terms: int, seed: int = 0, distinct: int = 3, size: int = 6) -> str:
+    rng = random.Random(seed)
+    pool = [formula(rng, size) for _ in range(distinct)]
+    guards = []
+    for _ in range(terms):
+        guards.append(f'({rng.choice(pool)}) {rng.choice(COMP_OPS)} {number(rng)}')
+    return ' AND '.join(guards)
+
+
+def deep(depth: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    for _ in range(depth):
+        parts.append(f'{operand(rng, var_ratio=0.0)} {rng.choice(["+", "-", "*"])} (')
+    return ''.join(parts) + operand(rng, var_ratio=0.0) + ')' * depth
+
+
+def variable_heavy(terms: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = [rng.choice(VAR_NAMES)]
+    for _ in range(terms - 1):
+        parts.append(rng.choice(ARITH_OPS))
+        parts.append(rng.choice(VAR_NAMES))
+    return f'VAR {rng.choice(VAR_NAMES)} = ' + ' '.join(parts)
+
+
+def comparison_heavy(terms: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    parts = []
+    for i in range(terms):
+        if i:
+            parts.append(rng.choice(['AND', 'OR']))
+        comparison = f'{operand(rng)} {rng.choice(COMP_OPS)} {operand(rng)}'
+        parts.append(f'NOT {comparison}' if rng.random() < 0.2 else comparison)
+    return ' '.join(parts)
+
+
+def bindings(seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {name: rng.choice([rng.randint(1, 99), rng.randint(1, 999) / 8]) for name in VAR_NAMES}
+
+
+def random_expression(rng: random.Random, depth: int = 4) -> str:
+    choice = rng.random()
+    if depth <= 0 or choice < 0.25:
+        return rng.choice([str(rng.randint(0, 5)), '0.5', '2.0', '0.0', rng.choice(VAR_NAMES), 'missing'])
+    if choice < 0.6:
+        op = rng.choice(ARITH_OPS + COMP_OPS + ['AND', 'OR'])
+        return f'{random_expression(rng, depth - 1)} {op} {random_expression(rng, depth - 1)}'
+    if choice < 0.65:
+        return f'({random_expression(rng, depth - 1)}) ^ {rng.randint(0, 3)}'
+    if choice < 0.75:
+        return rng.choice(['-', '+', 'NOT ']) + random_expression(rng, depth - 1)
+    if choice < 0.9:
+        return f'({random_expression(rng, depth - 1)})'
+    if choice < 0.95:
+        return f'(VAR {rng.choice(VAR_NAMES)} = {random_expression(rng, depth - 1)})'
+    return rng.choice(['(', ')', '1 +', 'VAR', 'VAR 1 = 2', '!', '$', '1 2'])
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from typing import List
+
+from benchmarks.generators import VAR_NAMES, corpus
+
+# Load generator for basiclang.server. Every connection is one session that
+# keeps up to --pipeline requests in flight; latency is measured per request
+# from the moment it is written until its response line arrives. With
+# --spawn the server is started as a subprocess on a free port (extra
+# server arguments follow '--').
+
+
+def make_requests(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    texts = [f'VAR {name} = {rng.randint(1, 99)}' for name in VAR_NAMES]
+    texts += corpus(max(count - len(texts), 0), seed)
+    return texts[:count]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def session(reader, writer, texts: List[str], pipeline: int, latencies: List[float], errors: List[int]):
+    sent = {}
+    window = asyncio.Semaphore(pipeline)
+
+    async def send() -> None:
+        for request_id, text in enumerate(texts):
+            await window.acquire()
+            sent[request_id] = time.perf_counter()
+            writer.write(json.dumps({'id': request_id, 'text': text}).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    sender = asyncio.ensure_future(send())
+    for _ in texts:
+        line = await reader.readline()
+        if not line:
+            raise ConnectionError('server closed the connection')
+        response = json.loads(line)
+        latencies.append(time.perf_counter() - sent.pop(response['id']))
+        if 'error' in response:
+            errors[0] += 1
+        window.release()
+    await sender
+    writer.close()
+    await writer.wait_closed()
+
+
+async def connect(args):
+    if args.unix:
+        return await asyncio.open_unix_connection(args.unix)
+    return await asyncio.open_connection(args.host, args.port)
+
+
+async def generate(args) -> None:
+    texts = make_requests(args.requests, args.seed)
+    connections = [await connect(args) for _ in range(args.connections)]
+    latencies = []
+    errors = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(session(reader, writer, texts, args.pipeline, latencies, errors)
+                           for reader, writer in connections))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f'{args.connections} connections x {len(texts)} requests, pipeline {args.pipeline}')
+    print(f'throughput {total / elapsed:10.0f} requests/s ({total} in {elapsed:.2f}s, {errors[0]} errors)')
+    print(f'latency p50 {percentile(latencies, 0.50) * 1e3:8.2f}ms  p99 {percentile(latencies, 0.99) * 1e3:8.2f}ms'
+          f'  max {latencies[-1] * 1e3:8.2f}ms')
+
+
+def spawn(extra: List[str]):
+    process = subprocess.Popen([sys.executable, '-m', 'basiclang.server', '--port', '0'] + extra,
+                               stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('listening on '):
+        process.kill()
+        raise Exception(f'server did not start: {line!r}')
+    return process, line.split(maxsplit=2)[-1].strip()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Load generator for the JSON-lines evaluation server')
+    arg_parser.add_argument('--host', default='127.0.0.1')
+    arg_parser.add_argument('--port', type=int, default=8765)
+    arg_parser.add_argument('--unix', help='connect to this Unix socket path instead of TCP')
+    arg_parser.add_argument('--connections', type=int, default=8)
+    arg_parser.add_argument('--requests', type=int, default=2000, help='requests per connection')
+    arg_parser.add_argument('--pipeline', type=int, default=16, help='requests in flight per connection')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--spawn', action='store_true', help='start a server subprocess for the run')
+    arg_parser.add_argument('server_args', nargs=argparse.REMAINDER, help='-- arguments for the spawned server')
+    args = arg_parser.parse_args()
+
+    process = None
+    if args.spawn:
+        extra = args.server_args[1:] if args.server_args[:1] == ['--'] else args.server_args
+        process, address = spawn(extra)
+        if '--unix' in extra:
+            args.unix = address
+        else:
+            args.unix = None
+            args.host, port = address.rsplit(':', 1)
+            args.port = int(port)
+    try:
+        asyncio.run(generate(args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from basiclang import __version__
+from basiclang.basic import run_in_context
+from basiclang.context import Context
+from basiclang.interpreter import Interpreter
+from basiclang.lexer import Lexer
+from basiclang.parser import Parser
+from basiclang.rtresult import Number
+from benchmarks import differential
+from benchmarks.generators import bindings, comparison_heavy, deep, flat, variable_heavy
+
+# Every workload is a deterministic list of expressions; each stage runs over
+# the whole list and one "op" is one expression. Timings are the best of
+# --repeat runs; peak memory comes from a separate run under tracemalloc, so
+# tracing does not slow down the timed runs.
+
+WORKLOADS = {
+    'flat': lambda seed: flat(40, seed),
+    'deep': lambda seed: deep(40, seed),
+    'variables': lambda seed: variable_heavy(40, seed),
+    'comparisons': lambda seed: comparison_heavy(12, seed),
+}
+
+STAGES = ('lex', 'parse', 'interpret', 'run')
+
+
+def make_context(values: dict) -> Context:
+    context = Context('<program>')
+    context.symbol_table.set('null', Number(0))
+    for name, value in values.items():
+        context.symbol_table.set(name, Number(value))
+    return context
+
+
+def lex_all(texts: List[str]) -> List:
+    token_lists = []
+    for text in texts:
+        tokens, error = Lexer('<bench>', text).get_tokens()
+        if error:
+            raise Exception(error.as_str())
+        token_lists.append(tokens)
+    return token_lists
+
+
+def parse_all(token_lists: List) -> List:
+    nodes = []
+    for tokens in token_lists:
+        res = Parser(tokens).parse()
+        if res.error:
+            raise Exception(res.error.as_str())
+        nodes.append(res.node)
+    return nodes
+
+
+def interpret_all(nodes: List, context: Context) -> None:
+    interpreter = Interpreter()
+    for node in nodes:
+        res = interpreter.visit(node, context)
+        if res.error:
+            raise Exception(res.error.as_string())
+
+
+def run_all(texts: List[str], context: Context) -> None:
+    for text in texts:
+        _, error = run_in_context(context, '<bench>', text)
+        if error:
+            raise Exception(error.as_str())
+
+
+def measure(func: Callable[[], object], count: int, repeat: int) -> dict:
+    best = None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_sec': count / best, 'seconds': best, 'peak_bytes': peak, 'ops': count}
+
+
+def benchmark(count: int, repeat: int, seed: int) -> Dict[str, dict]:
+    values = bindings(seed)
+    results = {}
+    for workload, generate in WORKLOADS.items():
+        texts = [generate(seed + i) for i in range(count)]
+        token_lists = lex_all(texts)
+        nodes = parse_all(token_lists)
+        stages = {
+            'lex': lambda: lex_all(texts),
+            'parse': lambda: parse_all(token_lists),
+            'interpret': lambda: interpret_all(nodes, make_context(values)),
+            'run': lambda: run_all(texts, make_context(values)),
+        }
+        for stage in STAGES:
+            results[f'{workload}/{stage}'] = measure(stages[stage], count, repeat)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    regressions = []
+    print(f'{"benchmark":24} {"baseline":>12} {"current":>12} {"change":>8}')
+    for key, base in baseline.items():
+        current = results.get(key)
+        if current is None:
+            continue
+        change = current['ops_per_sec'] / base['ops_per_sec'] - 1
+        flag = ''
+        if change < -threshold:
+            flag = '  REGRESSION'
+            regressions.append(key)
+        print(f'{key:24} {base["ops_per_sec"]:12.0f} {current["ops_per_sec"]:12.0f} {change:+7.1%}{flag}')
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Lexer, parser and interpreter benchmark suite')
+    arg_parser.add_argument('--count', type=int, default=500, help='expressions per workload')
+    arg_parser.add_argument('--repeat', type=int, default=5)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--output', help='write results as JSON')
+    arg_parser.add_argument('--baseline', help='JSON results to compare against')
+    arg_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='fail when ops/sec drops by more than this fraction of the baseline')
+    arg_parser.add_argument('--check-samples', type=int, default=200,
+                            help='random expressions for the engine differential check (0 to skip)')
+    args = arg_parser.parse_args()
+
+    failed = False
+    if args.check_samples:
+        configs = differential.configurations()
+        texts = differential.samples(args.check_samples, args.seed)
+        mismatches = differential.check(texts, configs, args.seed)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f'differential check: {len(texts)} expressions x {len(configs)} configurations, '
+              f'{len(mismatches)} mismatches')
+        failed = bool(mismatches)
+
+    results = benchmark(args.count, args.repeat, args.seed)
+    print(f'{"benchmark":24} {"ops/sec":>12} {"peak memory":>14}')
+    for key, result in results.items():
+        print(f'{key:24} {result["ops_per_sec"]:12.0f} {result["peak_bytes"] / 1024:12.1f}KB')
+
+    if args.output:
+        report = {
+            'meta': {
+                'basiclang': __version__,
+                'python': platform.python_version(),
+                'implementation': platform.python_implementation(),
+                'platform': platform.platform(),
+                'count': args.count,
+                'repeat': args.repeat,
+                'seed': args.seed,
+            },
+            'results': results,
+        }
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'{len(regressions)} benchmarks regressed by more than {args.threshold:.0%}')
+            failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
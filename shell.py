@@ -1,9 +1,32 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import sys
+
 import basiclang.basic
+import basiclang.script
+
+
+def run_file(path: str, keep_going: bool) -> int:
+    failed = False
+    lines = basiclang.script.read_lines(path)
+    for _, value, error in basiclang.script.run_lines(path, lines, stop_on_error=not keep_going):
+        if error:
+            print(error.as_str())
+            failed = True
+    return 1 if failed else 0
+
 
 if __name__ == '__main__':
+    arg_parser = argparse.ArgumentParser(description='BASIC interpreter')
+    arg_parser.add_argument('file', nargs='?', help='script with one statement per line')
+    arg_parser.add_argument('--keep-going', action='store_true', help='report every error instead of stopping at the first')
+    args = arg_parser.parse_args()
+
+    if args.file:
+        sys.exit(run_file(args.file, args.keep_going))
+
     while True:
         text = input("basic > ")
         ast, error = basiclang.basic.run('<stdin>', text)
@@ -11,4 +34,4 @@ if __name__ == '__main__':
         if error:
             print(error.as_str())
         else:
-            print(ast)
\ No newline at end of file
+            print(ast)
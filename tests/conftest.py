@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.context import Context
+from basiclang.rtresult import Number
+
+
+def context_with(**values) -> Context:
+    context = Context('<test>')
+    for name, value in values.items():
+        context.symbol_table.set(name, Number(value))
+    return context
+
+
+@pytest.fixture
+def make_context():
+    # A Context holding the given variables as Numbers.
+    return context_with
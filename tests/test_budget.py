@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.basic import parse, run_in_context
+from basiclang.budget import Budget, MeteredInterpreter
+from basiclang.context import Context
+from basiclang.error import BudgetError
+
+
+class Clock:
+    def __init__(self, tick: float) -> None:
+        self.now = 0.0
+        self.tick = tick
+
+    def __call__(self) -> float:
+        self.now += self.tick
+        return self.now
+
+
+def run(text: str, budget: Budget):
+    return run_in_context(Context('<t>'), '<t>', text, budget=budget)
+
+
+def test_step_budget():
+    # 1 + 2 * 3 visits five nodes.
+    value, error = run('1 + 2 * 3', Budget(max_steps=5))
+    assert error is None and value.value == 7
+    value, error = run('1 + 2 * 3', Budget(max_steps=4))
+    assert isinstance(error, BudgetError) and 'Step budget of 4' in error.as_str()
+
+
+def test_bit_budget_stops_huge_results_before_computing_them():
+    value, error = run('2 ^ 64', Budget(max_bits=100))
+    assert error is None and value.value == 2 ** 64
+    value, error = run('10 ^ 1000000000', Budget(max_bits=100))
+    assert isinstance(error, BudgetError)
+    value, error = run('(2 ^ 60) * (2 ^ 60)', Budget(max_bits=100))
+    assert isinstance(error, BudgetError)
+
+
+def test_deadline():
+    node, error = parse('<t>', '1 + 2 + 3 + 4')
+    # Every clock read is a second later; the run starts at 1s and expires at 3.5s.
+    res = MeteredInterpreter(Budget(deadline=2.5), clock=Clock(1.0)).run(node, Context('<t>'))
+    assert isinstance(res.error, BudgetError) and 'Deadline of 2.5s' in res.error.as_str()
+    res = MeteredInterpreter(Budget(deadline=100), clock=Clock(1.0)).run(node, Context('<t>'))
+    assert res.error is None and res.value.value == 10
+
+
+def test_budget_needs_the_tree_engine():
+    with pytest.raises(ValueError):
+        run_in_context(Context('<t>'), '<t>', '1', engine='closure', budget=Budget(max_steps=10))
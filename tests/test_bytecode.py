@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.basic import parse
+from basiclang.bytecode import VM, Bytecode, BytecodeCompiler
+from basiclang.context import Context
+from basiclang.rtresult import Number
+
+
+def run(bytecode: Bytecode, **values):
+    context = Context('<t>')
+    for name, value in values.items():
+        context.symbol_table.set(name, Number(value))
+    return VM().run(bytecode, context), context
+
+
+@pytest.mark.parametrize('short_circuit', [False, True])
+def test_dumps_loads_round_trip(short_circuit):
+    node, _ = parse('<t>', 'VAR y = (x * 2.5 - 3) ^ 2 + 10 ^ 30 AND NOT x == 1', ln=4)
+    bytecode = BytecodeCompiler(short_circuit).compile(node)
+    loaded = Bytecode.loads(bytecode.dumps())
+    assert loaded.names == bytecode.names and list(loaded.code) == list(bytecode.code)
+
+    for x in (0, 1, 4):
+        (expected, _), (got, context) = run(bytecode, x=x), run(loaded, x=x)
+        assert got.error is None and got.value.value == expected.value.value
+        assert context.symbol_table.get('y').value == expected.value.value
+
+
+def test_loaded_errors_keep_their_positions():
+    node, _ = parse('<t>', '1 + 2 / (x - x)', ln=2)
+    loaded = Bytecode.loads(BytecodeCompiler().compile(node).dumps())
+    res, _ = run(loaded, x=3)
+    assert res.error.details == 'Division by zero'
+    assert (res.error.pos_start.idx, res.error.pos_end.idx, res.error.pos_start.ln) == (9, 14, 2)
+    assert 'line 3' in res.error.as_str()
+
+
+def test_loads_rejects_other_data():
+    with pytest.raises(ValueError):
+        Bytecode.loads(b'not bytecode')
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang import basic
+from basiclang.basic import COMPILERS, run_in_context
+from basiclang.cache import ParseCache
+from basiclang.incremental import Document
+
+
+@pytest.mark.parametrize('engine', sorted(COMPILERS))
+def test_compiled_program_is_built_once_per_tree(engine, monkeypatch, make_context):
+    builds = []
+    compile_ = COMPILERS[engine]
+    monkeypatch.setitem(COMPILERS, engine, lambda *args: builds.append(args) or compile_(*args))
+
+    cache = ParseCache()
+    for x in range(5):
+        value, error = run_in_context(make_context(x=x), '<t>', 'x * 2 + 1', engine=engine, cache=cache)
+        assert error is None and value.value == x * 2 + 1
+    assert len(builds) == 1
+
+    # Other options compile their own program.
+    run_in_context(make_context(x=1), '<t>', 'x * 2 + 1', engine=engine, cache=cache, short_circuit=True)
+    assert len(builds) == 2
+
+
+def test_compiled_program_reports_errors_of_each_run(make_context):
+    cache = ParseCache()
+    for engine in COMPILERS:
+        _, error = run_in_context(make_context(x=0), '<t>', '1 / x', engine=engine, cache=cache)
+        assert error.details == 'Division by zero'
+        value, error = run_in_context(make_context(x=4), '<t>', '1 / x', engine=engine, cache=cache)
+        assert error is None and value.value == 0.25
+
+
+def test_compiled_programs_follow_their_tree():
+    cache = ParseCache(max_entries=1)
+    node, _ = basic.parse('<t>', '1 + 2', cache=cache)
+    cache.put_compiled('<t>', '1 + 2', node, 'key', 'program')
+    assert cache.get_compiled('<t>', '1 + 2', node, 'key') == 'program'
+
+    # A new tree for the same text, or an evicted entry, drops the program.
+    other, _ = basic.parse('<t>', '1 + 2')
+    cache.put('<t>', '1 + 2', other)
+    assert cache.get_compiled('<t>', '1 + 2', node, 'key') is None
+    assert cache.get_compiled('<t>', '1 + 2', other, 'key') is None
+    cache.put_compiled('<t>', '1 + 2', other, 'key', 'program')
+    cache.put('<t>', '3', node)
+    assert cache.get_compiled('<t>', '1 + 2', other, 'key') is None
+    assert cache.compiled == {}
+
+
+def test_max_bytes_counts_utf8_bytes():
+    cache = ParseCache(max_entries=None, max_bytes=10)
+    cache.put('<t>', '"\u00e9\u00e9\u00e9"', 'first')
+    assert cache.stats()['bytes'] == 8
+    cache.put('<t>', '"\u00fc"', 'second')
+    assert cache.stats()['bytes'] == 4 and cache.stats()['evictions'] == 1
+    cache.put('<t>', '\u00e9' * 6, 'too big')
+    assert len(cache) == 1
+
+
+def test_document_trees_are_not_cached():
+    doc = Document('<t>', '(1 + 2) * x')
+    cache = ParseCache()
+    with pytest.raises(ValueError):
+        cache.put('<t>', doc.text, doc.node)
+
+    snapshot = doc.snapshot()
+    cache.put('<t>', doc.text, snapshot)
+    doc.edit(1, 1, '30')
+    assert cache.get('<t>', '(1 + 2) * x') is snapshot
+    assert (snapshot.left_node.left_node.tok.value, snapshot.pos_end.idx) == (1, 11)
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.basic import ENGINES, run_in_context
+from basiclang.context import Context
+from basiclang.rtresult import Number
+from benchmarks.differential import check, configurations, samples
+
+
+def test_every_configuration_agrees_with_the_tree_walker():
+    assert check(samples(30, seed=1), configurations(), seed=1) == []
+
+
+def run(text: str, **options):
+    context = Context('<t>')
+    context.symbol_table.set('x', Number(0))
+    return run_in_context(context, '<t>', text, **options)
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_short_circuit_skips_the_division(engine):
+    text = 'x != 0 AND 1 / x > 0 OR x == 0'
+    value, error = run(text, engine=engine, short_circuit=True)
+    assert error is None and value.value == 1
+    value, error = run(text, engine=engine)
+    assert error.details == 'Division by zero'
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_optimizer_keeps_the_division_by_zero_position(engine):
+    text = 'x + 2 / (3 - 3)'
+    _, expected = run(text)
+    _, error = run(text, engine=engine, optimize=True)
+    assert error.details == expected.details == 'Division by zero'
+    assert (error.pos_start.idx, error.pos_end.idx) == (expected.pos_start.idx, expected.pos_end.idx) == (9, 14)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import random
+
+import pytest
+
+from basiclang import incremental
+from basiclang.incremental import CHILD_FIELDS, Document
+from basiclang.lexer import RegexLexer
+from basiclang.parser import Parser
+from benchmarks.generators import grouped
+
+PIECES = ['1', '23', 'x', 'abc', ' ', '+', '-', '*', '/', '(', ')', ' + 1', 'VAR ', '=', '==', '!', '!=', '<', '>=',
+          ' AND ', 'NOT ', '$']
+REPLACEMENTS = ['7', '123', 'x', 'count', '+', '-', '*', '/', '<', '>=', 'AND', 'OR', '(a)', '(1 + b)']
+INSERTIONS = [' + 1', '* 2', ' - (x * 3)', ' ', '9']
+
+
+def full_parse(text: str):
+    tokens, error = RegexLexer('<t>', text).get_tokens()
+    if error:
+        return None, error, None
+    res = Parser(tokens).parse()
+    return (None if res.error else res.node), res.error, tokens
+
+
+def shape(node):
+    if node is None:
+        return None
+    out = [type(node).__name__, node.pos_start.idx, node.pos_end.idx]
+    for attr in ('tok', 'op_tok', 'var_name_tok'):
+        tok = getattr(node, attr, None)
+        if tok is not None:
+            out.append((tok.type, tok.value, tok.pos_start.idx, tok.pos_end.idx))
+    for attr in CHILD_FIELDS.get(type(node), ()):
+        out.append(shape(getattr(node, attr)))
+    return out
+
+
+def error_key(error):
+    return None if error is None else (error.as_str(), error.pos_start.idx, error.pos_end.idx)
+
+
+def token_keys(tokens):
+    return [(tok.type, tok.value, tok.pos_start.idx, tok.pos_end.idx) for tok in tokens]
+
+
+def random_edit(rng: random.Random, doc: Document, text: str):
+    tokens = doc.tokens
+    kind = rng.random()
+    if tokens is None or len(tokens) < 2 or kind < 0.3:
+        offset = rng.randint(0, len(text))
+        removed = rng.randint(0, min(3, len(text) - offset))
+        return offset, removed, ''.join(rng.choice(PIECES) for _ in range(rng.randint(0, 2)))
+    tok = rng.choice(tokens[:-1])
+    start, end = tok.pos_start.idx, tok.pos_end.idx
+    if kind < 0.6:
+        return start, end - start, rng.choice(REPLACEMENTS)
+    if kind < 0.8:
+        return rng.choice((start, end)), 0, rng.choice(INSERTIONS)
+    return start, end - start, ''
+
+
+def check(doc: Document, text: str, node, error) -> None:
+    expected_node, expected_error, expected_tokens = full_parse(text)
+    assert doc.text == text
+    assert error_key(error) == error_key(expected_error)
+    assert shape(node) == shape(expected_node)
+    if expected_tokens is not None:
+        assert token_keys(doc.tokens) == token_keys(expected_tokens)
+
+
+@pytest.mark.parametrize('chunk_size', [4, 32, 256])
+def test_edits_match_a_full_parse(chunk_size, monkeypatch):
+    monkeypatch.setattr(incremental, 'CHUNK_SIZE', chunk_size)
+    rng = random.Random(chunk_size)
+    for _ in range(20):
+        text = grouped(rng.randint(1, 20), rng.randint(0, 99))
+        doc = Document('<t>', text)
+        for _ in range(40):
+            offset, removed, inserted = random_edit(rng, doc, text)
+            new_text = text[:offset] + inserted + text[offset + removed:]
+            try:
+                full_parse(new_text)
+            except ValueError:
+                # The lexer rejects a lone '.' by raising; not an edit case.
+                continue
+            old = text[offset:offset + removed]
+            text = new_text
+            node, error = doc.edit(offset, removed, inserted)
+            check(doc, text, node, error)
+            if error is not None and rng.random() < 0.9:
+                # Undo most broken edits so that the incremental paths, which
+                # need a valid tree, keep getting exercised.
+                text = text[:offset] + old + text[offset + len(inserted):]
+                node, error = doc.edit(offset, len(inserted), old)
+                check(doc, text, node, error)
+
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang import basic
+from basiclang.basic import ENGINES, parse, run_in_context
+from basiclang.cache import ParseCache
+from basiclang.inference import TypeInference
+
+
+def test_guards_follow_the_variables_read_before_any_assignment(make_context):
+    node, _ = parse('<t>', 'VAR y = x * 2 + y')
+    types = TypeInference().infer(node, make_context(x=1, y=2.5).symbol_table)
+    assert types.guards == {'x': int, 'y': float}
+    assert types.check(make_context(x=7, y=0.5))
+    assert not types.check(make_context(x=7.0, y=0.5))
+    assert not types.check(make_context(y=0.5))
+
+
+class CountingInference(TypeInference):
+    calls = 0
+
+    def infer(self, node, symbol_table=None):
+        CountingInference.calls += 1
+        return super().infer(node, symbol_table)
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_types_are_inferred_again_only_when_guards_fail(engine, monkeypatch, make_context):
+    CountingInference.calls = 0
+    monkeypatch.setattr(basic, 'TypeInference', CountingInference)
+    cache = ParseCache()
+    text = 'x * 3 + (y - 1) ^ 2'
+    for x, y in [(1, 2), (5, 7), (2.5, 2), (0.5, 3), (4, 1)]:
+        value, error = run_in_context(make_context(x=x, y=y), '<t>', text, engine=engine, cache=cache,
+                                      specialize=True)
+        assert error is None and value.value == x * 3 + (y - 1) ** 2
+        assert type(value.value) is type(x)
+    # int, int -> float, int -> int again.
+    assert CountingInference.calls == 3
+
+
+def test_specialized_budget_runs_reuse_types(monkeypatch, make_context):
+    CountingInference.calls = 0
+    monkeypatch.setattr(basic, 'TypeInference', CountingInference)
+    cache = ParseCache()
+    for x in range(3):
+        value, error = run_in_context(make_context(x=x), '<t>', 'x * x', cache=cache, specialize=True,
+                                      budget=basic.Budget(max_steps=10))
+        assert error is None and value.value == x * x
+    assert CountingInference.calls == 1
+
+
+def test_specializing_without_a_cache_infers_every_run(monkeypatch, make_context):
+    CountingInference.calls = 0
+    monkeypatch.setattr(basic, 'TypeInference', CountingInference)
+    for x in (1, 2.5):
+        value, error = run_in_context(make_context(x=x), '<t>', 'x + 1', engine='closure', specialize=True)
+        assert error is None and value.value == x + 1
+    assert CountingInference.calls == 2
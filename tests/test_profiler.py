@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.profiler import profile_text
+
+
+def test_profile_counts_every_repeat():
+    profiler, value, error = profile_text('<t>', '1 + 2 * 3', repeat=3)
+    assert error is None and value.value == 7
+    assert profiler.labels['BinOpNode[PLUS]'][0] == 3
+
+
+@pytest.mark.parametrize('repeat', [0, -1])
+def test_profile_needs_a_run(repeat):
+    with pytest.raises(ValueError):
+        profile_text('<t>', '1 + 2', repeat=repeat)
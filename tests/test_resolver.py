@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.basic import COMPILERS, parse
+from basiclang.context import Context, SymbolTable
+from basiclang.rtresult import Number
+from basiclang.session import FrozenSymbolTable, Session
+
+
+@pytest.mark.parametrize('engine', sorted(COMPILERS))
+def test_compiled_program_reads_through_parents_and_writes_its_own_table(engine):
+    node, _ = parse('<t>', 'VAR y = x + fresh' + engine)
+    program = COMPILERS[engine](node)
+    parent = SymbolTable()
+    parent.set('x', Number(40))
+    for value in (2, 3):
+        context = Context('<t>')
+        context.symbol_table.parent = parent
+        context.symbol_table.set('fresh' + engine, Number(value))
+        res = program(context)
+        assert res.error is None and res.value.value == 40 + value
+        assert context.symbol_table.get('y').value == 40 + value
+        assert parent.get('y') is None
+
+    res = program(Context('<t>'))
+    assert res.error.details == "'x' is not defined"
+
+
+def test_symbol_table_items_and_remove():
+    table = SymbolTable()
+    table.set('a', Number(1))
+    table.set('b', Number(2))
+    table.remove('a')
+    assert [(name, number.value) for name, number in table.items()] == [('b', 2)]
+    with pytest.raises(KeyError):
+        table.remove('a')
+    table.clear()
+    assert table.items() == [] and table.get('b') is None
+
+
+def test_tables_hold_only_their_own_names():
+    base = FrozenSymbolTable({'null': 0})
+    session = Session(base)
+    for i in range(1000):
+        assert session.get(f'missing{i}') is None
+    assert base.symbols == {}
+
+    session.run('<t>', 'VAR fresh = 0')
+    assert session.context.symbol_table.symbols == {'fresh': session.context.symbol_table.get('fresh')}
+    assert session.get('fresh') == 0
+
+
+@pytest.mark.parametrize('engine', sorted(COMPILERS))
+def test_zero_valued_variables_shadow_the_parent(engine):
+    node, _ = parse('<t>', 'x + 1')
+    parent = SymbolTable()
+    parent.set('x', Number(41))
+    context = Context('<t>')
+    context.symbol_table.parent = parent
+    context.symbol_table.set('x', Number(0))
+    res = COMPILERS[engine](node)(context)
+    assert res.error is None and res.value.value == 1
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+from basiclang.basic import run_many
+
+
+@pytest.mark.parametrize('options', [{'engine': 'nope'}, {'lexer': 'nope'}, {'parser': 'nope'},
+                                     {'engine': 'closure', 'budget': object()}, {'workers': 0}, {'chunksize': 0}])
+def test_arguments_are_checked_on_call(options):
+    with pytest.raises(ValueError):
+        run_many([('<t>', '1')], **options)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_results_match_items(ordered):
+    items = [('<t>', 'x * 2', {'x': i}) for i in range(10)] + [('<t>', '1 / 0')]
+    results = list(run_many(items, workers=2, chunksize=3, ordered=ordered))
+    if not ordered:
+        results = [(value, error) for _, value, error in sorted(results, key=lambda result: result[0])]
+    assert [value.value for value, _ in results[:10]] == [i * 2 for i in range(10)]
+    assert results[10][0] is None and results[10][1].details == 'Division by zero'
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_items_are_read_a_bounded_window_ahead(ordered):
+    consumed = [0]
+
+    def items():
+        for i in range(2000):
+            consumed[0] += 1
+            yield '<t>', str(i)
+
+    results = run_many(items(), workers=2, chunksize=10, ordered=ordered)
+    next(results)
+    # Four chunks in flight, plus the one read when the first came back.
+    assert consumed[0] <= 50
+    assert len(list(results)) == 1999
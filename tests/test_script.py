@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from basiclang.context import Context
+from basiclang.script import run_lines, split_lines
+
+
+def test_run_lines_reports_file_line_numbers():
+    text = 'VAR a = 1\n\n   \nVAR b = a + 1\r\nb * 10\nc\nb\n'
+    results = list(run_lines('<t>', split_lines(text), Context('<t>'), stop_on_error=False))
+    assert [(ln, value and value.value) for ln, value, _ in results] == [(0, 1), (3, 2), (4, 20), (5, None), (6, 2)]
+    error = results[3][2]
+    assert error.pos_start.ln == 5 and 'line 6' in error.as_str()
+
+
+def test_run_lines_stops_on_the_first_error():
+    results = list(run_lines('<t>', split_lines('1\n2 +\n3\n'), Context('<t>')))
+    assert [ln for ln, _, _ in results] == [0, 1] and results[1][2] is not None
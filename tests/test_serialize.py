@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import marshal
+import os
+import zlib
+
+import pytest
+
+from basiclang.basic import parse
+from basiclang.diskcache import DiskCache
+from basiclang.optimizer import Optimizer
+from basiclang.serialize import AST_MAGIC, dumps_many, loads_many, pack_ints
+from benchmarks.generators import corpus
+
+
+def shape(node):
+    out = [type(node).__name__, node.pos_start.idx, node.pos_end.idx, node.pos_start.fn, node.pos_end.ln]
+    for attr in ('tok', 'op_tok', 'var_name_tok'):
+        tok = getattr(node, attr, None)
+        if tok is not None:
+            out.append((tok.type, tok.value, tok.pos_start and tok.pos_start.idx, tok.pos_end and tok.pos_end.idx))
+    for attr in ('left_node', 'right_node', 'node', 'value_node'):
+        child = getattr(node, attr, None)
+        if child is not None:
+            out.append(shape(child))
+    return out
+
+
+def parse_all(texts):
+    nodes = []
+    for text in texts:
+        node, error = parse('<t>', text, 'regex', None, 'pratt')
+        assert error is None
+        nodes.append(node)
+    return nodes
+
+
+def test_round_trip_keeps_tokens_and_spans():
+    nodes = parse_all(corpus(50, seed=3) + ['VAR x = -(1 + y) ^ 2', 'NOT a AND b'])
+    # The optimizer gives folded nodes spans of the subtree they replaced.
+    nodes += [Optimizer().optimize(node) for node in parse_all(['x * (2 + 3)', '(1 + 2) * 4 - y'])]
+    loaded = loads_many(dumps_many(nodes))
+    assert [shape(node) for node in loaded] == [shape(node) for node in nodes]
+
+
+def payload(blob: bytes) -> list:
+    return list(marshal.loads(zlib.decompress(blob[len(AST_MAGIC):])))
+
+
+def blob(fields: list) -> bytes:
+    return AST_MAGIC + zlib.compress(marshal.dumps(tuple(fields)))
+
+
+def records_of(fields: list) -> list:
+    return list(memoryview(fields[7][1]).cast(fields[7][0]))
+
+
+def with_records(fields: list, records: list) -> list:
+    fields[7] = pack_ints(records)
+    return fields
+
+
+def corruptions():
+    good = payload(dumps_many(parse_all(['1 + x', 'VAR y = 2'])))
+    records = records_of(good)
+    yield 'truncated data', AST_MAGIC + zlib.compress(marshal.dumps(tuple(good)))[:-5]
+    yield 'wrong shape', blob(good[:-1])
+    yield 'not a tuple', blob([good])
+    # Every record a BinOp: the first one pops an empty stack.
+    binops = list(records)
+    binops[0::5] = [3] * (len(records) // 5)
+    yield 'stack underflow', blob(with_records(list(good), binops))
+    yield 'position out of range', blob(with_records(list(good), [records[0], 10 ** 6] + records[2:]))
+    yield 'negative position', blob(with_records(list(good), [records[0], -7] + records[2:]))
+    yield 'unknown kind', blob(with_records(list(good), [99] + records[1:]))
+    yield 'bad array type', blob(good[:7] + [('d', good[7][1])] + good[8:])
+    yield 'count mismatch', blob(good[:2] + [5] + good[3:])
+
+
+@pytest.mark.parametrize('name, data', list(corruptions()))
+def test_corrupt_blobs_raise_value_error(name, data):
+    with pytest.raises(ValueError):
+        loads_many(data)
+
+
+def test_disk_cache_drops_corrupt_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), background=False)
+    cache.put('<t>', '1 + x', parse_all(['1 + x'])[0])
+    path = cache.path(cache.key('<t>', '1 + x'))
+    good = payload(open(path, 'rb').read())
+    records = records_of(good)
+    with open(path, 'wb') as file:
+        file.write(blob(with_records(good, [records[0], 10 ** 6] + records[2:])))
+
+    assert cache.get('<t>', '1 + x') is None
+    assert not os.path.exists(path)
+    assert cache.stats()['misses'] == 1
+
+
+def test_disk_cache_writes_behind(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    node = parse_all(['2 * y'])[0]
+    cache.put('<t>', '2 * y', node)
+    # Queued or written, the entry is a hit.
+    assert shape(cache.get('<t>', '2 * y')) == shape(node)
+    cache.flush()
+    stats = cache.stats()
+    assert stats['writes'] == 1 and stats['pending'] == 0 and stats['failed_writes'] == 0
+    assert shape(DiskCache(str(tmp_path)).get('<t>', '2 * y')) == shape(node)
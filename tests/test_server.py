@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import asyncio
+import json
+
+import pytest
+
+from basiclang.server import Server
+
+
+async def exchange(server: Server, lines) -> list:
+    host, port = server.addresses()[0][:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    for line in lines:
+        writer.write(line.encode('utf-8') + b'\n')
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in lines]
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+def serve(lines, **options) -> tuple:
+    options.setdefault('workers', 1)
+
+    async def run():
+        server = await Server(**options).start()
+        try:
+            return await exchange(server, lines), server
+        finally:
+            await server.close()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize('pool', ['process', 'thread'])
+def test_round_trip(pool):
+    requests = [{'id': 1, 'text': 'VAR x = 2'}, {'id': 2, 'text': 'x * 3 + null'}, {'id': 3, 'text': 'y'}]
+    responses, server = serve([json.dumps(request) for request in requests], pool=pool, engine='closure')
+    assert responses[:2] == [{'id': 1, 'value': 2}, {'id': 2, 'value': 6}]
+    assert responses[2]['id'] == 3 and responses[2]['error']['details'] == "'y' is not defined"
+    if pool == 'thread':
+        assert server.cache.stats()['entries'] == 3
+
+
+def test_bad_requests():
+    responses, _ = serve(['{"id": 1, "text": ', '{"id": 2}', '{"id": 3, "text": "1 + 1"}'])
+    assert responses[0]['id'] is None and responses[0]['error']['name'] == 'Bad Request'
+    assert responses[1]['id'] == 2 and responses[1]['error']['name'] == 'Bad Request'
+    assert responses[2] == {'id': 3, 'value': 2}
+
+
+def test_timeout_leaves_the_session_unchanged():
+    lines = [json.dumps({'id': 1, 'text': 'VAR x = 9 ^ 9 ^ 9'}), json.dumps({'id': 2, 'text': 'x'})]
+    responses, server = serve(lines, timeout=0.5, workers=2)
+    assert responses[0]['error']['name'] == 'Timeout' and server.timeouts == 1
+    assert responses[1]['error']['details'] == "'x' is not defined"
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import sys
+import threading
+
+import pytest
+
+from basiclang.basic import ENGINES
+from basiclang.cache import ParseCache
+from basiclang.session import DEFAULT_BASE, FrozenSymbolTable, Session
+from benchmarks.bench_sessions import stress
+
+
+def test_snapshot_round_trip():
+    base = FrozenSymbolTable({'null': 0, 'rate': 3})
+    session = Session(base, cache=ParseCache())
+    session.run('<t>', 'VAR x = 7 * rate')
+    session.update({'big': 2 ** 70, 'half': 0.5, 'neg': -4})
+    # Shadowing a base name saves the session's value, not the base's.
+    session.run('<t>', 'VAR rate = 1')
+
+    data = session.dumps(include_asts=True)
+    restored = Session.loads(data, base)
+    assert restored.variables() == session.variables() == {'x': 21, 'big': 2 ** 70, 'half': 0.5, 'neg': -4,
+                                                         'rate': 1}
+    assert restored.get('null') == 0 and base.get('rate').value == 3
+    assert len(restored.options['cache']) == len(session.options['cache'])
+
+    # The restored session writes its own layer and saves that too.
+    value, error = restored.run('<t>', 'VAR y = x + neg')
+    assert error is None and value.value == 17
+    again = Session.loads(restored.dumps(), base)
+    assert again.variables() == dict(session.variables(), y=17)
+    assert Session.loads(data, base).get('y') is None
+
+
+def test_snapshot_without_asts_needs_no_cache():
+    session = Session()
+    session.set('a', 1)
+    restored = Session.loads(session.dumps())
+    assert restored.variables() == {'a': 1} and restored.options['cache'] is None
+    with pytest.raises(ValueError):
+        session.dumps(include_asts=True)
+
+
+def test_snapshot_rejects_other_data():
+    with pytest.raises(ValueError):
+        Session.loads(b'not a snapshot')
+
+
+def test_sessions_in_threads_see_only_their_own_variables():
+    cache = ParseCache()
+    failures = []
+    counts = [0] * 4
+    threads = [threading.Thread(target=stress, args=(i, 3, 30, cache, 0, failures, counts)) for i in range(4)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+    assert failures == []
+    assert counts == [3 * 30] * 4
+    assert DEFAULT_BASE.get('null').value == 0
+
+
+@pytest.mark.parametrize('engine', sorted(ENGINES))
+def test_assignments_shadow_the_base(engine):
+    base = FrozenSymbolTable({'null': 0, 'rate': 3})
+    first, second = Session(base, engine=engine), Session(base, engine=engine)
+    value, error = first.run('<t>', 'VAR rate = rate + 1')
+    assert error is None and value.value == 4
+    assert first.get('rate') == 4 and second.get('rate') == 3 and base.get('rate').value == 3
+    with pytest.raises(TypeError):
+        base.set('rate', 5)
+
+
+def test_fork_commit():
+    session = Session()
+    session.set('a', 1)
+    fork = session.fork()
+    fork.run('<t>', 'VAR b = a + 1')
+    fork.run('<t>', 'VAR a = 10')
+    assert fork.get('a') == 10 and fork.get('b') == 2
+    assert session.get('a') == 1 and session.get('b') is None
+
+    fork.commit()
+    assert session.variables() == {'a': 10, 'b': 2}
+    # Committing moves the values; the fork goes on reading them from its parent.
+    assert fork.variables() == {} and fork.get('a') == 10
+    with pytest.raises(Exception):
+        session.commit()
+
+
+def test_discarded_fork_changes_nothing():
+    session = Session()
+    session.set('a', 1)
+    fork = session.fork()
+    fork.run('<t>', 'VAR a = 99')
+    del fork
+    assert session.variables() == {'a': 1}
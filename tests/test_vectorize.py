@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+from __future__ import annotations
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from basiclang import basic
+from basiclang.vectorize import evaluate_columns
+
+
+def test_int_power_does_not_wrap(make_context):
+    xs, ys = [2, 3, 10, -7, 0, 5], [3, 40, 30, 21, 0, 2]
+    node, _ = basic.parse('<t>', 'x ^ y')
+    result = evaluate_columns(node, {'x': np.array(xs), 'y': np.array(ys)})
+    assert result.error is None
+    for x, y, got in zip(xs, ys, result.value):
+        value, error = basic.run_in_context(make_context(x=x, y=y), '<t>', 'x ^ y')
+        assert error is None and got == value.value == x ** y
+
+
+def test_small_int_power_stays_int64():
+    node, _ = basic.parse('<t>', 'x ^ 2')
+    result = evaluate_columns(node, {'x': np.arange(10)})
+    assert result.value.dtype == np.int64 and list(result.value) == [x * x for x in range(10)]
+
+
+@pytest.mark.parametrize('text', ['a * b + 1', 'a + b', 'a - b', '-a', '-(a * b) - 1', 'a * 3'])
+def test_int_arithmetic_does_not_wrap(text, make_context):
+    big = [2 ** 40, 2 ** 62, -2 ** 63, 2 ** 63 - 1, -5, 7]
+    columns = {'a': np.array(big, dtype=np.int64), 'b': np.array(big[::-1], dtype=np.int64)}
+    node, _ = basic.parse('<t>', text)
+    result = evaluate_columns(node, columns)
+    assert result.error is None
+    for a, b, got in zip(big, big[::-1], result.value):
+        value, error = basic.run_in_context(make_context(a=a, b=b), '<t>', text)
+        assert error is None and got == value.value
+
+
+def test_small_int_arithmetic_stays_int64():
+    node, _ = basic.parse('<t>', 'x * x - x + 1')
+    result = evaluate_columns(node, {'x': np.arange(-5, 5)})
+    assert result.value.dtype == np.int64 and list(result.value) == [x * x - x + 1 for x in range(-5, 5)]